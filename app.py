@@ -1,17 +1,28 @@
-from flask import Flask, render_template, session
+import click
+from flask import Flask, render_template
 from config import Config
 from extensions import db, login_manager, csrf
-from flask_migrate import Migrate
 
-migrate = Migrate()
 
-def create_app():
+def create_app(cli=None):
+    """Build the application.
+
+    Flask-Migrate/Alembic and the maintenance command groups are only loaded
+    for the ``flask`` command (detected from its click context, or forced with
+    `cli`), which keeps web worker cold starts short.
+    """
     app = Flask(__name__)
     app.config.from_object(Config)  # Ensure SECRET_KEY is set in Config
 
     # Initialize extensions
-    db.init_app(app)
-    migrate.init_app(app, db)
+    from services import database
+    database.init_app(app, db)  # engine/pool options, SQLite pragmas
+    from services import profiling
+    profiling.init_app(app, db)  # sampled request/SQL timings for admin.performance
+    from services import metrics
+    metrics.init_app(app, db)  # Prometheus /metrics (needs prometheus_client)
+    from services import warmup
+    warmup.init_app(app)  # shared template bytecode cache
     login_manager.init_app(app)
     csrf.init_app(app)  # CSRF Protection is applied globally
 
@@ -21,19 +32,39 @@ def create_app():
     from routes.auth_routes import auth_bp
     from routes.product_routes import product_bp
     from routes.admin_routes import admin_bp
+    from routes.api_routes import api_bp
     app.register_blueprint(auth_bp)
     app.register_blueprint(product_bp)
     app.register_blueprint(admin_bp, url_prefix='/admin')
+    app.register_blueprint(api_bp, url_prefix='/api/v1')
+
+    if cli is None:
+        cli = click.get_current_context(silent=True) is not None
+    if cli:
+        _init_cli(app)
+
+    # Server-side carts: login merge / logout hooks and `flask carts`
+    from services import cart_store
+    cart_store.init_app(app)
+
+    # Cart stock holds: background expiry sweeper
+    from services import reservations
+    reservations.init_app(app)
+
+    # srcset helper for templates/_image.html
+    from services.images import image_sources
+    app.add_template_global(image_sources)
 
     # Inject cart count globally into templates
     @app.context_processor
     def inject_cart_count():
-        cart = session.get("cart", {})
-        try:
-            count = sum(int(qty) for qty in cart.values())
-        except Exception:
-            count = 0
-        return {"cart_count": count}
+        return {"cart_count": cart_store.cart_count()}
+
+    # Category/subcategory filter options for the navbar (cached per worker)
+    @app.context_processor
+    def inject_catalog_facets():
+        from services.facets import get_facets
+        return {"facets": get_facets()}
 
     # Error handler
     @app.errorhandler(403)
@@ -43,20 +74,40 @@ def create_app():
     return app
 
 
-# Flask-Login User Loader
-from models import User
+def _init_cli(app):
+    """`flask db` migrations and the maintenance command groups."""
+    from flask_migrate import Migrate
+    Migrate(app, db)
+
+    from services.search import search_cli
+    from services.rollups import reports_cli
+    from services.images import images_cli
+    from services.catalog_io import catalog_cli
+    from services.order_export import orders_cli
+    from services.reviews import reviews_cli
+    from services.users import users_cli
+    from services.warmup import warmup_cli
+    from services.reservations import reservations_cli
+    from services.cart_store import carts_cli
+    app.cli.add_command(search_cli)
+    app.cli.add_command(reports_cli)
+    app.cli.add_command(images_cli)
+    app.cli.add_command(catalog_cli)
+    app.cli.add_command(orders_cli)
+    app.cli.add_command(reviews_cli)
+    app.cli.add_command(users_cli)
+    app.cli.add_command(warmup_cli)
+    app.cli.add_command(reservations_cli)
+    app.cli.add_command(carts_cli)
+
 
+# Flask-Login User Loader
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    from services.identity import identity_cache
+    return identity_cache.get(int(user_id))
 
 
 if __name__ == "__main__":
     app = create_app()
     app.run(debug=True)
-
-    from app import create_app
-app = create_app()
-with app.app_context():
-    print(sorted(app.url_map.iter_rules(), key=lambda r: r.endpoint))
-
@@ -0,0 +1,3 @@
+# benchmarks/__init__.py
+# Stand-alone performance scripts. Run each with `python -m benchmarks.<name>`;
+# they build their own throwaway SQLite database and never touch instance/.
@@ -0,0 +1,84 @@
+# benchmarks/cart_pricing.py
+"""Cart pricing latency and query count versus cart size.
+
+    python -m benchmarks.cart_pricing [--products 5000] [--repeat 200]
+
+Compares the old one-query-per-line lookup with ``services.cart.price_cart``.
+The batched engine should stay at one query and roughly flat latency as the
+cart grows.
+"""
+import argparse
+import random
+import time
+
+from sqlalchemy import event
+
+from benchmarks.common import build_app
+
+
+def _seed(n_products):
+    from extensions import db
+    from models import Product
+    db.create_all()
+    db.session.bulk_insert_mappings(Product, [
+        {"name": f"Piece {i}", "price": 1000 + i, "stock": 10}
+        for i in range(n_products)
+    ])
+    db.session.commit()
+
+
+def _per_line(cart):
+    from models import Product
+    items = []
+    for pid_str, qty in cart.items():
+        product = Product.query.get(int(pid_str))
+        if product:
+            items.append((product, int(qty)))
+    return items
+
+
+def _batched(cart):
+    from flask import g
+    from services.cart import price_cart
+    g.pop("_priced_carts", None)
+    return price_cart(cart).items
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--sizes", default="1,5,10,20,50,100")
+    args = parser.parse_args()
+
+    app, tmpdir = build_app()
+    with tmpdir:
+        from extensions import db
+
+        with app.app_context():
+            _seed(args.products)
+            statements = []
+            event.listen(db.engine, "before_cursor_execute",
+                         lambda *a, **k: statements.append(1))
+
+            rng = random.Random(42)
+            print(f"{'size':>5} {'engine':>9} {'queries':>8} {'mean ms':>9}")
+            for size in [int(s) for s in args.sizes.split(",")]:
+                ids = rng.sample(range(1, args.products + 1), size)
+                cart = {str(pid): 1 for pid in ids}
+                for name, fn in (("per-line", _per_line), ("batched", _batched)):
+                    with app.test_request_context():
+                        db.session.expunge_all()
+                        statements.clear()
+                        fn(cart)
+                        queries = len(statements)
+                        start = time.perf_counter()
+                        for _ in range(args.repeat):
+                            db.session.expunge_all()
+                            fn(cart)
+                        elapsed = (time.perf_counter() - start) / args.repeat
+                    print(f"{size:>5} {name:>9} {queries:>8} {elapsed * 1000:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
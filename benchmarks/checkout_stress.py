@@ -0,0 +1,91 @@
+# benchmarks/checkout_stress.py
+"""Concurrent checkout stress run.
+
+    python -m benchmarks.checkout_stress [--threads 16] [--stock 200] [--database-url URL]
+
+Many threads buy the same limited piece, one unit at a time, through
+``services.orders.place_order`` until it sells out. The run fails (exit 1)
+if more units were sold than were in stock, or if stock ends below zero.
+It also reports orders per second.
+"""
+import argparse
+import sys
+import threading
+import time
+
+from benchmarks.common import build_app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--stock", type=int, default=200)
+    parser.add_argument("--qty", type=int, default=1)
+    parser.add_argument("--database-url", default=None,
+                        help="defaults to a throwaway SQLite file")
+    args = parser.parse_args()
+
+    app, tmpdir = build_app(args.database_url)
+    from extensions import db
+    from models import User, Product, Order, OrderItem
+    from services.cart import CartLine
+    from services.orders import place_order, OutOfStock
+
+    with app.app_context():
+        db.create_all()
+        OrderItem.query.delete()
+        Order.query.delete()
+        user = User(username="stress", email="stress@example.com", password_hash="x")
+        product = Product(name="Limited Edition Choker", price=99999.0, stock=args.stock)
+        db.session.add_all([user, product])
+        db.session.commit()
+        user_id, product_id = user.id, product.id
+
+    sold, out_of_stock, errors = [], [], []
+    lock = threading.Lock()
+
+    def buyer():
+        with app.app_context():
+            while True:
+                piece = db.session.get(Product, product_id)
+                try:
+                    place_order(user_id, [CartLine(product=piece, qty=args.qty)])
+                except OutOfStock:
+                    with lock:
+                        out_of_stock.append(1)
+                    return
+                except Exception as exc:  # surfaced in the summary
+                    with lock:
+                        errors.append(repr(exc))
+                    return
+                finally:
+                    db.session.remove()
+                with lock:
+                    sold.append(args.qty)
+
+    threads = [threading.Thread(target=buyer) for _ in range(args.threads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    with app.app_context():
+        final_stock = db.session.get(Product, product_id).stock
+        ordered = db.session.query(db.func.sum(OrderItem.quantity)).scalar() or 0
+
+    units = sum(sold)
+    print(f"threads={args.threads} stock={args.stock} sold={units} ordered={ordered} "
+          f"final_stock={final_stock} rejected={len(out_of_stock)} errors={len(errors)}")
+    print(f"{len(sold) / elapsed:.1f} orders/s over {elapsed:.2f}s")
+    for err in errors[:5]:
+        print("  error:", err)
+
+    oversold = units > args.stock or ordered != units or final_stock < 0
+    tmpdir.cleanup()
+    sys.exit(1 if oversold or errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# benchmarks/common.py
+"""Shared setup for the benchmark scripts: a throwaway app and seeded data."""
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+CATEGORIES = ["Gold", "Silver", "Platinum", "Diamond", "Rose Gold"]
+SUBCATEGORIES = ["Necklace", "Long Haaram", "Ring", "Earrings", "Bracelet", "Other"]
+WORDS = ["antique", "temple", "kundan", "polki", "bridal", "daily", "filigree",
+         "meenakari", "jhumka", "choker", "kada", "solitaire", "stud", "chain"]
+STATUSES = ["PLACED", "PAID", "SHIPPED", "DELIVERED", "CANCELLED"]
+PASSWORD = "benchmark"
+
+# data volumes for seed(**PRESETS[name])
+PRESETS = {
+    "small": dict(products=2_000, users=500, orders=10_000, reviews=2_000),
+    "medium": dict(products=20_000, users=10_000, orders=100_000, reviews=20_000),
+    "full": dict(products=100_000, users=50_000, orders=1_000_000, reviews=200_000),
+}
+
+
+def build_app(database_url=None):
+    """Create the app against `database_url` or a fresh temporary SQLite file.
+
+    Returns ``(app, tmpdir)``; keep `tmpdir` alive for the life of the run.
+    """
+    tmpdir = tempfile.TemporaryDirectory()
+    url = database_url or f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+    os.environ["DATABASE_URL"] = url
+    from config import Config
+    Config.SQLALCHEMY_DATABASE_URI = url
+
+    from app import create_app
+    app = create_app()
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    return app, tmpdir
+
+
+def _chunks(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _insert(model, rows, batch_size=5000):
+    from sqlalchemy import insert
+    from extensions import db
+    for batch in _chunks(rows, batch_size):
+        db.session.execute(insert(model), batch)
+    db.session.commit()
+
+
+def seed(products=1000, users=200, orders=2000, reviews=500, items_per_order=3,
+         days=730, rng_seed=42):
+    """Create the schema and fill it with deterministic synthetic data.
+
+    Call inside an app context. Generates rows lazily and inserts them in
+    batches, so memory stays flat regardless of volume. User N has email
+    ``userN@example.com`` and password ``benchmark``; user 1 is an admin.
+    """
+    from sqlalchemy import text
+    from extensions import db
+    from models import Category, Product, User, Order, OrderItem, Review
+    from services import search, rollups, reviews as review_service
+
+    rng = random.Random(rng_seed)
+    db.create_all()
+    search.create_index()
+
+    categories = [(c, s) for c in CATEGORIES for s in SUBCATEGORIES]
+    _insert(Category, ({"id": i + 1, "name": c, "subcategory": s}
+                       for i, (c, s) in enumerate(categories)))
+
+    prices = {}
+    product_categories = {}
+
+    def product_rows():
+        for pid in range(1, products + 1):
+            words = rng.sample(WORDS, 3)
+            price = round(rng.uniform(800, 250000), 2)
+            prices[pid] = price
+            # same draw order as before, so seeded data does not change
+            description = " ".join(words + rng.sample(WORDS, 4))
+            stock = rng.randint(0, 50)
+            product_categories[pid] = rng.randint(1, len(categories))
+            yield {
+                "id": pid,
+                "name": f"{words[0].title()} {words[1].title()} {pid}",
+                "description": description,
+                "price": price,
+                "stock": stock,
+                "category_id": product_categories[pid],
+            }
+    _insert(Product, product_rows())
+
+    password_hash = generate_password_hash(PASSWORD)
+    _insert(User, ({
+        "id": uid,
+        "username": f"user{uid}",
+        "email": f"user{uid}@example.com",
+        "password_hash": password_hash,
+        "is_admin": uid == 1,
+    } for uid in range(1, users + 1)))
+
+    start = datetime.utcnow() - timedelta(days=days)
+    items = []
+
+    def order_rows():
+        item_id = 0
+        for oid in range(1, orders + 1):
+            lines = []
+            for _ in range(rng.randint(1, items_per_order)):
+                pid = rng.randint(1, products)
+                item_id += 1
+                lines.append({"id": item_id, "order_id": oid, "product_id": pid,
+                              "quantity": rng.randint(1, 3), "unit_price": prices[pid],
+                              "category_id": product_categories[pid]})
+            items.append(lines)
+            yield {
+                "id": oid,
+                "user_id": rng.randint(2, max(2, users)),
+                "total_amount": sum(l["quantity"] * l["unit_price"] for l in lines),
+                "status": rng.choice(STATUSES),
+                "created_at": start + timedelta(seconds=rng.randint(0, days * 86400)),
+            }
+
+    def item_rows():
+        while items:
+            yield from items.pop()
+
+    for batch in _chunks(order_rows(), 5000):
+        _insert(Order, batch)
+        _insert(OrderItem, item_rows())
+
+    def review_pairs():
+        # one review per (user, product), as the schema enforces
+        seen = set()
+        while len(seen) < min(reviews, max(1, users - 1) * products):
+            pair = (rng.randint(2, max(2, users)), rng.randint(1, products))
+            if pair not in seen:
+                seen.add(pair)
+                yield pair
+
+    _insert(Review, ({
+        "user_id": user_id,
+        "product_id": product_id,
+        "content": " ".join(rng.sample(WORDS, 5)),
+        "rating": rng.randint(1, 5),
+        "approved": rng.random() < 0.8,
+        "created_at": start + timedelta(seconds=rng.randint(0, days * 86400)),
+    } for user_id, product_id in review_pairs()))
+
+    search.rebuild_index()
+    rollups.backfill()
+    review_service.reconcile()
+    db.session.execute(text("ANALYZE"))  # give the planner real statistics
+    db.session.commit()
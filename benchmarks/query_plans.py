@@ -0,0 +1,156 @@
+# benchmarks/query_plans.py
+"""Query-plan regression check.
+
+    python -m benchmarks.query_plans [--products 20000] [--orders 50000] [-v]
+
+Seeds a large SQLite dataset, drives every blueprint endpoint through the
+test client, and records each SQL statement the request issues. It then
+runs ``EXPLAIN QUERY PLAN`` on each one. Exits 1 if any statement does a
+full table scan that is not explicitly allowed below, so a dropped index
+or an unindexable new filter fails the check.
+"""
+import argparse
+import re
+import sys
+from collections import defaultdict
+
+from flask import request, has_request_context
+from sqlalchemy import event
+
+from benchmarks.common import build_app, seed, PASSWORD
+from services.pagination import encode_cursor
+
+# Tables that are small by construction; scanning them is expected.
+SMALL_TABLES = {"category", "catalog_version",
+                "sales_daily", "sales_daily_product", "sales_daily_category"}
+
+# (endpoint, table) scans that are known and accepted, with the reason.
+ALLOWED_SCANS = {
+    ("admin.products_list", "product"): "unpaginated admin listing",
+    ("product.suggest_view", "product"): "autocomplete index build, once per catalog version",
+}
+
+_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)")
+
+
+def scenarios(product_id, order_id, new_order_id, customer):
+    newest = encode_cursor([product_id])
+    return [
+        # (login, method, url, form)
+        (None, "GET", "/", None),
+        (None, "GET", f"/?after={newest}", None),
+        (None, "GET", "/?sort=price_asc", None),
+        (None, "GET", "/?sort=price_desc&category=Gold", None),
+        (None, "GET", "/?subcategory=Ring", None),
+        (None, "GET", "/?category=Silver&subcategory=Earrings", None),
+        (None, "GET", "/?q=kundan+bridal", None),
+        (None, "GET", "/?sort=rating", None),
+        (None, "GET", "/products/fragment?sort=price_asc", None),
+        (None, "GET", f"/product/{product_id}", None),
+        (None, "GET", "/api/v1/products?sort=price_asc", None),
+        (None, "GET", "/api/v1/products?category=Gold&q=kundan", None),
+        (None, "GET", f"/api/v1/products/{product_id}", None),
+        (None, "GET", "/api/v1/categories", None),
+        (None, "GET", "/api/suggest?q=kun", None),
+        ("user", "POST", f"/cart/add/{product_id}", {"qty": "1"}),
+        ("user", "GET", "/cart", None),
+        ("user", "POST", "/cart/update", {f"qty_{product_id}": "1"}),
+        ("user", "POST", "/cart/checkout", None),
+        ("user", "GET", "/my/orders", None),
+        ("user", "GET", f"/my/orders/{new_order_id}", None),
+        ("user", "GET", "/profile", None),
+        ("admin", "GET", "/admin/admin_dashboard", None),
+        ("admin", "GET", "/admin/admin_reviews", None),
+        ("admin", "GET", "/admin/admin_reviews?show=all", None),
+        ("admin", "GET", "/admin/admin_orders", None),
+        ("admin", "GET", "/admin/admin_orders?status=SHIPPED", None),
+        ("admin", "GET", "/admin/admin_orders?from=2025-01-01&to=2025-01-31", None),
+        ("admin", "GET", f"/admin/admin_orders?customer={customer}", None),
+        ("admin", "POST", f"/admin/admin_orders/{order_id}/status", {"status": "SHIPPED"}),
+        ("admin", "POST", "/admin/admin_orders/status",
+         {"order_id": [str(order_id + i) for i in range(1, 50)], "status": "CANCELLED"}),
+        ("admin", "GET", f"/admin/admin_orders/{order_id}/events", None),
+        ("admin", "GET", "/admin/admin_reports", None),
+        ("admin", "GET", "/admin/admin_categories", None),
+        ("admin", "GET", "/admin/admin/products", None),
+        ("admin", "GET", f"/admin/admin/products/{product_id}/edit", None),
+        ("admin", "GET", "/admin/admin/customers", None),
+        ("admin", "GET", "/admin/admin/customers?sort=spend", None),
+        ("admin", "GET", f"/admin/admin/customers?sort=spend&after={encode_cursor([100.0, 5])}", None),
+        ("admin", "GET", f"/admin/admin/customers?q={customer}", None),
+    ]
+
+
+def is_violation(endpoint, statement, plan):
+    details = [row[-1] for row in plan]
+    bounded = " LIMIT " in statement.upper() and not any("TEMP B-TREE" in d for d in details)
+    if re.match(r"^\s*SELECT count\(\*\)", statement, re.I):
+        return []  # plain COUNT(*) is O(n) by definition
+    found = []
+    for detail in details:
+        m = _SCAN.match(detail)
+        if not m or "VIRTUAL TABLE" in detail:
+            continue
+        table = m.group(1)
+        if table in SMALL_TABLES or (endpoint, table) in ALLOWED_SCANS or bounded:
+            continue
+        found.append(detail)
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--orders", type=int, default=50000)
+    parser.add_argument("--reviews", type=int, default=20000)
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+
+    app, tmpdir = build_app()
+    from extensions import db
+
+    with app.app_context():
+        seed(products=args.products, users=args.users, orders=args.orders, reviews=args.reviews)
+        engine = db.engine
+
+    recorded = defaultdict(list)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if has_request_context() and statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            params = parameters[0] if executemany else parameters
+            recorded[request.endpoint].append((statement, params))
+
+    clients = {None: app.test_client(), "user": app.test_client(), "admin": app.test_client()}
+    clients["user"].post("/login", data={"email": "user2@example.com", "password": PASSWORD})
+    clients["admin"].post("/admin/login", data={"email": "user1@example.com", "password": PASSWORD})
+
+    for who, method, url, form in scenarios(args.products // 2, args.orders // 2,
+                                                args.orders + 1, "user3@example.com"):
+        response = clients[who].open(url, method=method, data=form)
+        if response.status_code >= 400:
+            print(f"FAIL {method} {url} -> {response.status_code}")
+            sys.exit(1)
+
+    event.remove(engine, "before_cursor_execute", record)
+
+    failures = 0
+    with engine.connect() as conn:
+        for endpoint, statements in sorted(recorded.items(), key=lambda kv: str(kv[0])):
+            for statement, params in dict.fromkeys(statements):
+                plan = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, params).all()
+                bad = is_violation(endpoint, statement, plan)
+                if bad or args.verbose:
+                    print(f"{'SCAN' if bad else 'ok  '} {endpoint}: {' '.join(statement.split())[:140]}")
+                    for row in plan:
+                        print(f"       {row[-1]}")
+                failures += bool(bad)
+
+    print(f"{sum(len(s) for s in recorded.values())} statements checked, {failures} full scans")
+    tmpdir.cleanup()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# benchmarks/sqlite_tuning.py
+"""Concurrent read + checkout throughput with and without SQLite tuning.
+
+    python -m benchmarks.sqlite_tuning [--readers 8] [--buyers 4] [--seconds 10]
+
+Runs the same workload twice in fresh processes: first SQLITE_TUNING=0
+(rollback journal, default pragmas), then the production profile from
+services/database.py (WAL, synchronous=NORMAL, busy_timeout, mmap and
+cache size). Reader threads fetch the storefront grid and product pages
+through the test client. Buyer threads place one-unit orders through
+``services.orders.place_order``. Throughput and error counts are printed
+for both modes.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+
+MODES = {"default": "0", "tuned": "1"}
+
+
+def run_workload(args):
+    """Child process: seed, hammer for args.seconds, print one JSON line."""
+    from benchmarks.common import build_app, seed
+    app, tmpdir = build_app()
+    from extensions import db
+    from models import Product
+    from services.cart import CartLine
+    from services.orders import place_order, OutOfStock
+
+    with app.app_context():
+        seed(products=args.products, users=50, orders=args.orders)
+        Product.query.update({Product.stock: 1_000_000})
+        db.session.commit()
+        journal = db.session.execute(db.text("PRAGMA journal_mode")).scalar()
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    counts = {"reads": 0, "orders": 0, "read_errors": 0, "order_errors": 0}
+
+    def bump(key):
+        with lock:
+            counts[key] += 1
+
+    def reader(n):
+        rng = random.Random(n)
+        client = app.test_client()
+        while not stop.is_set():
+            url = "/" if rng.random() < 0.5 else f"/product/{rng.randint(1, args.products)}"
+            bump("reads" if client.get(url).status_code == 200 else "read_errors")
+
+    def buyer(n):
+        rng = random.Random(1000 + n)
+        with app.app_context():
+            while not stop.is_set():
+                try:
+                    piece = db.session.get(Product, rng.randint(1, args.products))
+                    place_order(2, [CartLine(product=piece, qty=1)])
+                    bump("orders")
+                except OutOfStock:
+                    pass
+                except Exception:
+                    bump("order_errors")
+                finally:
+                    db.session.remove()
+
+    threads = ([threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+               + [threading.Thread(target=buyer, args=(i,)) for i in range(args.buyers)])
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    result = {k: v for k, v in counts.items()}
+    result.update(journal=journal, elapsed=round(elapsed, 2),
+                  reads_per_s=round(counts["reads"] / elapsed, 1),
+                  orders_per_s=round(counts["orders"] / elapsed, 1))
+    print(json.dumps(result))
+    tmpdir.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--buyers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--mode", choices=sorted(MODES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        return run_workload(args)
+
+    results = {}
+    for mode, flag in MODES.items():
+        cmd = [sys.executable, "-m", "benchmarks.sqlite_tuning", "--mode", mode,
+               "--readers", str(args.readers), "--buyers", str(args.buyers),
+               "--seconds", str(args.seconds), "--products", str(args.products),
+               "--orders", str(args.orders)]
+        out = subprocess.run(cmd, env={**os.environ, "SQLITE_TUNING": flag},
+                             capture_output=True, text=True, check=True).stdout
+        results[mode] = json.loads(out.strip().splitlines()[-1])
+
+    print(f"{'mode':<8} {'journal':<8} {'reads/s':>9} {'orders/s':>9} {'read err':>9} {'order err':>10}")
+    for mode, r in results.items():
+        print(f"{mode:<8} {r['journal']:<8} {r['reads_per_s']:>9} {r['orders_per_s']:>9} "
+              f"{r['read_errors']:>9} {r['order_errors']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# benchmarks/startup.py
+"""Worker cold-start budget check.
+
+    python -m benchmarks.startup [--runs 7] [--budget-ms 1000] [-v]
+
+Imports ``wsgi`` (which builds the app) in fresh interpreters, the same
+way a new gunicorn worker does, and reports the median wall time. Exits 1
+if the median is over budget, or if any CLI-only or lazily loaded
+dependency (``LAZY_MODULES``) was imported on the way. With -v, also
+prints the slowest imports from ``python -X importtime``.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only needed by the `flask` command or on first use; must not load at start-up.
+LAZY_MODULES = ("flask_migrate", "alembic", "PIL", "sqlalchemy.dialects.postgresql",
+                "services.catalog_io", "services.users")
+
+_CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+import wsgi
+elapsed = time.perf_counter() - t0
+print(json.dumps({"ms": elapsed * 1000,
+                  "loaded": [m for m in %r if m in sys.modules]}))
+""" % (LAZY_MODULES,)
+
+
+def _run(code, *flags):
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)  # measure with cached bytecode, as deployed
+    env.setdefault("DATABASE_URL", "sqlite://")
+    return subprocess.run([sys.executable, *flags, "-c", code], cwd=ROOT, env=env,
+                          capture_output=True, text=True, check=True)
+
+
+def slowest_imports(limit=15):
+    """[(cumulative ms, module)] from -X importtime, slowest first."""
+    rows = []
+    for line in _run("import wsgi", "-X", "importtime").stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            rows.append((int(cumulative) / 1000, name.strip()))
+        except ValueError:
+            continue  # header line
+    return sorted(rows, reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--budget-ms", type=float,
+                        default=float(os.environ.get("STARTUP_BUDGET_MS", 1000)))
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+
+    _run(_CHILD)  # warm the bytecode and OS file caches
+    samples, loaded = [], set()
+    for _ in range(args.runs):
+        result = json.loads(_run(_CHILD).stdout.strip().splitlines()[-1])
+        samples.append(result["ms"])
+        loaded.update(result["loaded"])
+
+    median = statistics.median(samples)
+    print(f"wsgi cold start: median {median:.0f}ms, min {min(samples):.0f}ms, "
+          f"max {max(samples):.0f}ms over {args.runs} runs (budget {args.budget_ms:.0f}ms)")
+    if args.verbose:
+        for ms, name in slowest_imports():
+            print(f"  {ms:8.1f}ms  {name}")
+
+    failed = False
+    if loaded:
+        print(f"FAIL loaded at start-up: {', '.join(sorted(loaded))}")
+        failed = True
+    if median > args.budget_ms:
+        print("FAIL over budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
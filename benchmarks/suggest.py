@@ -0,0 +1,83 @@
+# benchmarks/suggest.py
+"""Autocomplete latency: in-memory prefix index versus an ILIKE query.
+
+    python -m benchmarks.suggest [--products 20000] [--lookups 5000] [--budget-us 500]
+
+Builds the index from a seeded catalog and times cold lookups (the
+per-prefix memo is cleared before each one) for prefixes of 1-6 typed
+characters. The prefix ILIKE query that autocomplete would otherwise run
+is timed alongside. Exits 1 if the index's p99 is over budget.
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+
+from benchmarks.common import build_app, seed
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=20_000)
+    parser.add_argument("--lookups", type=int, default=5000)
+    parser.add_argument("--limit", type=int, default=8)
+    parser.add_argument("--budget-us", type=float, default=500)
+    args = parser.parse_args()
+
+    app, tmpdir = build_app()
+    with tmpdir:
+        from sqlalchemy import select
+        from extensions import db
+        from models import Product
+        from services import suggest
+
+        with app.test_request_context():
+            seed(products=args.products, users=10, orders=0, reviews=0)
+            start = time.perf_counter()
+            index = suggest.build()
+            build_ms = (time.perf_counter() - start) * 1000
+            print(f"build: {build_ms:.0f}ms, {index.stats().summary()}")
+
+            rng = random.Random(7)
+            names = db.session.scalars(select(Product.name)).all()
+            prefixes = []
+            for _ in range(args.lookups):
+                words = suggest.normalise(rng.choice(names)).split(" ")
+                word = " ".join(words[rng.randrange(len(words)):])
+                prefixes.append(word[:rng.randint(1, 6)])
+
+            index_us = []
+            for prefix in prefixes:
+                index._memo = {}
+                t0 = time.perf_counter()
+                index.search(prefix, args.limit)
+                index_us.append((time.perf_counter() - t0) * 1e6)
+
+            sql_us = []
+            for prefix in prefixes[:200]:
+                t0 = time.perf_counter()
+                db.session.execute(
+                    select(Product.id, Product.name)
+                    .where(Product.name.ilike(f"%{prefix}%")).limit(args.limit)
+                ).all()
+                sql_us.append((time.perf_counter() - t0) * 1e6)
+
+        print(f"{'engine':>7} {'p50 us':>9} {'p99 us':>9} {'max us':>9}")
+        for name, samples in (("index", index_us), ("ilike", sql_us)):
+            print(f"{name:>7} {statistics.median(samples):>9.1f} "
+                  f"{_percentile(samples, 99):>9.1f} {max(samples):>9.1f}")
+
+    p99 = _percentile(index_us, 99)
+    if p99 > args.budget_us:
+        print(f"FAIL index p99 {p99:.0f}us over budget {args.budget_us:.0f}us")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+# benchmarks/suite.py
+"""End-to-end benchmark suite.
+
+    python -m benchmarks.suite [--preset small|medium|full] [--runner client|wsgi]
+                               [--threads 4] [--iterations 200] [--output out.json]
+                               [--database-url URL] [--compare baseline.json]
+
+Seeds a dataset with ``benchmarks.common.seed`` (``full`` is 100k products,
+50k users, 1M orders). With --database-url an already seeded database is
+reused. Each scenario below then runs --iterations times across --threads
+threads, either in-process through the Flask test client or over HTTP
+against a threaded WSGI server.
+
+Latency is measured per iteration; an iteration may make several requests
+(the cart flow makes three). Per scenario the suite reports p50/p95/p99 and
+mean latency, throughput and SQL statements per iteration. Results are
+printed as JSON; with --compare each metric is also shown against an
+earlier run.
+"""
+import argparse
+import http.cookiejar
+import json
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter
+
+from flask import request, has_request_context
+from sqlalchemy import event
+
+from benchmarks.common import (build_app, seed, PRESETS, PASSWORD, CATEGORIES,
+                               SUBCATEGORIES, WORDS, STATUSES)
+
+SCENARIO_HEADER = "X-Benchmark-Scenario"
+CHECKOUT_POOL = 200  # products kept in stock for the checkout scenario
+
+
+# ---------- scenarios ----------
+# Each step function returns (method, path, form); a scenario is a role
+# ("user", "admin" or None for anonymous) plus the steps of one iteration.
+def _home(rng, ctx):
+    sort = rng.choice(["newest", "price_asc", "price_desc"])
+    return [("GET", f"/?sort={sort}", None)]
+
+
+def _search(rng, ctx):
+    q = " ".join(rng.sample(WORDS, rng.randint(1, 2)))
+    return [("GET", "/?" + urllib.parse.urlencode({"q": q}), None)]
+
+
+def _filters(rng, ctx):
+    args = {"category": rng.choice(CATEGORIES)}
+    if rng.random() < 0.5:
+        args["subcategory"] = rng.choice(SUBCATEGORIES)
+    return [("GET", "/?" + urllib.parse.urlencode(args), None)]
+
+
+def _product_detail(rng, ctx):
+    return [("GET", f"/product/{rng.randint(1, ctx['products'])}", None)]
+
+
+def _cart_flow(rng, ctx):
+    pid = rng.randint(1, CHECKOUT_POOL)
+    return [("POST", f"/cart/add/{pid}", {"qty": "1"}),
+            ("GET", "/cart", None),
+            ("POST", "/cart/remove/%d" % pid, {})]
+
+
+def _checkout(rng, ctx):
+    pid = rng.randint(1, CHECKOUT_POOL)
+    return [("POST", f"/cart/add/{pid}", {"qty": "1"}),
+            ("POST", "/cart/checkout", {})]
+
+
+def _admin_orders(rng, ctx):
+    args = {}
+    if rng.random() < 0.5:
+        args["status"] = rng.choice(STATUSES)
+    return [("GET", "/admin/admin_orders?" + urllib.parse.urlencode(args), None)]
+
+
+def _reports(rng, ctx):
+    return [("GET", "/admin/admin_reports", None)]
+
+
+SCENARIOS = {
+    "home": (None, _home),
+    "search": (None, _search),
+    "filters": (None, _filters),
+    "product_detail": (None, _product_detail),
+    "cart_flow": ("user", _cart_flow),
+    "checkout": ("user", _checkout),
+    "admin_orders": ("admin", _admin_orders),
+    "reports": ("admin", _reports),
+}
+
+
+# ---------- clients ----------
+class TestClientSession:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, form, headers):
+        resp = self.client.open(path, method=method, data=form, headers=headers)
+        return resp.status_code
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # report the 302 itself, as the test client does
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HTTPSession:
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect())
+
+    def request(self, method, path, form, headers):
+        data = urllib.parse.urlencode(form).encode() if form is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method,
+                                     headers=headers)
+        try:
+            with self.opener.open(req) as resp:
+                resp.read()
+                return resp.status
+        except urllib.error.HTTPError as exc:
+            return exc.code
+
+
+def _serve(app):
+    """Start a threaded WSGI server on a free port; returns (server, base_url)."""
+    from werkzeug.serving import make_server, WSGIRequestHandler
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def _login(session, role, user_no):
+    if role is None:
+        return
+    email = "user1@example.com" if role == "admin" else f"user{user_no}@example.com"
+    path = "/admin/login" if role == "admin" else "/login"
+    session.request("POST", path, {"email": email, "password": PASSWORD}, {})
+
+
+# ---------- measurement ----------
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def run_scenario(name, make_session, ctx, threads, iterations, rng_seed):
+    role, steps = SCENARIOS[name]
+    latencies, errors = [], Counter()
+    lock = threading.Lock()
+    per_thread = [iterations // threads + (1 if i < iterations % threads else 0)
+                  for i in range(threads)]
+    ctx["queries"].pop(name, None)
+
+    def worker(n):
+        rng = random.Random(f"{rng_seed}-{name}-{n}")
+        session = make_session()
+        # a distinct customer per thread so carts do not collide
+        _login(session, role, user_no=2 + n)
+        headers = {SCENARIO_HEADER: name}
+        local = []
+        for _ in range(per_thread[n]):
+            plan = steps(rng, ctx)
+            start = time.perf_counter()
+            for method, path, form in plan:
+                status = session.request(method, path, form, headers)
+                if status >= 400:
+                    with lock:
+                        errors[status] += 1
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    ms = [v * 1000 for v in latencies]
+    done = len(latencies)
+    return {
+        "iterations": done,
+        "requests": done * len(steps(random.Random(0), ctx)),
+        "errors": dict(errors),
+        "p50_ms": round(_percentile(ms, 50), 2),
+        "p95_ms": round(_percentile(ms, 95), 2),
+        "p99_ms": round(_percentile(ms, 99), 2),
+        "mean_ms": round(sum(ms) / done, 2) if done else 0.0,
+        "throughput_per_s": round(done / elapsed, 1) if elapsed else 0.0,
+        "queries_per_iteration": round(ctx["queries"].get(name, 0) / done, 1) if done else 0.0,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _prepare(app, preset):
+    from extensions import db
+    from models import Product
+    with app.app_context():
+        db.create_all()
+        if not db.session.query(Product.id).first():
+            started = time.perf_counter()
+            seed(**PRESETS[preset])
+            print(f"seeded {preset} dataset in {time.perf_counter() - started:.0f}s",
+                  file=sys.stderr)
+        # keep the checkout pool in stock so the scenario stays repeatable
+        Product.query.filter(Product.id <= CHECKOUT_POOL).update({Product.stock: 1_000_000})
+        db.session.commit()
+        return db.session.query(db.func.max(Product.id)).scalar()
+
+
+def _compare(results, baseline_path):
+    with open(baseline_path) as fh:
+        baseline = json.load(fh)["scenarios"]
+    print(f"{'scenario':<16} {'metric':<22} {'baseline':>10} {'current':>10} {'change':>8}",
+          file=sys.stderr)
+    for name, current in results.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms", "throughput_per_s", "queries_per_iteration"):
+            old, new = before.get(metric), current[metric]
+            change = f"{(new - old) / old * 100:+.0f}%" if old else "n/a"
+            print(f"{name:<16} {metric:<22} {old:>10} {new:>10} {change:>8}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="small")
+    parser.add_argument("--database-url", default=None,
+                        help="reuse this database (seeded on first use)")
+    parser.add_argument("--runner", choices=["client", "wsgi"], default="client")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--iterations", type=int, default=200, help="per scenario")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON report here as well as stdout")
+    parser.add_argument("--compare", help="earlier JSON report to diff against")
+    args = parser.parse_args()
+
+    app, tmpdir = build_app(args.database_url)
+    from extensions import db
+
+    ctx = {"products": _prepare(app, args.preset), "queries": Counter()}
+    queries_lock = threading.Lock()
+
+    def count_statement(*_):
+        if has_request_context():
+            name = request.headers.get(SCENARIO_HEADER)
+            if name:
+                with queries_lock:
+                    ctx["queries"][name] += 1
+
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", count_statement)
+
+    server = None
+    if args.runner == "wsgi":
+        server, base_url = _serve(app)
+        make_session = lambda: HTTPSession(base_url)
+    else:
+        make_session = lambda: TestClientSession(app)
+
+    results = {}
+    for name in args.scenarios.split(","):
+        results[name] = run_scenario(name, make_session, ctx, args.threads,
+                                     args.iterations, args.seed)
+        print(f"{name:<16} p50 {results[name]['p50_ms']:>8} ms  "
+              f"p99 {results[name]['p99_ms']:>8} ms  "
+              f"{results[name]['throughput_per_s']:>7}/s", file=sys.stderr)
+
+    if server is not None:
+        server.shutdown()
+
+    with app.app_context():
+        database = db.engine.url.render_as_string(hide_password=True)
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "preset": args.preset,
+            "runner": args.runner,
+            "threads": args.threads,
+            "iterations": args.iterations,
+            "database": database,
+            "python": platform.python_version(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "scenarios": results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(text + "\n")
+    if args.compare:
+        _compare(results, args.compare)
+    tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,3 +4,72 @@ class Config:
     SECRET_KEY = os.environ.get("SECRET_KEY", "dev_secret_key")  
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL", "sqlite:///jewellery_store.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Connection pool overrides; per-dialect defaults live in services/database.py
+    DB_POOL_SIZE = int(os.environ["DB_POOL_SIZE"]) if os.environ.get("DB_POOL_SIZE") else None
+    DB_MAX_OVERFLOW = int(os.environ["DB_MAX_OVERFLOW"]) if os.environ.get("DB_MAX_OVERFLOW") else None
+    DB_POOL_RECYCLE = int(os.environ["DB_POOL_RECYCLE"]) if os.environ.get("DB_POOL_RECYCLE") else None
+    DB_POOL_TIMEOUT = int(os.environ["DB_POOL_TIMEOUT"]) if os.environ.get("DB_POOL_TIMEOUT") else None
+
+    # Applied to every new SQLite connection (SQLITE_TUNING=0 turns them off)
+    SQLITE_TUNING = os.environ.get("SQLITE_TUNING", "1") != "0"
+    SQLITE_PRAGMAS = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,        # ms
+        "cache_size": -64000,        # KiB, i.e. 64 MB
+        "mmap_size": 268435456,      # 256 MB
+        "temp_store": "MEMORY",
+    }
+
+    # Storefront grid page size (keyset pagination)
+    PRODUCTS_PER_PAGE = int(os.environ.get("PRODUCTS_PER_PAGE", 24))
+    MAX_PRODUCTS_PER_PAGE = 96
+
+    # Seconds a worker trusts its cached catalog version before re-reading it
+    CATALOG_VERSION_TTL = int(os.environ.get("CATALOG_VERSION_TTL", 5))
+
+    # Seconds a worker may serve a logged-in user from memory (0 disables)
+    USER_CACHE_TTL = int(os.environ.get("USER_CACHE_TTL", 30))
+    # Seconds a worker trusts its cached identity version (user writes by
+    # other processes, e.g. `flask users promote --revoke`, land within this)
+    USER_CACHE_VERSION_TTL = int(os.environ.get("USER_CACHE_VERSION_TTL", 2))
+
+    # Cart storage: "sql" (cart tables) or "local" (dbm file, single process only)
+    CART_STORE = os.environ.get("CART_STORE", "sql")
+    CART_STORE_PATH = os.environ.get("CART_STORE_PATH")
+    # Seconds a worker may reuse a cart's item count for the navbar badge
+    CART_COUNT_TTL = int(os.environ.get("CART_COUNT_TTL", 10))
+    # ... and how many carts' counts it keeps (least recently used go first)
+    CART_COUNT_CACHE_SIZE = int(os.environ.get("CART_COUNT_CACHE_SIZE", 10000))
+
+    # Fraction of requests timed for the admin performance page (0 disables)
+    PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0.05))
+    PROFILE_BUFFER_SIZE = int(os.environ.get("PROFILE_BUFFER_SIZE", 500))
+
+    # Prometheus /metrics; set METRICS_TOKEN to require "Authorization: Bearer <token>".
+    # Without a token only direct (unproxied) loopback/private clients may scrape.
+    METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") != "0"
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+    # JSON API: Cache-Control max-age (s) and per-worker response LRU size
+    API_CACHE_MAX_AGE = int(os.environ.get("API_CACHE_MAX_AGE", 30))
+    API_RESPONSE_CACHE_SIZE = int(os.environ.get("API_RESPONSE_CACHE_SIZE", 512))
+
+    # Publish customer reviews without moderation
+    REVIEWS_AUTO_APPROVE = os.environ.get("REVIEWS_AUTO_APPROVE", "0") == "1"
+
+    # Compiled-template cache shared by all workers (default: instance/jinja_cache)
+    JINJA_BYTECODE_CACHE = os.environ.get("JINJA_BYTECODE_CACHE", "1") != "0"
+    JINJA_CACHE_DIR = os.environ.get("JINJA_CACHE_DIR")
+    # Precompile templates and prime caches when wsgi.py boots a worker
+    WARMUP_ON_START = os.environ.get("WARMUP_ON_START", "1") != "0"
+
+    # Cart stock holds: lifetime (s) and background sweep of expired holds
+    RESERVATION_TTL = int(os.environ.get("RESERVATION_TTL", 900))
+    RESERVATION_SWEEP_INTERVAL = int(os.environ.get("RESERVATION_SWEEP_INTERVAL", 60))  # 0 disables
+    RESERVATION_SWEEP_BATCH = int(os.environ.get("RESERVATION_SWEEP_BATCH", 1000))
+
+    # Navbar autocomplete: per-worker prefix index memory budget and default result count
+    SUGGEST_MAX_BYTES = int(os.environ.get("SUGGEST_MAX_BYTES", 16 * 1024 * 1024))
+    SUGGEST_LIMIT = int(os.environ.get("SUGGEST_LIMIT", 8))
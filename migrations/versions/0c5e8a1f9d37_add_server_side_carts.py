@@ -0,0 +1,47 @@
+"""Add server-side cart tables
+
+Revision ID: 0c5e8a1f9d37
+Revises: f0a6d2e4b853
+Create Date: 2026-10-18 13:20:44.615092
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0c5e8a1f9d37'
+down_revision = 'f0a6d2e4b853'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('cart',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('item_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id')
+    )
+    with op.batch_alter_table('cart', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_cart_updated_at'), ['updated_at'], unique=False)
+
+    op.create_table('cart_item',
+    sa.Column('cart_id', sa.String(length=32), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['cart_id'], ['cart.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['product_id'], ['product.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('cart_id', 'product_id')
+    )
+
+
+def downgrade():
+    op.drop_table('cart_item')
+    with op.batch_alter_table('cart', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_cart_updated_at'))
+
+    op.drop_table('cart')
@@ -0,0 +1,62 @@
+"""Add full-text product search index
+
+Revision ID: 4b7e2c9d1a10
+Revises: 3cf87a3e7fc7
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b7e2c9d1a10'
+down_revision = '3cf87a3e7fc7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS product_fts USING fts5("
+            "name, description, category, subcategory, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            "INSERT INTO product_fts (rowid, name, description, category, subcategory) "
+            "SELECT p.id, p.name, coalesce(p.description, ''), coalesce(c.name, ''), "
+            "coalesce(c.subcategory, '') "
+            "FROM product p LEFT JOIN category c ON c.id = p.category_id"
+        )
+
+    elif dialect == 'postgresql':
+        op.create_table('product_search',
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('document', sa.dialects.postgresql.TSVECTOR(), nullable=False),
+        sa.ForeignKeyConstraint(['product_id'], ['product.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('product_id')
+        )
+        op.create_index('ix_product_search_document', 'product_search', ['document'],
+                        postgresql_using='gin')
+        op.execute(
+            "INSERT INTO product_search (product_id, document) "
+            "SELECT p.id, "
+            "setweight(to_tsvector('simple', p.name), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(c.name, '')), 'B') || "
+            "setweight(to_tsvector('simple', coalesce(c.subcategory, '')), 'B') || "
+            "setweight(to_tsvector('simple', coalesce(p.description, '')), 'C') "
+            "FROM product p LEFT JOIN category c ON c.id = p.category_id"
+        )
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS product_fts")
+    elif dialect == 'postgresql':
+        op.drop_index('ix_product_search_document', table_name='product_search')
+        op.drop_table('product_search')
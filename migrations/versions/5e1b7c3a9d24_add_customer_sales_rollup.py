@@ -0,0 +1,42 @@
+"""Add per-customer sales rollup
+
+Revision ID: 5e1b7c3a9d24
+Revises: 7d2f9b4e6a18
+Create Date: 2026-10-18 16:40:27.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e1b7c3a9d24'
+down_revision = '7d2f9b4e6a18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('sales_customer',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.Column('last_order_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_index('ix_sales_customer_revenue_user_id', 'sales_customer',
+                    ['revenue', 'user_id'], unique=False)
+    op.execute("""
+        INSERT INTO sales_customer (user_id, order_count, revenue, last_order_at)
+        SELECT user_id,
+               SUM(CASE WHEN status != 'CANCELLED' THEN 1 ELSE 0 END),
+               COALESCE(SUM(CASE WHEN status != 'CANCELLED' THEN total_amount ELSE 0 END), 0),
+               MAX(created_at)
+        FROM "order"
+        GROUP BY user_id
+    """)
+
+
+def downgrade():
+    op.drop_index('ix_sales_customer_revenue_user_id', table_name='sales_customer')
+    op.drop_table('sales_customer')
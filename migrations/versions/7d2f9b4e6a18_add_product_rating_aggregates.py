@@ -0,0 +1,45 @@
+"""Add approved-review rating aggregates to product
+
+Revision ID: 7d2f9b4e6a18
+Revises: 0c5e8a1f9d37
+Create Date: 2026-10-18 16:02:17.508231
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d2f9b4e6a18'
+down_revision = '0c5e8a1f9d37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('product', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('rating_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('rating_sum', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('rating_avg', sa.Float(), server_default='0', nullable=False))
+        batch_op.create_index('ix_product_rating_avg_id', ['rating_avg', 'id'], unique=False)
+
+    # backfill from the reviews already approved
+    op.execute("""
+        UPDATE product SET
+            rating_count = (SELECT count(*) FROM review
+                            WHERE review.product_id = product.id AND review.approved),
+            rating_sum = (SELECT coalesce(sum(rating), 0) FROM review
+                          WHERE review.product_id = product.id AND review.approved)
+    """)
+    op.execute("""
+        UPDATE product SET rating_avg = CASE WHEN rating_count > 0
+            THEN CAST(rating_sum AS FLOAT) / rating_count ELSE 0 END
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('product', schema=None) as batch_op:
+        batch_op.drop_index('ix_product_rating_avg_id')
+        batch_op.drop_column('rating_avg')
+        batch_op.drop_column('rating_sum')
+        batch_op.drop_column('rating_count')
@@ -0,0 +1,37 @@
+"""Add stock reservations
+
+Revision ID: b8c4e2f6a3d1
+Revises: 5e1b7c3a9d24
+Create Date: 2026-10-18 18:05:42.630118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8c4e2f6a3d1'
+down_revision = '5e1b7c3a9d24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('stock_reservation',
+    sa.Column('cart_id', sa.String(length=32), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['product.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('cart_id', 'product_id')
+    )
+    op.create_index('ix_stock_reservation_product_expires', 'stock_reservation',
+                    ['product_id', 'expires_at', 'quantity', 'cart_id'], unique=False)
+    op.create_index('ix_stock_reservation_expires_at', 'stock_reservation',
+                    ['expires_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_stock_reservation_expires_at', table_name='stock_reservation')
+    op.drop_index('ix_stock_reservation_product_expires', table_name='stock_reservation')
+    op.drop_table('stock_reservation')
@@ -0,0 +1,40 @@
+"""Add order status events
+
+Revision ID: c4a7e1d9b256
+Revises: b8c4e2f6a3d1
+Create Date: 2026-10-18 19:12:08.414532
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a7e1d9b256'
+down_revision = 'b8c4e2f6a3d1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('order_status_event',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('old_status', sa.String(length=20), nullable=False),
+    sa.Column('new_status', sa.String(length=20), nullable=False),
+    sa.Column('changed_by_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['order_id'], ['order.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['changed_by_id'], ['user.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_order_status_event_order_id_id', 'order_status_event',
+                    ['order_id', 'id'], unique=False)
+    op.create_index('ix_order_status_event_created_at', 'order_status_event',
+                    ['created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_order_status_event_created_at', table_name='order_status_event')
+    op.drop_index('ix_order_status_event_order_id_id', table_name='order_status_event')
+    op.drop_table('order_status_event')
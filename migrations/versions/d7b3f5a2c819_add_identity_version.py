@@ -0,0 +1,29 @@
+"""Add identity version counter
+
+Revision ID: d7b3f5a2c819
+Revises: c4a7e1d9b256
+Create Date: 2026-10-19 09:24:51.306117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7b3f5a2c819'
+down_revision = 'c4a7e1d9b256'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    identity_version = op.create_table('identity_version',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.bulk_insert(identity_version, [{'id': 1, 'version': 1}])
+
+
+def downgrade():
+    op.drop_table('identity_version')
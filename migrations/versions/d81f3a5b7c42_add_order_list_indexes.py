@@ -0,0 +1,30 @@
+"""Add indexes for the admin order list
+
+Revision ID: d81f3a5b7c42
+Revises: a2d94f6c3e21
+Create Date: 2026-10-18 10:48:37.220561
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd81f3a5b7c42'
+down_revision = 'a2d94f6c3e21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('order', schema=None) as batch_op:
+        batch_op.create_index('ix_order_status_id', ['status', 'id'], unique=False)
+        batch_op.create_index('ix_order_user_id_id', ['user_id', 'id'], unique=False)
+        batch_op.create_index('ix_order_created_at', ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('order', schema=None) as batch_op:
+        batch_op.drop_index('ix_order_created_at')
+        batch_op.drop_index('ix_order_user_id_id')
+        batch_op.drop_index('ix_order_status_id')
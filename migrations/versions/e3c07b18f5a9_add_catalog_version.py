@@ -0,0 +1,29 @@
+"""Add catalog version counter
+
+Revision ID: e3c07b18f5a9
+Revises: d81f3a5b7c42
+Create Date: 2026-10-18 11:31:05.874120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3c07b18f5a9'
+down_revision = 'd81f3a5b7c42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    catalog_version = op.create_table('catalog_version',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.bulk_insert(catalog_version, [{'id': 1, 'version': 1}])
+
+
+def downgrade():
+    op.drop_table('catalog_version')
@@ -0,0 +1,42 @@
+"""One review per user and product
+
+Revision ID: e9d2a6c4f170
+Revises: d7b3f5a2c819
+Create Date: 2026-10-19 14:12:38.640193
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e9d2a6c4f170'
+down_revision = 'd7b3f5a2c819'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # keep each user's first review of a piece, then recount the aggregates
+    op.execute("""
+        DELETE FROM review WHERE id NOT IN (
+            SELECT min(id) FROM review GROUP BY user_id, product_id)
+    """)
+    op.execute("""
+        UPDATE product SET
+            rating_count = (SELECT count(*) FROM review
+                            WHERE review.product_id = product.id AND review.approved),
+            rating_sum = (SELECT coalesce(sum(rating), 0) FROM review
+                          WHERE review.product_id = product.id AND review.approved)
+    """)
+    op.execute("""
+        UPDATE product SET rating_avg = CASE WHEN rating_count > 0
+            THEN CAST(rating_sum AS FLOAT) / rating_count ELSE 0 END
+    """)
+    with op.batch_alter_table('review', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_review_user_id_product_id', ['user_id', 'product_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('review', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_review_user_id_product_id', type_='unique')
@@ -0,0 +1,53 @@
+"""Add secondary indexes for foreign keys, filters and sorts
+
+Revision ID: f0a6d2e4b853
+Revises: e3c07b18f5a9
+Create Date: 2026-10-18 12:04:52.391447
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f0a6d2e4b853'
+down_revision = 'e3c07b18f5a9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # order.user_id and order.created_at are covered by d81f3a5b7c42
+    with op.batch_alter_table('order_item', schema=None) as batch_op:
+        batch_op.create_index('ix_order_item_order_id', ['order_id'], unique=False)
+        batch_op.create_index('ix_order_item_product_id', ['product_id'], unique=False)
+
+    with op.batch_alter_table('product', schema=None) as batch_op:
+        batch_op.create_index('ix_product_category_id_id', ['category_id', 'id'], unique=False)
+        batch_op.create_index('ix_product_price_id', ['price', 'id'], unique=False)
+
+    with op.batch_alter_table('category', schema=None) as batch_op:
+        batch_op.create_index('ix_category_name', ['name'], unique=False)
+        batch_op.create_index('ix_category_subcategory', ['subcategory'], unique=False)
+
+    with op.batch_alter_table('review', schema=None) as batch_op:
+        batch_op.create_index('ix_review_product_id_approved', ['product_id', 'approved'], unique=False)
+        batch_op.create_index('ix_review_user_id', ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('review', schema=None) as batch_op:
+        batch_op.drop_index('ix_review_user_id')
+        batch_op.drop_index('ix_review_product_id_approved')
+
+    with op.batch_alter_table('category', schema=None) as batch_op:
+        batch_op.drop_index('ix_category_subcategory')
+        batch_op.drop_index('ix_category_name')
+
+    with op.batch_alter_table('product', schema=None) as batch_op:
+        batch_op.drop_index('ix_product_price_id')
+        batch_op.drop_index('ix_product_category_id_id')
+
+    with op.batch_alter_table('order_item', schema=None) as batch_op:
+        batch_op.drop_index('ix_order_item_product_id')
+        batch_op.drop_index('ix_order_item_order_id')
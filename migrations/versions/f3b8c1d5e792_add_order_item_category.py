@@ -0,0 +1,33 @@
+"""Record the product category on order items
+
+Revision ID: f3b8c1d5e792
+Revises: e9d2a6c4f170
+Create Date: 2026-10-19 15:05:21.774902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b8c1d5e792'
+down_revision = 'e9d2a6c4f170'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('order_item', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('category_id', sa.Integer(), nullable=True))
+
+    # past orders: the product's current category is the best record left,
+    # and the one the category rollup was last built from
+    op.execute("""
+        UPDATE order_item SET category_id = (
+            SELECT product.category_id FROM product WHERE product.id = order_item.product_id)
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('order_item', schema=None) as batch_op:
+        batch_op.drop_column('category_id')
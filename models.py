@@ -35,9 +35,20 @@ class Product(db.Model):
     stock = db.Column(db.Integer, default=0)
     image = db.Column(db.String(200), nullable=True)
 
+    # approved-review aggregates, kept in step by services/reviews.py
+    rating_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_avg = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+
     category_id = db.Column(db.Integer, db.ForeignKey('category.id'))
     category = db.relationship('Category', backref='products')
 
+    __table_args__ = (
+        db.Index('ix_product_category_id_id', 'category_id', 'id'),
+        db.Index('ix_product_price_id', 'price', 'id'),  # price sorts on the grid
+        db.Index('ix_product_rating_avg_id', 'rating_avg', 'id'),  # "top rated" sort
+    )
+
     def __repr__(self):
         return f"<Product {self.name}>"
 
@@ -47,8 +58,8 @@ class Category(db.Model):
     __tablename__ = 'category'
 
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
-    subcategory = db.Column(db.String(100), nullable=True)
+    name = db.Column(db.String(100), nullable=False, index=True)
+    subcategory = db.Column(db.String(100), nullable=True, index=True)
 
     def __repr__(self):
         return f"<Category {self.name} - {self.subcategory}>"
@@ -67,6 +78,13 @@ class Order(db.Model):
     items = db.relationship('OrderItem', backref='order',
                             cascade='all, delete-orphan', lazy=True)
 
+    # admin order list: newest first, optionally by status or customer
+    __table_args__ = (
+        db.Index('ix_order_status_id', 'status', 'id'),
+        db.Index('ix_order_user_id_id', 'user_id', 'id'),
+        db.Index('ix_order_created_at', 'created_at'),
+    )
+
     def __repr__(self):
         return f"<Order #{self.id} - {self.status}>"
 
@@ -76,10 +94,13 @@ class OrderItem(db.Model):
     __tablename__ = 'order_item'
 
     id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False)
-    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False, index=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False, index=True)
     quantity = db.Column(db.Integer, nullable=False)
     unit_price = db.Column(db.Float, nullable=False)
+    # the product's category at checkout, so rollup reversals hit the same
+    # bucket; no FK, like sales_daily_category
+    category_id = db.Column(db.Integer, nullable=True)
 
     # ✅ FIX: Add relationship to Product so 'it.product.name' works
     product = db.relationship('Product', backref='order_items', lazy=True)
@@ -88,6 +109,27 @@ class OrderItem(db.Model):
         return f"<OrderItem product_id={self.product_id} qty={self.quantity}>"
 
 
+# ---------- OrderStatusEvent ----------
+# Append-only log of order status changes, written by services/order_status.py.
+class OrderStatusEvent(db.Model):
+    __tablename__ = 'order_status_event'
+
+    id = db.Column(db.Integer, primary_key=True)
+    order_id = db.Column(db.Integer, db.ForeignKey('order.id', ondelete='CASCADE'), nullable=False)
+    old_status = db.Column(db.String(20), nullable=False)
+    new_status = db.Column(db.String(20), nullable=False)
+    changed_by_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_order_status_event_order_id_id', 'order_id', 'id'),  # one order's history
+        db.Index('ix_order_status_event_created_at', 'created_at'),
+    )
+
+    def __repr__(self):
+        return f"<OrderStatusEvent order={self.order_id} {self.old_status}->{self.new_status}>"
+
+
 # ---------- Inquiry ----------
 class Inquiry(db.Model):
     __tablename__ = 'inquiry'
@@ -116,5 +158,157 @@ class Review(db.Model):
 
     product = db.relationship('Product', backref='reviews', lazy=True)
 
+    __table_args__ = (
+        db.Index('ix_review_product_id_approved', 'product_id', 'approved'),
+        db.Index('ix_review_user_id', 'user_id'),
+        db.UniqueConstraint('user_id', 'product_id', name='uq_review_user_id_product_id'),
+    )
+
     def __repr__(self):
         return f"<Review {self.id} by User {self.user_id}>"
+
+
+# ---------- Sales rollups ----------
+# Maintained incrementally by services/rollups.py; rebuild with
+# `flask reports backfill`. Cancelled orders are excluded.
+class DailySales(db.Model):
+    __tablename__ = 'sales_daily'
+
+    day = db.Column(db.Date, primary_key=True)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+
+    def __repr__(self):
+        return f"<DailySales {self.day} orders={self.order_count}>"
+
+
+class DailyProductSales(db.Model):
+    __tablename__ = 'sales_daily_product'
+
+    day = db.Column(db.Date, primary_key=True)
+    # no FK: sales history outlives deleted products
+    product_id = db.Column(db.Integer, primary_key=True)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+
+    def __repr__(self):
+        return f"<DailyProductSales {self.day} product={self.product_id}>"
+
+
+class DailyCategorySales(db.Model):
+    __tablename__ = 'sales_daily_category'
+
+    UNCATEGORISED = 0
+
+    day = db.Column(db.Date, primary_key=True)
+    category_id = db.Column(db.Integer, primary_key=True)  # 0 = uncategorised
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+
+    def __repr__(self):
+        return f"<DailyCategorySales {self.day} category={self.category_id}>"
+
+
+# Lifetime totals per customer; last_order_at also counts cancelled orders.
+class CustomerSales(db.Model):
+    __tablename__ = 'sales_customer'
+
+    # no FK, like sales_daily_product
+    user_id = db.Column(db.Integer, primary_key=True)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+    last_order_at = db.Column(db.DateTime)
+
+    user = db.relationship('User', primaryjoin='foreign(CustomerSales.user_id) == User.id',
+                           backref=db.backref('sales', uselist=False, viewonly=True),
+                           viewonly=True)
+
+    __table_args__ = (
+        db.Index('ix_sales_customer_revenue_user_id', 'revenue', 'user_id'),  # "top buyers" sort
+    )
+
+    def __repr__(self):
+        return f"<CustomerSales user={self.user_id} orders={self.order_count}>"
+
+
+# ---------- CatalogVersion ----------
+# Single-row counter bumped on every admin product/category write; per-worker
+# catalog caches compare against it (see services/catalog.py).
+class CatalogVersion(db.Model):
+    __tablename__ = 'catalog_version'
+
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<CatalogVersion {self.version}>"
+
+
+# ---------- IdentityVersion ----------
+# Single-row counter bumped on every user write that the login cache holds;
+# workers drop their cached users when it moves (see services/identity.py).
+class IdentityVersion(db.Model):
+    __tablename__ = 'identity_version'
+
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<IdentityVersion {self.version}>"
+
+
+# ---------- Cart ----------
+# Server-side carts (services/cart_store.py). The session cookie only holds
+# the opaque cart id; a logged-in user's cart is found by user_id.
+class Cart(db.Model):
+    __tablename__ = 'cart'
+
+    id = db.Column(db.String(32), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'),
+                        nullable=True, unique=True)
+    item_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    items = db.relationship('CartItem', backref='cart',
+                            cascade='all, delete-orphan', lazy=True)
+
+    def __repr__(self):
+        return f"<Cart {self.id} user={self.user_id}>"
+
+
+class CartItem(db.Model):
+    __tablename__ = 'cart_item'
+
+    cart_id = db.Column(db.String(32), db.ForeignKey('cart.id', ondelete='CASCADE'),
+                        primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id', ondelete='CASCADE'),
+                           primary_key=True)
+    quantity = db.Column(db.Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<CartItem product_id={self.product_id} qty={self.quantity}>"
+
+
+# ---------- StockReservation ----------
+# A cart's hold on stock (services/reservations.py). Holds past expires_at no
+# longer count and are deleted in batches by the sweeper. No FK on cart_id:
+# carts may live outside the database (CART_STORE="local").
+class StockReservation(db.Model):
+    __tablename__ = 'stock_reservation'
+
+    cart_id = db.Column(db.String(32), primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id', ondelete='CASCADE'),
+                           primary_key=True)
+    quantity = db.Column(db.Integer, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        # covering index for the "held by other carts" SUM
+        db.Index('ix_stock_reservation_product_expires', 'product_id', 'expires_at',
+                 'quantity', 'cart_id'),
+        db.Index('ix_stock_reservation_expires_at', 'expires_at'),  # sweeper
+    )
+
+    def __repr__(self):
+        return f"<StockReservation cart={self.cart_id} product={self.product_id} qty={self.quantity}>"
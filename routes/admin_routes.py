@@ -1,15 +1,20 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, abort, current_app
+from flask import Blueprint, render_template, redirect, url_for, flash, request, abort, Response, stream_with_context, current_app, jsonify
 from flask_login import login_required, current_user
-from werkzeug.utils import secure_filename
 from extensions import db
-from models import Order, User, Product, Inquiry, Review, Category, OrderItem
-from sqlalchemy import func
-import os
+from models import Order, User, Product, Inquiry, Review, Category, OrderItem, CustomerSales
+from sqlalchemy import func, or_
+from sqlalchemy.orm import joinedload, contains_eager
+from services import search, rollups, images, catalog, order_export, profiling, reviews, order_status, suggest
+from services.pagination import paginate
+from datetime import datetime
 
 admin_bp = Blueprint('admin', __name__)
 
-UPLOAD_FOLDER = "static/uploads"
-ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "gif"}
+ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "gif", "webp"}
+ORDER_STATUSES = order_status.STATUSES
+ADMIN_ORDERS_PER_PAGE = 50
+ADMIN_REVIEWS_PER_PAGE = 50
+ADMIN_CUSTOMERS_PER_PAGE = 50
 
 
 # ---------------- Utility Functions ----------------
@@ -45,28 +50,136 @@ def dashboard():
 
 
 # ---------------- Orders ----------------
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d") if value else None
+    except ValueError:
+        return None
+
+
+def _filtered_orders(args):
+    status = args.get('status')
+    return Order.query.options(joinedload(Order.user)).filter(*order_export.order_filters(
+        status=status if status in ORDER_STATUSES else None,
+        date_from=_parse_date(args.get('from')),
+        date_to=_parse_date(args.get('to')),
+        customer=(args.get('customer') or '').strip() or None,
+    ))
+
+
+def _safe_next(default):
+    target = request.form.get('next') or ''
+    return target if target.startswith('/') and not target.startswith('//') else default
+
+
 @admin_bp.route('/admin_orders')
 @login_required
 def orders():
     ensure_admin()
-    orders = Order.query.order_by(Order.id.desc()).all()
-    return render_template('admin_orders.html', orders=orders)
+    per_page = max(1, min(request.args.get('per_page', type=int) or ADMIN_ORDERS_PER_PAGE, 200))
+    try:
+        page = paginate(
+            _filtered_orders(request.args), [Order.id], desc=True,
+            after=request.args.get('after'), before=request.args.get('before'),
+            per_page=per_page,
+        )
+    except ValueError:
+        abort(400)
+
+    args = {k: v for k, v in request.args.items() if k not in ('after', 'before')}
+    return render_template('admin_orders.html', orders=page.items, page=page,
+                           filters=args, statuses=ORDER_STATUSES,
+                           transitions=order_status.TRANSITIONS)
+
+
+@admin_bp.route('/admin_orders/export')
+@login_required
+def export_orders():
+    """Stream the filtered orders with their lines as CSV or JSONL."""
+    ensure_admin()
+    fmt = 'jsonl' if request.args.get('format') == 'jsonl' else 'csv'
+    status = request.args.get('status')
+    pieces = order_export.stream(
+        fmt,
+        status=status if status in ORDER_STATUSES else None,
+        date_from=_parse_date(request.args.get('from')),
+        date_to=_parse_date(request.args.get('to')),
+        customer=(request.args.get('customer') or '').strip() or None,
+        after_id=request.args.get('after_id', type=int),
+    )
+    filename = f"orders-{datetime.utcnow():%Y%m%d-%H%M%S}.{fmt}"
+    return Response(
+        stream_with_context(pieces),
+        mimetype='text/csv' if fmt == 'csv' else 'application/x-ndjson',
+        headers={
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'X-Accel-Buffering': 'no',  # let nginx pass chunks straight through
+        },
+    )
+
+
+def _wants_json():
+    return request.accept_mimetypes.best_match(["text/html", "application/json"]) == "application/json"
+
+
+def _status_response(new_status, order_ids):
+    """Apply a status change; JSON for the orders page script, else flash and redirect."""
+    try:
+        result = order_status.apply(order_ids, new_status, changed_by_id=current_user.id)
+    except ValueError as exc:
+        if _wants_json():
+            return jsonify(error=str(exc)), 400
+        flash(f"Invalid status update: {exc}.", "error")
+        return redirect(_safe_next(url_for("admin.orders")))
+
+    category = "success" if result.changed and not result.rejected else "warning"
+    if _wants_json():
+        return jsonify(
+            status=result.status,
+            changed=[oid for oid, _ in result.changed],
+            unchanged=result.unchanged,
+            rejected=[{"id": oid, "status": status} for oid, status in result.rejected],
+            missing=result.missing,
+            message=result.summary(),
+            category=category,
+        )
+    flash(result.summary(), category)
+    return redirect(_safe_next(url_for("admin.orders")))
 
 
 @admin_bp.post("/admin_orders/<int:oid>/status")
 @login_required
 def update_order_status(oid):
     ensure_admin()
-    o = Order.query.get_or_404(oid)
-    new_status = request.form.get("status")
-    allowed = {"PLACED", "PAID", "SHIPPED", "DELIVERED", "CANCELLED"}
-    if new_status in allowed:
-        o.status = new_status
-        db.session.commit()
-        flash("Order status updated!", "success")
-    else:
-        flash("Invalid status.", "error")
-    return redirect(url_for("admin.orders"))
+    if db.session.get(Order, oid) is None:
+        abort(404)
+    return _status_response(request.form.get("status"), [oid])
+
+
+@admin_bp.post("/admin_orders/status")
+@login_required
+def bulk_order_status():
+    """Move every selected order (``order_id`` fields) to ``status``."""
+    ensure_admin()
+    order_ids = request.form.getlist("order_id", type=int)
+    if not order_ids:
+        if _wants_json():
+            return jsonify(error="No orders selected."), 400
+        flash("No orders selected.", "error")
+        return redirect(_safe_next(url_for("admin.orders")))
+    return _status_response(request.form.get("status"), order_ids)
+
+
+@admin_bp.route("/admin_orders/<int:oid>/events")
+@login_required
+def order_events(oid):
+    """Status history of one order, oldest first."""
+    ensure_admin()
+    return jsonify(events=[
+        {"old_status": e.old_status, "new_status": e.new_status,
+         "changed_by": e.changed_by_id, "at": e.created_at.isoformat(timespec="seconds")}
+        for e in order_status.history(oid)
+    ])
 
 
 # ---------------- Products ----------------
@@ -87,29 +200,32 @@ def product_create():
         price = request.form.get('price')
         stock = request.form.get('stock')
         description = request.form.get('description')
-        file = request.files.get('image_file')
-        filename = None
-        if file and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            save_path = os.path.join(current_app.root_path, UPLOAD_FOLDER, filename)
-            os.makedirs(os.path.dirname(save_path), exist_ok=True)
-            file.save(save_path)
-
-        image_url = request.form.get('image') if not filename else None
-
         if not name or not price or not stock:
             flash('Name, price, and stock are required', 'danger')
             return redirect(url_for('admin.product_create'))
 
+        file = request.files.get('image_file')
+        uploaded = None
+        if file and allowed_file(file.filename):
+            try:
+                uploaded = images.save_upload(file)
+            except images.UploadError:
+                flash('Could not read the uploaded image', 'danger')
+                return redirect(url_for('admin.product_create'))
+
         p = Product(
             name=name.strip(),
             price=float(price),
             stock=int(stock),
             description=description or '',
-            image=f"/{UPLOAD_FOLDER}/{filename}" if filename else (image_url or '')
+            image=uploaded or request.form.get('image') or ''
         )
         db.session.add(p)
+        db.session.flush()
+        search.index_product(p)
+        catalog.bump_version()
         db.session.commit()
+        suggest.product_saved(p)
         flash('Product created', 'success')
         return redirect(url_for('admin.products_list'))
 
@@ -129,15 +245,19 @@ def product_edit(pid):
 
         file = request.files.get('image_file')
         if file and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            save_path = os.path.join(current_app.root_path, UPLOAD_FOLDER, filename)
-            os.makedirs(os.path.dirname(save_path), exist_ok=True)
-            file.save(save_path)
-            product.image = f"/{UPLOAD_FOLDER}/{filename}"
+            try:
+                product.image = images.save_upload(file)
+            except images.UploadError:
+                db.session.rollback()
+                flash('Could not read the uploaded image', 'danger')
+                return redirect(url_for('admin.product_edit', pid=pid))
         else:
             product.image = request.form.get('image') or product.image
 
+        search.index_product(product)
+        catalog.bump_version()
         db.session.commit()
+        suggest.product_saved(product)
         flash('Product updated', 'success')
         return redirect(url_for('admin.products_list'))
 
@@ -149,19 +269,57 @@ def product_edit(pid):
 def product_delete(pid):
     ensure_admin()
     product = Product.query.get_or_404(pid)
+    search.remove_product(product.id)
     db.session.delete(product)
+    catalog.bump_version()
     db.session.commit()
+    suggest.product_removed(pid)
     flash('Product deleted', 'warning')
     return redirect(url_for('admin.products_list'))
 
 
 # ---------------- Customers ----------------
+CUSTOMER_SORTS = ('newest', 'spend')
+
+
 @admin_bp.route('/admin/customers')
 @login_required
 def customers():
+    """Customers with their lifetime totals from the ``sales_customer`` rollup.
+
+    ``sort=spend`` walks the rollup's (revenue, user_id) index, so it only
+    lists customers who have ordered; ``newest`` lists everyone.
+    """
     ensure_admin()
-    customers = User.query.all()
-    return render_template('admin_customers.html', customers=customers)
+    per_page = max(1, min(request.args.get('per_page', type=int) or ADMIN_CUSTOMERS_PER_PAGE, 200))
+    sort = request.args.get('sort') if request.args.get('sort') in CUSTOMER_SORTS else 'newest'
+    q = (request.args.get('q') or '').strip()
+    matches = or_(User.email.icontains(q, autoescape=True),
+                  User.username.icontains(q, autoescape=True))
+
+    if sort == 'spend':
+        query = (db.session.query(CustomerSales)
+                 .join(CustomerSales.user)
+                 .options(contains_eager(CustomerSales.user)))
+        columns = [CustomerSales.revenue, CustomerSales.user_id]
+    else:
+        query = User.query.options(joinedload(User.sales))
+        columns = [User.id]
+    if q:
+        query = query.filter(matches)
+
+    try:
+        page = paginate(query, columns, desc=True,
+                        after=request.args.get('after'), before=request.args.get('before'),
+                        per_page=per_page)
+    except ValueError:
+        abort(400)
+
+    rows = ([(s.user, s) for s in page.items] if sort == 'spend'
+            else [(u, u.sales) for u in page.items])
+    args = {k: v for k, v in request.args.items() if k not in ('after', 'before')}
+    return render_template('admin_customers.html', rows=rows, page=page,
+                           filters=args, sort=sort)
 
 
 # ---------------- Categories ----------------
@@ -175,6 +333,7 @@ def add_category():
     if form.validate_on_submit():
         new_cat = Category(name=form.name.data)
         db.session.add(new_cat)
+        catalog.bump_version()
         db.session.commit()
         flash('Category added successfully!', 'success')
         return redirect(url_for('admin.view_categories'))
@@ -198,6 +357,9 @@ def edit_category(category_id):
 
     if request.method == 'POST':
         category.name = request.form.get('name')
+        db.session.flush()
+        search.index_category(category.id)
+        catalog.bump_version()
         db.session.commit()
         flash('Category updated successfully!', 'success')
         return redirect(url_for('admin.view_categories'))
@@ -210,7 +372,13 @@ def edit_category(category_id):
 def delete_category(category_id):
     ensure_admin()
     category = Category.query.get_or_404(category_id)
+    affected = list(category.products)
     db.session.delete(category)
+    db.session.flush()
+    for product in affected:
+        db.session.expire(product, ['category'])
+        search.index_product(product)
+    catalog.bump_version()
     db.session.commit()
     flash('Category deleted successfully!', 'success')
     return redirect(url_for('admin.view_categories'))
@@ -224,37 +392,28 @@ def view_reports():
 
     total_products = Product.query.count()
     total_users = User.query.count()
-    total_orders = Order.query.count()
-    total_revenue = db.session.query(func.sum(Order.total_amount)).scalar() or 0
+    summary = rollups.sales_summary()
+    total_orders = summary["orders"]
+    total_revenue = summary["revenue"]
 
     # Top selling products
-    top_products = (
-        db.session.query(
-            Product.name,
-            func.sum(OrderItem.quantity).label("quantity"),
-            func.sum(OrderItem.quantity * Product.price).label("revenue")
-        )
-        .join(OrderItem, OrderItem.product_id == Product.id)
-        .group_by(Product.id)
-        .order_by(func.sum(OrderItem.quantity).desc())
+    top_products = rollups.top_products(limit=5)
+
+    # Recent orders
+    recent_orders = (
+        Order.query.options(joinedload(Order.user))
+        .order_by(Order.created_at.desc())
         .limit(5)
         .all()
     )
 
-    # Recent orders
-    recent_orders = Order.query.order_by(Order.created_at.desc()).limit(5).all()
+    # Sales trend (monthly, per calendar year)
+    sales = rollups.monthly_sales()
+    sales_labels = [month for month, _ in sales]
+    sales_data = [total for _, total in sales]
 
-    # Sales trend (monthly)
-    sales = (
-        db.session.query(
-            func.strftime("%m", Order.created_at).label("month"),
-            func.sum(Order.total_amount).label("total")
-        )
-        .group_by("month")
-        .all()
-    )
-    sales_labels = [s.month for s in sales]
-    sales_data = [float(s.total) for s in sales]
+    # Sales by category
+    category_sales = rollups.category_sales()
 
     # Category distribution
     category_stats = (
@@ -280,5 +439,71 @@ def view_reports():
         sales_labels=sales_labels,
         sales_data=sales_data,
         category_labels=category_labels,
-        category_data=category_data
+        category_data=category_data,
+        category_sales=category_sales
+    )
+
+
+# ---------------- Reviews ----------------
+@admin_bp.route('/admin_reviews')
+@login_required
+def view_reviews():
+    ensure_admin()
+    show = request.args.get('show', 'pending')
+    query = Review.query.options(joinedload(Review.user), joinedload(Review.product))
+    if show == 'pending':
+        query = query.filter(Review.approved.is_(False))
+    try:
+        page = paginate(query, [Review.id], desc=True,
+                        after=request.args.get('after'), before=request.args.get('before'),
+                        per_page=ADMIN_REVIEWS_PER_PAGE)
+    except ValueError:
+        abort(400)
+    return render_template('admin_reviews.html', reviews=page.items, page=page, show=show)
+
+
+@admin_bp.post('/admin_reviews/<int:rid>/approve')
+@login_required
+def approve_review(rid):
+    ensure_admin()
+    reviews.approve(Review.query.get_or_404(rid))
+    db.session.commit()
+    flash("Review approved.", "success")
+    return redirect(_safe_next(url_for('admin.view_reviews')))
+
+
+@admin_bp.post('/admin_reviews/<int:rid>/delete')
+@login_required
+def delete_review(rid):
+    ensure_admin()
+    reviews.delete(Review.query.get_or_404(rid))
+    db.session.commit()
+    flash("Review deleted.", "warning")
+    return redirect(_safe_next(url_for('admin.view_reviews')))
+
+
+# ---------------- Performance ----------------
+@admin_bp.route('/admin_performance')
+@login_required
+def performance():
+    """Sampled request timings held by the worker that serves this page."""
+    ensure_admin()
+    profiles = profiling.buffer.snapshot()
+    return render_template(
+        'admin_performance.html',
+        endpoints=profiling.endpoint_stats(profiles),
+        slowest=profiling.slowest_requests(profiles),
+        sampled=len(profiles),
+        sample_rate=current_app.config.get('PROFILE_SAMPLE_RATE', 0),
+        warmup=current_app.extensions.get('warmup'),
+        suggest=suggest.stats(),
     )
+
+
+@admin_bp.post('/admin_performance/clear')
+@login_required
+def performance_clear():
+    ensure_admin()
+    profiling.buffer.clear()
+    flash("Request samples cleared.", "info")
+    return redirect(url_for('admin.performance'))
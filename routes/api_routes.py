@@ -0,0 +1,180 @@
+# routes/api_routes.py
+"""Read-only JSON catalog API (v1) for the mobile app.
+
+    GET /api/v1/products            ?q= &category= &subcategory= &sort= &after= &before= &per_page= &fields=
+    GET /api/v1/products/<id>       ?fields=
+    GET /api/v1/categories
+
+Every response carries a strong ETag built from the catalog version
+(services/catalog.py) and the normalised request, plus a Cache-Control
+header. A matching If-None-Match gets a 304, decided from the in-memory
+version alone. Without a match, bodies recently built by this worker are
+served from a small LRU. The database is only queried for a new catalog
+version or a new query.
+
+Availability is exposed as ``in_stock``, not a unit count. A checkout that
+sells a product out bumps the catalog version, which moves the ETags.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from flask import Blueprint, Response, request, current_app, url_for
+from sqlalchemy.orm import joinedload
+
+from extensions import db
+from models import Product, Category
+from services import search
+from services.catalog import current_version
+from services.images import image_sources
+from services.pagination import paginate_products, DEFAULT_SORT, RELEVANCE_SORT, PRODUCT_SORTS
+
+api_bp = Blueprint('api', __name__)
+
+PRODUCT_FIELDS = ("id", "name", "description", "price", "in_stock", "rating", "rating_count",
+                  "image", "images", "category", "subcategory", "url")
+LIST_DEFAULT_FIELDS = ("id", "name", "price", "in_stock", "rating", "rating_count", "image",
+                       "category", "subcategory")
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+# ---------- response cache ----------
+class _ResponseCache:
+    """LRU of serialised bodies keyed by ETag (which includes the version)."""
+
+    def __init__(self):
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            body = self._items.get(key)
+            if body is not None:
+                self._items.move_to_end(key)
+            return body
+
+    def put(self, key, body, max_entries):
+        with self._lock:
+            self._items[key] = body
+            self._items.move_to_end(key)
+            while len(self._items) > max_entries:
+                self._items.popitem(last=False)
+
+
+_responses = _ResponseCache()
+
+
+def _etag(version):
+    args = "&".join(f"{k}={v}" for k, v in sorted(request.args.items(multi=True)))
+    digest = hashlib.sha256(f"{version}|{request.path}|{args}".encode()).hexdigest()[:32]
+    return f"v{version}-{digest}"
+
+
+def _cached_json(build):
+    """Serve `build()` as JSON with ETag / conditional GET / body caching."""
+    etag = _etag(current_version())
+    headers = {
+        "ETag": f'"{etag}"',
+        "Cache-Control": f"public, max-age={current_app.config.get('API_CACHE_MAX_AGE', 30)}",
+    }
+    if etag in request.if_none_match:
+        return Response(status=304, headers=headers)
+
+    body = _responses.get(etag)
+    if body is None:
+        try:
+            body = json.dumps(build(), separators=(",", ":"))
+        except ApiError as exc:
+            return _error(exc.status, exc.message)
+        _responses.put(etag, body, current_app.config.get("API_RESPONSE_CACHE_SIZE", 512))
+    return Response(body, mimetype="application/json", headers=headers)
+
+
+def _error(status, message):
+    return Response(json.dumps({"error": message}), status=status, mimetype="application/json")
+
+
+# ---------- serialisation ----------
+def _fields(default):
+    raw = request.args.get("fields")
+    if not raw:
+        return default
+    fields = tuple(f.strip() for f in raw.split(",") if f.strip())
+    unknown = [f for f in fields if f not in PRODUCT_FIELDS]
+    if unknown:
+        raise ApiError(400, f"unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def _product(product, fields):
+    category = product.category
+    values = {
+        "id": lambda: product.id,
+        "name": lambda: product.name,
+        "description": lambda: product.description,
+        "price": lambda: product.price,
+        "in_stock": lambda: (product.stock or 0) > 0,
+        "rating": lambda: round(product.rating_avg, 2) if product.rating_count else None,
+        "rating_count": lambda: product.rating_count,
+        "image": lambda: product.image,
+        "images": lambda: image_sources(product.image),
+        "category": lambda: category.name if category else None,
+        "subcategory": lambda: category.subcategory if category else None,
+        "url": lambda: url_for("api.product", product_id=product.id),
+    }
+    return {f: values[f]() for f in fields}
+
+
+# ---------- endpoints ----------
+@api_bp.route("/products")
+def products():
+    def build():
+        fields = _fields(LIST_DEFAULT_FIELDS)
+        per_page = request.args.get("per_page", type=int) or current_app.config["PRODUCTS_PER_PAGE"]
+        per_page = max(1, min(per_page, current_app.config["MAX_PRODUCTS_PER_PAGE"]))
+        query, rank = search.catalog_query(
+            request.args.get("q"), request.args.get("category"), request.args.get("subcategory"))
+        sort = request.args.get("sort") or (RELEVANCE_SORT if rank is not None else DEFAULT_SORT)
+        if sort not in PRODUCT_SORTS and not (sort == RELEVANCE_SORT and rank is not None):
+            raise ApiError(400, f"unknown sort: {sort}")
+        try:
+            page = paginate_products(
+                query.options(joinedload(Product.category)), sort=sort,
+                after=request.args.get("after"), before=request.args.get("before"),
+                per_page=per_page, rank=rank,
+            )
+        except ValueError:
+            raise ApiError(400, "invalid cursor")
+        return {
+            "items": [_product(p, fields) for p in page.items],
+            "next_cursor": page.next_cursor,
+            "prev_cursor": page.prev_cursor,
+        }
+    return _cached_json(build)
+
+
+@api_bp.route("/products/<int:product_id>")
+def product(product_id):
+    def build():
+        fields = _fields(PRODUCT_FIELDS)
+        item = db.session.get(Product, product_id, options=[joinedload(Product.category)])
+        if item is None:
+            raise ApiError(404, "product not found")
+        return _product(item, fields)
+    return _cached_json(build)
+
+
+@api_bp.route("/categories")
+def categories():
+    def build():
+        rows = Category.query.order_by(Category.name, Category.subcategory).all()
+        return {"items": [{"id": c.id, "name": c.name, "subcategory": c.subcategory}
+                          for c in rows]}
+    return _cached_json(build)
@@ -4,6 +4,7 @@ from models import User
 from werkzeug.security import check_password_hash, generate_password_hash
 from extensions import db
 from forms import AdminLoginForm
+from services import metrics
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -74,6 +75,7 @@ def signup():
 
         db.session.add(user)
         db.session.commit()
+        metrics.signup()
 
         flash("Account created successfully! Please login.", "success")
         return redirect(url_for('auth.login'))
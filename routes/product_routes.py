@@ -1,30 +1,33 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify, abort, current_app
 from flask_login import login_required, current_user
+from sqlalchemy.orm import joinedload
 from extensions import db
-from models import Product, Order, OrderItem ,Category
+from models import Product, Order ,Category, Review
+from services import search, cart_store, metrics, reviews, reservations, suggest
+from services.cart import price_cart
+from services.orders import place_order, OutOfStock
+from services.identity import identity_cache, bump_version as bump_identity_version
+from services.pagination import paginate_products, DEFAULT_SORT, RELEVANCE_SORT
 
 product_bp = Blueprint('product', __name__)
 
+REVIEWS_SHOWN = 20
+
 # ---------- helpers ----------
 def _get_cart():
-    return session.get("cart", {})
+    return cart_store.get_cart()
 
 def _save_cart(cart: dict):
-    session["cart"] = cart
-    session.modified = True
+    cart_store.save_cart(cart)
 
-def _cart_items_and_total(cart: dict):
-    items = []
-    total = 0.0
-    for pid_str, qty in cart.items():
-        product = Product.query.get(int(pid_str))
-        if not product:
-            continue
-        qty = int(qty)
-        line_total = product.price * qty
-        items.append({"product": product, "qty": qty, "line_total": line_total})
-        total += line_total
-    return items, total
+def _price_cart(cart: dict):
+    """Price the cart and drop lines whose product has been deleted."""
+    priced = price_cart(cart)
+    if priced.missing:
+        for pid in priced.missing:
+            cart.pop(str(pid), None)
+        _save_cart(cart)
+    return priced
 
 def _get_recently_viewed():
     return session.get('recently_viewed', [])
@@ -38,48 +41,122 @@ def _save_recently_viewed(product_id):
     session['recently_viewed'] = recently_viewed
     session.modified = True
 
+def _catalog_page():
+    per_page = request.args.get('per_page', type=int) or current_app.config['PRODUCTS_PER_PAGE']
+    per_page = max(1, min(per_page, current_app.config['MAX_PRODUCTS_PER_PAGE']))
+    products, rank = search.catalog_query(
+        request.args.get('q'),
+        request.args.get('category'),
+        request.args.get('subcategory'),
+    )
+    default_sort = RELEVANCE_SORT if rank is not None else DEFAULT_SORT
+    try:
+        return paginate_products(
+            products,
+            sort=request.args.get('sort', default_sort),
+            after=request.args.get('after'),
+            before=request.args.get('before'),
+            per_page=per_page,
+            rank=rank,
+        )
+    except ValueError:
+        abort(400)
+
+
+def _page_args(**cursor):
+    """Current query args minus any cursor, plus the given one."""
+    args = {k: v for k, v in request.args.items() if k not in ('after', 'before')}
+    args.update(cursor)
+    return args
+
+
 # ---------- public pages ----------
 
 @product_bp.route('/')
 def home():
-    categories = Category.query.with_entities(Category.name).distinct().all()
-    subcategories = Category.query.with_entities(Category.subcategory).distinct().all()
+    page = _catalog_page()
 
-    q = request.args.get('q')
-    category_filter = request.args.get('category')
-    subcategory_filter = request.args.get('subcategory')
+    return render_template(
+        'home.html',
+        products=page.items,
+        page=page,
+        page_args=_page_args
+    )
 
-    products = Product.query
 
-    if q:
-        products = products.filter(Product.name.ilike(f'%{q}%'))
-    if category_filter:
-        products = products.join(Category).filter(Category.name == category_filter)
-    if subcategory_filter:
-        products = products.join(Category).filter(Category.subcategory == subcategory_filter)
+@product_bp.route('/products/fragment')
+def home_fragment():
+    """Next slice of the product grid for the "Load more" button."""
+    page = _catalog_page()
+    return jsonify(
+        html=render_template('_product_cards.html', products=page.items),
+        count=len(page.items),
+        next_cursor=page.next_cursor,
+        prev_cursor=page.prev_cursor,
+    )
 
-    products = products.all()
 
-    return render_template(
-        'home.html',
-        products=products,
-        categories=categories,
-        subcategories=subcategories
+@product_bp.route('/api/suggest')
+def suggest_view():
+    """Autocomplete for the navbar search box, from the in-memory prefix index."""
+    query = (request.args.get('q') or '')[:100]
+    limit = request.args.get('limit', type=int) or current_app.config['SUGGEST_LIMIT']
+    urls = {
+        'product': lambda ref: url_for('product.product_detail', product_id=ref),
+        'category': lambda ref: url_for('product.home', category=ref),
+        'subcategory': lambda ref: url_for('product.home', subcategory=ref),
+    }
+    response = jsonify(
+        query=query,
+        suggestions=[{'label': label, 'kind': kind, 'url': urls[kind](ref)}
+                     for kind, ref, label in suggest.suggest(query, max(1, min(limit, suggest.MAX_LIMIT)))],
     )
+    response.headers['Cache-Control'] = 'public, max-age=60'
+    return response
 
 
 @product_bp.route("/product/<int:product_id>")
 def product_detail(product_id):
     product = Product.query.get_or_404(product_id)
     _save_recently_viewed(product_id)
-    stock_status = "In Stock" if product.stock > 0 else "Out of Stock"
-    return render_template("product_detail.html", product=product, stock_status=stock_status)
+    free = reservations.available([product_id], cart_store.current_cart_id()).get(product_id, 0)
+    stock_status = "In Stock" if free > 0 else "Out of Stock"
+    product_reviews = (
+        Review.query.options(joinedload(Review.user))
+        .filter(Review.product_id == product_id, Review.approved.is_(True))
+        .order_by(Review.id.desc())
+        .limit(REVIEWS_SHOWN)
+        .all()
+    )
+    return render_template("product_detail.html", product=product, stock_status=stock_status,
+                           available=free, reviews=product_reviews)
+
+@product_bp.route("/product/<int:product_id>/reviews", methods=["POST"])
+@login_required
+def submit_review(product_id):
+    product = Product.query.get_or_404(product_id)
+    auto_approve = current_app.config.get("REVIEWS_AUTO_APPROVE", False)
+    try:
+        reviews.submit(current_user, product, request.form.get("rating"),
+                       request.form.get("content"), auto_approve=auto_approve)
+    except reviews.ReviewError as e:
+        flash(str(e), "error")
+    else:
+        flash("Thanks for your review!" if auto_approve
+              else "Thanks! Your review will appear once it has been approved.", "success")
+    return redirect(url_for("product.product_detail", product_id=product_id))
 
 @product_bp.route("/cart")
 def view_cart():
-    cart = _get_cart()
-    items, total = _cart_items_and_total(cart)
-    return render_template("cart.html", items=items, total=total)
+    priced = _price_cart(_get_cart())
+    if priced.missing:
+        flash("Some items in your cart are no longer available and were removed.", "info")
+    free = reservations.available(list(priced.products), cart_store.current_cart_id())
+    for line in priced.items:
+        if free.get(line.product.id, 0) < line.qty:
+            flash(f"Only {free.get(line.product.id, 0)} units available for {line.product.name}.", "error")
+    return render_template("cart.html", items=priced.items, total=priced.total,
+                           hold_minutes=current_app.config.get("RESERVATION_TTL", 900) // 60)
 
 @product_bp.route('/cart/add/<int:product_id>', methods=['POST'])
 @login_required
@@ -87,12 +164,15 @@ def add_to_cart(product_id):
     product = Product.query.get_or_404(product_id)
     qty_requested = int(request.form.get('qty', 1))
 
-    if product.stock < qty_requested:
-        flash(f"Only {product.stock} units available for {product.name}.", "error")
+    cart = _get_cart()
+    new_qty = cart.get(str(product_id), 0) + qty_requested
+    # hold the units before they go in the cart
+    short = reservations.reserve(cart_store.current_cart_id(create=True), {product_id: new_qty})
+    if product_id in short:
+        flash(f"Only {short[product_id]} units available for {product.name}.", "error")
         return redirect(url_for('product.product_detail', product_id=product_id))
 
-    cart = _get_cart()
-    cart[str(product_id)] = cart.get(str(product_id), 0) + qty_requested
+    cart[str(product_id)] = new_qty
     _save_cart(cart)
 
     flash("Product added to cart!", "success")
@@ -101,6 +181,7 @@ def add_to_cart(product_id):
 @product_bp.route("/cart/update", methods=["POST"])
 def update_cart():
     cart = _get_cart()
+    wanted = {}
     for key, val in request.form.items():
         if key.startswith("qty_"):
             pid = key.split("_", 1)[1]
@@ -108,10 +189,19 @@ def update_cart():
                 qty = int(val)
             except ValueError:
                 qty = 1
-            if qty <= 0:
-                cart.pop(pid, None)
-            else:
-                cart[pid] = qty
+            if pid in cart and pid.isdigit():
+                wanted[pid] = max(qty, 0)
+
+    short = reservations.reserve(cart_store.current_cart_id(create=True), wanted) if wanted else {}
+    products = price_cart(cart).products
+    for pid, qty in wanted.items():
+        if int(pid) in short:
+            name = products[int(pid)].name if int(pid) in products else "an item"
+            flash(f"Only {short[int(pid)]} units available for {name}.", "error")
+        elif qty == 0:
+            cart.pop(pid, None)
+        else:
+            cart[pid] = qty
     _save_cart(cart)
     flash("Cart updated.", "success")
     return redirect(url_for("product.view_cart"))
@@ -120,48 +210,42 @@ def update_cart():
 def remove_from_cart(product_id):
     cart = _get_cart()
     cart.pop(str(product_id), None)
+    cart_id = cart_store.current_cart_id()
+    if cart_id:
+        reservations.reserve(cart_id, {product_id: 0})
     _save_cart(cart)
     flash("Item removed.", "info")
     return redirect(url_for("product.view_cart"))
 
 @product_bp.route("/cart/clear", methods=["POST"])
 def clear_cart():
-    session.pop("cart", None)
+    cart_store.clear_cart()
     flash("Cart cleared.", "info")
     return redirect(url_for("product.home"))
 
 @product_bp.route("/cart/checkout", methods=["POST"])
 @login_required
 def checkout():
-    cart = _get_cart()
-    items, total = _cart_items_and_total(cart)
+    priced = _price_cart(_get_cart())
+    items = priced.items
 
     if not items:
         flash("Your cart is empty.", "info")
         return redirect(url_for("product.view_cart"))
 
-    for it in items:
-        if it["product"].stock < it["qty"]:
-            flash(f"Not enough stock for {it['product'].name}", "error")
-            return redirect(url_for("product.view_cart"))
-
-    order = Order(user_id=current_user.id, total_amount=total, status="PLACED")
-    db.session.add(order)
-    db.session.flush()
-
-    for it in items:
-        p = it["product"]
-        qty = it["qty"]
-        db.session.add(OrderItem(
-            order_id=order.id,
-            product_id=p.id,
-            quantity=qty,
-            unit_price=p.price
-        ))
-        p.stock -= qty
-
-    db.session.commit()
-    session.pop("cart", None)
+    if priced.stale:
+        metrics.checkout_out_of_stock()
+        flash(f"Not enough stock for {priced.stale[0].product.name}", "error")
+        return redirect(url_for("product.view_cart"))
+
+    try:
+        order = place_order(current_user.id, items, cart_id=cart_store.current_cart_id())
+    except OutOfStock as e:
+        metrics.checkout_out_of_stock()
+        flash(f"Not enough stock for {e.product.name}", "error")
+        return redirect(url_for("product.view_cart"))
+
+    cart_store.clear_cart()
     flash(f"Order #{order.id} placed!", "success")
     return redirect(url_for("product.my_order_detail", order_id=order.id))
 
@@ -204,7 +288,9 @@ def profile():
     if request.method == "POST":
         current_user.username = request.form.get("username") or current_user.username
         current_user.email = request.form.get("email") or current_user.email
+        bump_identity_version()
         db.session.commit()
+        identity_cache.invalidate(current_user.id)
         flash("Profile updated successfully!", "success")
         return redirect(url_for("product.profile"))
 
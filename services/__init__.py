@@ -0,0 +1,2 @@
+# services/__init__.py
+# Non-view building blocks shared by the blueprints in routes/.
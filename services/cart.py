@@ -0,0 +1,86 @@
+# services/cart.py
+"""Cart pricing.
+
+A cart is the ``{product_id (str): qty}`` dict kept by the product
+blueprint. ``price_cart`` loads every product in it with a single ``IN``
+query and memoises the result on ``flask.g`` so the same request never
+prices the same cart twice.
+"""
+from dataclasses import dataclass, field
+from typing import List
+
+from flask import g
+
+from models import Product
+
+
+@dataclass
+class CartLine:
+    product: Product
+    qty: int
+
+    @property
+    def line_total(self) -> float:
+        return self.product.price * self.qty
+
+    @property
+    def in_stock(self) -> bool:
+        return (self.product.stock or 0) >= self.qty
+
+
+@dataclass
+class PricedCart:
+    items: List[CartLine] = field(default_factory=list)
+    missing: List[int] = field(default_factory=list)  # ids no longer in the catalog
+
+    @property
+    def total(self) -> float:
+        return sum(line.line_total for line in self.items)
+
+    @property
+    def stale(self) -> List[CartLine]:
+        """Lines asking for more than is currently in stock."""
+        return [line for line in self.items if not line.in_stock]
+
+    @property
+    def products(self) -> dict:
+        return {line.product.id: line.product for line in self.items}
+
+
+def _parse(cart: dict) -> dict:
+    quantities = {}
+    for pid_str, qty in cart.items():
+        try:
+            pid, qty = int(pid_str), int(qty)
+        except (TypeError, ValueError):
+            continue
+        if qty > 0:
+            quantities[pid] = qty
+    return quantities
+
+
+def price_cart(cart: dict) -> PricedCart:
+    quantities = _parse(cart)
+    key = tuple(sorted(quantities.items()))
+
+    cache = g.setdefault("_priced_carts", {})
+    if key in cache:
+        return cache[key]
+
+    priced = PricedCart()
+    if quantities:
+        found = {p.id: p for p in Product.query.filter(Product.id.in_(quantities)).all()}
+        for pid, qty in quantities.items():
+            product = found.get(pid)
+            if product is None:
+                priced.missing.append(pid)
+            else:
+                priced.items.append(CartLine(product=product, qty=qty))
+
+    cache[key] = priced
+    return priced
+
+
+def forget_priced_carts():
+    """Drop memoised pricing, e.g. after stock or prices change mid-request."""
+    g.pop("_priced_carts", None)
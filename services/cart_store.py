@@ -0,0 +1,356 @@
+# services/cart_store.py
+"""Server-side cart storage.
+
+Carts are ``{product_id (str): qty}`` dicts, the shape ``services.cart``
+prices. They live in the ``cart`` / ``cart_item`` tables (CART_STORE="sql",
+the default). CART_STORE="local" selects a dbm file at CART_STORE_PATH
+instead; that store is meant for single-process deployments.
+
+The session cookie carries only ``cart_id``. A logged-in user's cart is
+also found by user_id, so it follows them across devices, and the
+anonymous cart is merged into it on login. ``cart_count()`` serves the
+navbar badge from a short-lived, size-capped per-worker cache.
+
+Stock holds (services/reservations.py) are keyed by cart id. Clearing a
+cart releases them. A merge on login moves the anonymous cart's holds to
+the user's cart, as far as stock allows.
+"""
+import dbm
+import json
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app, session
+from flask.cli import AppGroup
+from flask_login import current_user, user_logged_in, user_logged_out
+
+from extensions import db
+from models import Cart, CartItem
+from services import metrics, reservations
+
+SESSION_KEY = "cart_id"
+SESSION_OWNER = "cart_owner"
+LEGACY_SESSION_KEY = "cart"
+
+
+def _new_id():
+    return secrets.token_hex(16)
+
+
+def _normalise(cart):
+    clean = {}
+    for pid, qty in cart.items():
+        try:
+            pid, qty = int(pid), int(qty)
+        except (TypeError, ValueError):
+            continue
+        if qty > 0:
+            clean[str(pid)] = qty
+    return clean
+
+
+# ---------- stores ----------
+class SQLCartStore:
+    def create(self, user_id=None):
+        cart = Cart(id=_new_id(), user_id=user_id)
+        db.session.add(cart)
+        db.session.commit()
+        return cart.id
+
+    def for_user(self, user_id):
+        return db.session.query(Cart.id).filter(Cart.user_id == user_id).scalar()
+
+    def owner(self, cart_id):
+        return db.session.query(Cart.user_id).filter(Cart.id == cart_id).scalar()
+
+    def exists(self, cart_id):
+        return db.session.query(Cart.id).filter(Cart.id == cart_id).scalar() is not None
+
+    def attach(self, cart_id, user_id):
+        Cart.query.filter_by(id=cart_id).update({Cart.user_id: user_id})
+        db.session.commit()
+
+    def load(self, cart_id):
+        rows = db.session.query(CartItem.product_id, CartItem.quantity).filter(
+            CartItem.cart_id == cart_id).all()
+        return {str(pid): qty for pid, qty in rows}
+
+    def save(self, cart_id, cart):
+        cart = _normalise(cart)
+        count = sum(cart.values())
+        # the cart row goes first: items must not point at a pruned cart
+        if not Cart.query.filter_by(id=cart_id).update(
+                {Cart.item_count: count, Cart.updated_at: datetime.utcnow()}):
+            db.session.add(Cart(id=cart_id, item_count=count))
+            db.session.flush()
+        existing = {item.product_id: item for item in
+                    CartItem.query.filter_by(cart_id=cart_id).all()}
+        for pid, item in existing.items():
+            if str(pid) not in cart:
+                db.session.delete(item)
+        for pid_str, qty in cart.items():
+            item = existing.get(int(pid_str))
+            if item is None:
+                db.session.add(CartItem(cart_id=cart_id, product_id=int(pid_str), quantity=qty))
+            elif item.quantity != qty:
+                item.quantity = qty
+        db.session.commit()
+        return count
+
+    def count(self, cart_id):
+        return db.session.query(Cart.item_count).filter(Cart.id == cart_id).scalar() or 0
+
+    def delete(self, cart_id):
+        Cart.query.filter_by(id=cart_id).delete()
+        CartItem.query.filter_by(cart_id=cart_id).delete()
+        db.session.commit()
+
+    def prune(self, older_than):
+        stale = db.session.query(Cart.id).filter(Cart.user_id.is_(None), Cart.updated_at < older_than)
+        CartItem.query.filter(CartItem.cart_id.in_(stale.subquery().select())).delete(
+            synchronize_session=False)
+        removed = Cart.query.filter(Cart.user_id.is_(None), Cart.updated_at < older_than).delete(
+            synchronize_session=False)
+        db.session.commit()
+        return removed
+
+
+class LocalKVCartStore:
+    """dbm-backed store: ``cart:<id>`` -> JSON, ``user:<id>`` -> cart id."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _db(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        return dbm.open(self.path, "c")
+
+    def _get(self, key):
+        with self._lock, self._db() as kv:
+            raw = kv.get(key)
+        return json.loads(raw) if raw else None
+
+    def _put(self, key, value):
+        with self._lock, self._db() as kv:
+            kv[key] = json.dumps(value)
+
+    def create(self, user_id=None):
+        cart_id = _new_id()
+        self._put(f"cart:{cart_id}", {"user_id": user_id, "items": {}, "updated_at": time.time()})
+        if user_id is not None:
+            self._put(f"user:{user_id}", cart_id)
+        return cart_id
+
+    def for_user(self, user_id):
+        return self._get(f"user:{user_id}")
+
+    def owner(self, cart_id):
+        return (self._get(f"cart:{cart_id}") or {}).get("user_id")
+
+    def exists(self, cart_id):
+        return self._get(f"cart:{cart_id}") is not None
+
+    def attach(self, cart_id, user_id):
+        record = self._get(f"cart:{cart_id}") or {"items": {}}
+        record.update(user_id=user_id, updated_at=time.time())
+        self._put(f"cart:{cart_id}", record)
+        self._put(f"user:{user_id}", cart_id)
+
+    def load(self, cart_id):
+        return dict((self._get(f"cart:{cart_id}") or {}).get("items", {}))
+
+    def save(self, cart_id, cart):
+        record = self._get(f"cart:{cart_id}") or {"user_id": None}
+        record.update(items=_normalise(cart), updated_at=time.time())
+        self._put(f"cart:{cart_id}", record)
+        return sum(record["items"].values())
+
+    def count(self, cart_id):
+        return sum(self.load(cart_id).values())
+
+    def delete(self, cart_id):
+        with self._lock, self._db() as kv:
+            if f"cart:{cart_id}".encode() in kv:
+                del kv[f"cart:{cart_id}"]
+
+    def prune(self, older_than):
+        cutoff = older_than.timestamp()
+        removed = 0
+        with self._lock, self._db() as kv:
+            for key in list(kv.keys()):
+                if not key.startswith(b"cart:"):
+                    continue
+                record = json.loads(kv[key])
+                if record.get("user_id") is None and record.get("updated_at", 0) < cutoff:
+                    del kv[key]
+                    removed += 1
+        return removed
+
+
+_stores = {}
+
+
+def get_store():
+    kind = current_app.config.get("CART_STORE", "sql")
+    if kind not in _stores:
+        if kind == "local":
+            path = current_app.config.get("CART_STORE_PATH") or os.path.join(
+                current_app.instance_path, "carts")
+            _stores[kind] = LocalKVCartStore(path)
+        else:
+            _stores[kind] = SQLCartStore()
+    return _stores[kind]
+
+
+# ---------- cached counts ----------
+_counts = OrderedDict()  # cart_id -> (expires_at, count), least recently used first
+_counts_lock = threading.Lock()
+
+
+def _remember_count(cart_id, count):
+    ttl = current_app.config.get("CART_COUNT_TTL", 10)
+    max_entries = current_app.config.get("CART_COUNT_CACHE_SIZE", 10000)
+    with _counts_lock:
+        _counts[cart_id] = (time.monotonic() + ttl, count)
+        _counts.move_to_end(cart_id)
+        while len(_counts) > max_entries:
+            _counts.popitem(last=False)
+
+
+def cart_count():
+    """Quantity total for the navbar badge; no storage hit while cached."""
+    cart_id = _current_cart_id(create=False)
+    if not cart_id:
+        return 0
+    with _counts_lock:
+        entry = _counts.get(cart_id)
+        if entry:
+            _counts.move_to_end(cart_id)
+    if entry and entry[0] > time.monotonic():
+        metrics.cache_lookup("cart_count", True)
+        return entry[1]
+    metrics.cache_lookup("cart_count", False)
+    count = get_store().count(cart_id)
+    _remember_count(cart_id, count)
+    return count
+
+
+# ---------- session binding ----------
+def _current_cart_id(create=False):
+    store = get_store()
+    cart_id = session.get(SESSION_KEY)
+    # a cart about to be written to must still exist; prune, a login merge
+    # or an account deletion may have removed it since the cookie was set
+    if cart_id and create and not store.exists(cart_id):
+        session.pop(SESSION_KEY, None)
+        session.pop(SESSION_OWNER, None)
+        cart_id = None
+
+    if current_user.is_authenticated:
+        if cart_id and session.get(SESSION_OWNER) == current_user.id:
+            return cart_id
+        cart_id = store.for_user(current_user.id)
+        if cart_id is None and create:
+            cart_id = store.create(user_id=current_user.id)
+        if cart_id:
+            session[SESSION_KEY] = cart_id
+            session[SESSION_OWNER] = current_user.id
+        return cart_id
+
+    if cart_id and session.get(SESSION_OWNER) is None:
+        return cart_id
+    if create:
+        cart_id = store.create()
+        session[SESSION_KEY] = cart_id
+        session.pop(SESSION_OWNER, None)
+        return cart_id
+    return None
+
+
+def _import_legacy_cart():
+    """Move a pre-server-side cart out of the cookie on first contact."""
+    legacy = session.pop(LEGACY_SESSION_KEY, None)
+    if legacy:
+        cart_id = _current_cart_id(create=True)
+        merged = get_store().load(cart_id)
+        for pid, qty in _normalise(legacy).items():
+            merged[pid] = merged.get(pid, 0) + qty
+        _remember_count(cart_id, get_store().save(cart_id, merged))
+
+
+def current_cart_id(create=False):
+    return _current_cart_id(create=create)
+
+
+def get_cart():
+    _import_legacy_cart()
+    cart_id = _current_cart_id(create=False)
+    return get_store().load(cart_id) if cart_id else {}
+
+
+def save_cart(cart):
+    cart_id = _current_cart_id(create=True)
+    _remember_count(cart_id, get_store().save(cart_id, cart))
+
+
+def clear_cart():
+    cart_id = _current_cart_id(create=False)
+    if cart_id:
+        reservations.release(cart_id)
+        db.session.commit()
+        _remember_count(cart_id, get_store().save(cart_id, {}))
+
+
+# ---------- login / logout ----------
+def _merge_on_login(sender, user, **extra):
+    """Fold the anonymous cart into the user's own cart."""
+    store = get_store()
+    anon_id = session.get(SESSION_KEY) if session.get(SESSION_OWNER) is None else None
+    user_cart_id = store.for_user(user.id)
+
+    if anon_id and store.exists(anon_id) and store.owner(anon_id) is None:
+        if user_cart_id is None:
+            store.attach(anon_id, user.id)
+            user_cart_id = anon_id
+        else:
+            merged = store.load(user_cart_id)
+            for pid, qty in store.load(anon_id).items():
+                merged[pid] = merged.get(pid, 0) + qty
+            _remember_count(user_cart_id, store.save(user_cart_id, merged))
+            store.delete(anon_id)
+            reservations.release(anon_id)
+            reservations.reserve(user_cart_id, merged)  # commits; best effort
+
+    session.pop(SESSION_KEY, None)
+    session.pop(SESSION_OWNER, None)
+    if user_cart_id:
+        session[SESSION_KEY] = user_cart_id
+        session[SESSION_OWNER] = user.id
+
+
+def _forget_on_logout(sender, user, **extra):
+    session.pop(SESSION_KEY, None)
+    session.pop(SESSION_OWNER, None)
+
+
+def init_app(app):
+    user_logged_in.connect(_merge_on_login, app)
+    user_logged_out.connect(_forget_on_logout, app)
+
+
+# ---------- CLI ----------
+carts_cli = AppGroup("carts", help="Server-side cart maintenance.")
+
+
+@carts_cli.command("prune")
+@click.option("--days", default=30, show_default=True, help="Drop anonymous carts idle this long.")
+def prune_command(days):
+    """Delete abandoned anonymous carts."""
+    removed = get_store().prune(datetime.utcnow() - timedelta(days=days))
+    click.echo(f"Removed {removed} abandoned carts.")
@@ -0,0 +1,53 @@
+# services/catalog.py
+"""Catalog version counter.
+
+Admin product and category writes call ``bump_version()`` inside their
+transaction. Per-worker caches (facets, API ETags, ...) key their contents
+on ``current_version()``. A worker sees its own bumps immediately; writes
+made by other workers are picked up within CATALOG_VERSION_TTL seconds,
+so readers do not hit the database on every request.
+"""
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import update
+
+from extensions import db
+from models import CatalogVersion
+
+_ROW_ID = 1
+_lock = threading.Lock()
+_cached = {"version": None, "checked_at": 0.0}
+
+
+def _read():
+    row = db.session.get(CatalogVersion, _ROW_ID)
+    return row.version if row else 0
+
+
+def current_version():
+    ttl = current_app.config.get("CATALOG_VERSION_TTL", 5)
+    now = time.monotonic()
+    with _lock:
+        if _cached["version"] is not None and now - _cached["checked_at"] < ttl:
+            return _cached["version"]
+    version = _read()
+    with _lock:
+        _cached.update(version=version, checked_at=now)
+    return version
+
+
+def bump_version():
+    """Increment the counter; call before committing a catalog write."""
+    updated = db.session.execute(
+        update(CatalogVersion)
+        .where(CatalogVersion.id == _ROW_ID)
+        .values(version=CatalogVersion.version + 1)
+    ).rowcount
+    if not updated:
+        db.session.add(CatalogVersion(id=_ROW_ID, version=1))
+        db.session.flush()
+    with _lock:
+        # force the next current_version() to re-read after our commit
+        _cached.update(version=None, checked_at=0.0)
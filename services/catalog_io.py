@@ -0,0 +1,384 @@
+# services/catalog_io.py
+"""Bulk catalog import / export (``flask catalog import|export``).
+
+Rows are streamed from and to CSV or JSONL. Either format uses the same
+fields::
+
+    id, name, description, price, stock, image, category, subcategory
+
+Imports are read lazily and written in batches of ``--batch-size`` rows.
+Each batch is one transaction: categories resolved or created, existing
+products bulk-updated, new products bulk-inserted, search index updated,
+catalog version bumped. The session is cleared after every batch, so
+memory use does not depend on file size.
+
+A row that cannot be used (bad JSON, missing name, invalid price, ...) is
+reported with its line number and skipped; the rest of the file still
+imports. Within a batch the last row for an ``id`` (or ``name`` with
+``--match name``) wins; the earlier ones are reported as skipped.
+
+Existing products are matched on ``id`` (default) or on ``name`` with
+``--match name``. ``image`` is kept as-is when it is a URL. Otherwise it
+is treated as a file name inside ``--images DIR`` and goes through the
+normal upload pipeline (``services.images``).
+"""
+import contextlib
+import csv
+import json
+import math
+import os
+import sys
+import time
+from decimal import Decimal, InvalidOperation
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import insert, update, select, text
+from sqlalchemy.orm import contains_eager
+from werkzeug.datastructures import FileStorage
+
+from extensions import db
+from models import Product, Category
+from services import search, images
+from services.catalog import bump_version
+
+FIELDS = ["id", "name", "description", "price", "stock", "image", "category", "subcategory"]
+DEFAULT_BATCH_SIZE = 1000
+
+
+class RowError(ValueError):
+    pass
+
+
+# ---------- reading / writing ----------
+def _open(path, mode):
+    """Open `path` for csv/json text I/O; '-' means stdin/stdout."""
+    if path == "-":
+        return contextlib.nullcontext(sys.stdin if mode == "r" else sys.stdout)
+    return open(path, mode, encoding="utf-8", newline="")
+
+
+def _format_for(path, fmt):
+    if fmt:
+        return fmt
+    return "jsonl" if path.lower().endswith((".jsonl", ".ndjson", ".json")) else "csv"
+
+
+def read_rows(fh, fmt):
+    """Yield ``(line_no, dict)`` pairs without reading the whole file.
+
+    A JSONL line that is not a JSON object comes back as a RowError in
+    place of the dict, so the caller can skip it and carry on.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(fh)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for line_no, line in enumerate(fh, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as exc:
+                yield line_no, RowError(f"invalid JSON ({exc.msg})")
+                continue
+            if not isinstance(row, dict):
+                yield line_no, RowError("expected a JSON object")
+                continue
+            yield line_no, row
+
+
+def _chunks(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _blank(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _text(raw, key):
+    """`key` as a stripped string; JSON numbers are accepted, other types are not."""
+    value = raw.get(key)
+    if value is None:
+        return ""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    if not isinstance(value, str):
+        raise RowError(f"{key} must be a string")
+    return value.strip()
+
+
+def parse_row(raw):
+    """Validate one input row into Product column values plus category keys."""
+    name = _text(raw, "name")
+    if not name:
+        raise RowError("name is required")
+    try:
+        price = float(Decimal(str(raw.get("price")).strip()))
+    except (InvalidOperation, ValueError):
+        raise RowError(f"invalid price {raw.get('price')!r}")
+    if not math.isfinite(price):
+        raise RowError(f"invalid price {raw.get('price')!r}")
+    if price < 0:
+        raise RowError("price must not be negative")
+    try:
+        stock = 0 if _blank(raw.get("stock")) else int(raw.get("stock"))
+        product_id = None if _blank(raw.get("id")) else int(raw.get("id"))
+    except (TypeError, ValueError):
+        raise RowError("id and stock must be integers")
+
+    category = _text(raw, "category") or None
+    subcategory = _text(raw, "subcategory") or None
+    description = raw.get("description")
+    if description is not None and not isinstance(description, str):
+        raise RowError("description must be a string")
+    return {
+        "id": product_id,
+        "name": name,
+        "description": description or None,
+        "price": price,
+        "stock": max(stock, 0),
+        "image": _text(raw, "image") or None,
+        "category_key": (category, subcategory) if category else None,
+    }
+
+
+# ---------- import ----------
+def _category_ids(keys, cache):
+    """Map (name, subcategory) pairs to ids, creating the missing ones."""
+    missing = {k for k in keys if k not in cache}
+    if missing:
+        names = {name for name, _ in missing}
+        for cid, name, sub in db.session.execute(
+                select(Category.id, Category.name, Category.subcategory)
+                .where(Category.name.in_(names))):
+            cache.setdefault((name, sub), cid)
+        to_create = [k for k in missing if k not in cache]
+        if to_create:
+            created = db.session.scalars(
+                insert(Category).returning(Category.id, sort_by_parameter_order=True),
+                [{"name": name, "subcategory": sub} for name, sub in to_create],
+            ).all()
+            cache.update(zip(to_create, created))
+    return cache
+
+
+def _attach_image(value, image_dir):
+    if not value or not image_dir or value.startswith(("http://", "https://", "/")):
+        return value
+    path = os.path.join(image_dir, value)
+    if not os.path.isfile(path):
+        raise RowError(f"image {value!r} not found in {image_dir}")
+    with open(path, "rb") as fh:
+        try:
+            return images.save_upload(FileStorage(stream=fh, filename=os.path.basename(path)))
+        except images.UploadError:
+            raise RowError(f"image {value!r} could not be read")
+
+
+def _existing_ids(rows, match):
+    if match == "name":
+        names = [r["name"] for r in rows]
+        found = db.session.execute(select(Product.name, Product.id).where(Product.name.in_(names)))
+        by_name = {name: pid for name, pid in found}
+        for r in rows:
+            r["id"] = by_name.get(r["name"])
+        return set(by_name.values())
+    ids = [r["id"] for r in rows if r["id"] is not None]
+    if not ids:
+        return set()
+    return set(db.session.scalars(select(Product.id).where(Product.id.in_(ids))))
+
+
+def last_per_key(rows, match="id"):
+    """Split a batch into ``(kept, superseded)``: the last row per match key
+    is kept. Rows without an id are all kept when matching on id."""
+    latest = {}
+    for i, r in enumerate(rows):
+        key = r["name"] if match == "name" else r["id"]
+        latest[i if key is None else ("key", key)] = i
+    keep = set(latest.values())
+    return ([r for i, r in enumerate(rows) if i in keep],
+            [r for i, r in enumerate(rows) if i not in keep])
+
+
+def import_batch(rows, match="id", category_cache=None):
+    """Write one batch of parsed rows in a single transaction.
+
+    Match keys must be unique within the batch (see last_per_key).
+    Returns ``(inserted, updated)``.
+    """
+    cache = _category_ids({r["category_key"] for r in rows if r["category_key"]},
+                          category_cache if category_cache is not None else {})
+    existing = _existing_ids(rows, match)
+
+    inserts, updates = [], []
+    for r in rows:
+        values = {
+            "name": r["name"], "description": r["description"], "price": r["price"],
+            "stock": r["stock"], "category_id": cache.get(r["category_key"]),
+        }
+        if r["image"] or r["id"] not in existing:
+            values["image"] = r["image"]
+        if r["id"] in existing:
+            updates.append({"id": r["id"], **values})
+        else:
+            if r["id"] is not None and match == "id":
+                values["id"] = r["id"]
+            inserts.append(values)
+
+    touched = [u["id"] for u in updates]
+    if updates:
+        db.session.execute(update(Product), updates)
+    # new rows always carry an image key, so each group is a single executemany
+    implicit = [v for v in inserts if "id" not in v]
+    explicit = [v for v in inserts if "id" in v]
+    for group in (implicit, explicit):
+        if group:
+            touched += db.session.scalars(
+                insert(Product).returning(Product.id, sort_by_parameter_order=True), group
+            ).all()
+    if explicit and db.session.get_bind().dialect.name == "postgresql":
+        # explicit ids do not advance the serial sequence
+        db.session.execute(text(
+            "SELECT setval(pg_get_serial_sequence('product', 'id'), "
+            "(SELECT max(id) FROM product))"))
+
+    if search.backend() != "like":
+        products = (Product.query.outerjoin(Category)
+                    .options(contains_eager(Product.category))
+                    .filter(Product.id.in_(touched)))
+        for product in products:
+            search.index_product(product)
+    bump_version()
+    db.session.commit()
+    db.session.expunge_all()
+    return len(inserts), len(updates)
+
+
+def import_catalog(fh, fmt, batch_size=DEFAULT_BATCH_SIZE, match="id", image_dir=None,
+                   on_error=None, on_progress=None):
+    """Stream rows from `fh` into the catalog. Returns a stats dict."""
+    stats = {"rows": 0, "inserted": 0, "updated": 0, "skipped": 0}
+    category_cache = {}
+
+    def parsed():
+        for line_no, raw in read_rows(fh, fmt):
+            stats["rows"] += 1
+            try:
+                if isinstance(raw, RowError):
+                    raise raw
+                row = parse_row(raw)
+                row["image"] = _attach_image(row["image"], image_dir)
+                row["line_no"] = line_no
+                yield row
+            except RowError as exc:
+                stats["skipped"] += 1
+                if on_error:
+                    on_error(line_no, exc)
+
+    for batch in _chunks(parsed(), batch_size):
+        batch, superseded = last_per_key(batch, match)
+        for row in superseded:
+            stats["skipped"] += 1
+            if on_error:
+                on_error(row["line_no"], RowError(f"superseded by a later row with the same {match}"))
+        try:
+            inserted, updated = import_batch(batch, match, category_cache)
+        except Exception:
+            db.session.rollback()
+            raise
+        stats["inserted"] += inserted
+        stats["updated"] += updated
+        if on_progress:
+            on_progress(stats)
+    return stats
+
+
+# ---------- export ----------
+def export_rows(batch_size=DEFAULT_BATCH_SIZE):
+    query = (
+        db.session.query(Product.id, Product.name, Product.description, Product.price,
+                         Product.stock, Product.image,
+                         Category.name.label("category"), Category.subcategory)
+        .outerjoin(Category, Category.id == Product.category_id)
+        .order_by(Product.id)
+        .execution_options(yield_per=batch_size)
+    )
+    for row in query:
+        yield dict(zip(FIELDS, row))
+
+
+def export_catalog(fh, fmt, batch_size=DEFAULT_BATCH_SIZE):
+    count = 0
+    if fmt == "csv":
+        writer = csv.DictWriter(fh, fieldnames=FIELDS)
+        writer.writeheader()
+        for row in export_rows(batch_size):
+            writer.writerow(row)
+            count += 1
+    else:
+        for row in export_rows(batch_size):
+            fh.write(json.dumps(row) + "\n")
+            count += 1
+    return count
+
+
+# ---------- CLI ----------
+catalog_cli = AppGroup("catalog", help="Bulk product import and export.")
+
+_format_option = click.option("--format", "fmt", type=click.Choice(["csv", "jsonl"]),
+                              help="Defaults to the file extension (csv).")
+
+
+@catalog_cli.command("import")
+@click.argument("path", type=click.Path(dir_okay=False, allow_dash=True))
+@_format_option
+@click.option("--batch-size", default=DEFAULT_BATCH_SIZE, show_default=True)
+@click.option("--match", type=click.Choice(["id", "name"]), default="id", show_default=True,
+              help="Column used to find products to update.")
+@click.option("--images", "image_dir", type=click.Path(file_okay=False, exists=True),
+              help="Directory holding the image files named in the input.")
+def import_command(path, fmt, batch_size, match, image_dir):
+    """Insert or update products from a CSV / JSONL file ('-' for stdin)."""
+    fmt = _format_for(path, fmt)
+    started = time.monotonic()
+
+    def report_error(line_no, exc):
+        click.echo(f"line {line_no}: skipped, {exc}", err=True)
+
+    def report_progress(stats):
+        elapsed = time.monotonic() - started
+        click.echo(f"{stats['rows']} rows, {stats['rows'] / elapsed:.0f} rows/s")
+
+    with _open(path, "r") as fh:
+        stats = import_catalog(fh, fmt, batch_size, match, image_dir,
+                               on_error=report_error, on_progress=report_progress)
+
+    elapsed = time.monotonic() - started
+    click.echo(f"Imported {stats['rows']} rows in {elapsed:.1f}s "
+               f"({stats['rows'] / elapsed if elapsed else 0:.0f} rows/s): "
+               f"{stats['inserted']} inserted, {stats['updated']} updated, "
+               f"{stats['skipped']} skipped.")
+
+
+@catalog_cli.command("export")
+@click.argument("path", type=click.Path(dir_okay=False, allow_dash=True), default="-")
+@_format_option
+@click.option("--batch-size", default=DEFAULT_BATCH_SIZE, show_default=True)
+def export_command(path, fmt, batch_size):
+    """Write every product to a CSV / JSONL file (default: stdout)."""
+    fmt = _format_for(path, fmt)
+    started = time.monotonic()
+    with _open(path, "w") as fh:
+        count = export_catalog(fh, fmt, batch_size)
+    elapsed = time.monotonic() - started
+    click.echo(f"Exported {count} products in {elapsed:.1f}s.", err=True)
@@ -0,0 +1,97 @@
+# services/database.py
+"""Engine, pool and SQLite connection tuning.
+
+``engine_options(config)`` builds SQLALCHEMY_ENGINE_OPTIONS for the
+configured dialect. DB_POOL_* settings override the per-dialect defaults
+below. ``init_app`` must run before ``db.init_app``; it also installs a
+connect hook that applies SQLITE_PRAGMAS to every new SQLite connection.
+
+With WAL, readers no longer block the checkout writer, nor the writer
+them. ``synchronous=NORMAL`` is durable across application crashes in WAL
+mode; a power loss may lose the last few commits but never corrupts the
+file. ``busy_timeout`` makes writers queue for the lock inside SQLite
+instead of failing at once with "database is locked".
+"""
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+
+POOL_DEFAULTS = {
+    # one server connection per worker thread, recycled before the
+    # server's idle timeout, checked before use after failovers
+    "postgresql": {"pool_size": 10, "max_overflow": 20, "pool_recycle": 1800,
+                   "pool_timeout": 30, "pool_pre_ping": True},
+    "mysql": {"pool_size": 10, "max_overflow": 20, "pool_recycle": 280,
+              "pool_timeout": 30, "pool_pre_ping": True},
+    # connections are cheap local file handles; a larger pool just lets
+    # every thread keep its own
+    "sqlite": {"pool_size": 20, "max_overflow": 20, "pool_timeout": 30},
+}
+
+# SQLSTATEs for serialization_failure and deadlock_detected
+_PG_RETRYABLE = {"40001", "40P01"}
+
+_CONFIG_KEYS = {
+    "DB_POOL_SIZE": "pool_size",
+    "DB_MAX_OVERFLOW": "max_overflow",
+    "DB_POOL_RECYCLE": "pool_recycle",
+    "DB_POOL_TIMEOUT": "pool_timeout",
+}
+
+
+def _is_memory(url):
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def engine_options(config):
+    url = make_url(config["SQLALCHEMY_DATABASE_URI"])
+    if _is_memory(url):
+        return dict(config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+
+    options = dict(POOL_DEFAULTS.get(url.get_backend_name(), {}))
+    for key, option in _CONFIG_KEYS.items():
+        if config.get(key) is not None:
+            options[option] = config[key]
+    options.update(config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    return options
+
+
+def apply_pragmas(dbapi_connection, pragmas):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def _install_pragmas(engine, pragmas):
+    if engine.dialect.name != "sqlite" or not pragmas or _is_memory(engine.url):
+        return
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        apply_pragmas(dbapi_connection, pragmas)
+
+
+def init_app(app, db):
+    """Fill in engine options, then initialise `db` and tune its engines."""
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config)
+    db.init_app(app)
+
+    pragmas = app.config.get("SQLITE_PRAGMAS") if app.config.get("SQLITE_TUNING", True) else None
+    with app.app_context():
+        for engine in db.engines.values():
+            _install_pragmas(engine, pragmas)
+
+
+def is_contention(exc):
+    """True for lock/serialization errors worth retrying (a DBAPIError).
+
+    SQLite "database is locked", Postgres serialization failures and
+    deadlocks.
+    """
+    if isinstance(exc, OperationalError) and "locked" in str(exc.orig).lower():
+        return True
+    code = getattr(exc.orig, "pgcode", None) or getattr(exc.orig, "sqlstate", None)
+    return code in _PG_RETRYABLE
@@ -0,0 +1,67 @@
+# services/facets.py
+"""Category / subcategory facets with live product counts.
+
+Built with one grouped query and held in memory per worker until the
+catalog version (services/catalog.py) moves, so rendering the filter
+dropdowns normally costs no queries.
+"""
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import List, Tuple
+
+from sqlalchemy import func
+
+from extensions import db
+from models import Product, Category
+from services import metrics
+from services.catalog import current_version
+
+
+@dataclass(frozen=True)
+class Facets:
+    version: int
+    categories: List[Tuple[str, int]]  # (name, product count)
+    subcategories: List[Tuple[str, int]]
+
+
+_lock = threading.Lock()
+_cache = {}
+
+
+def _build(version):
+    rows = (
+        db.session.query(Category.name, Category.subcategory, func.count(Product.id))
+        .outerjoin(Product, Product.category_id == Category.id)
+        .group_by(Category.name, Category.subcategory)
+        .all()
+    )
+    categories, subcategories = Counter(), Counter()
+    for name, subcategory, count in rows:
+        if name:
+            categories[name] += count
+        if subcategory:
+            subcategories[subcategory] += count
+    return Facets(
+        version=version,
+        categories=sorted(categories.items()),
+        subcategories=sorted(subcategories.items()),
+    )
+
+
+def get_facets():
+    version = current_version()
+    facets = _cache.get("facets")
+    if facets is not None and facets.version == version:
+        metrics.cache_lookup("facets", True)
+        return facets
+    metrics.cache_lookup("facets", False)
+    with _lock:
+        facets = _cache.get("facets")
+        if facets is None or facets.version != version:
+            facets = _cache["facets"] = _build(version)
+    return facets
+
+
+def invalidate():
+    _cache.pop("facets", None)
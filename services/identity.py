@@ -0,0 +1,125 @@
+# services/identity.py
+"""Cross-request cache for Flask-Login's user loader.
+
+Holds detached ``User`` rows per worker for USER_CACHE_TTL seconds. A hit is
+re-attached to the request's session with ``merge(load=False)``, which
+issues no SQL; relationships still lazy-load as usual. Flask-Login itself
+memoises ``current_user`` for the rest of the request.
+
+Writes to a user (profile edits, admin promotion, password resets) call
+``bump_version()`` before they commit and ``invalidate(user_id)`` after.
+Every worker, including ones in other processes such as ``flask users``,
+re-reads the single-row ``identity_version`` counter at most every
+USER_CACHE_VERSION_TTL seconds and drops its whole cache when the
+counter has moved. A revoked admin or a reset password therefore takes
+effect everywhere within that many seconds, not USER_CACHE_TTL.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from sqlalchemy import update
+from sqlalchemy.orm import make_transient_to_detached
+
+from extensions import db
+from models import User, IdentityVersion
+from services import metrics
+
+_ROW_ID = 1
+
+
+def bump_version():
+    """Increment the identity counter; call before committing a user write."""
+    updated = db.session.execute(
+        update(IdentityVersion)
+        .where(IdentityVersion.id == _ROW_ID)
+        .values(version=IdentityVersion.version + 1)
+    ).rowcount
+    if not updated:
+        db.session.add(IdentityVersion(id=_ROW_ID, version=1))
+        db.session.flush()
+
+
+class IdentityCache:
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # user_id -> (expires_at, detached User)
+        self._lock = threading.Lock()
+        self._version = None  # identity_version the entries were loaded under
+        self._version_checked_at = 0.0
+
+    def _ttl(self):
+        return current_app.config.get("USER_CACHE_TTL", 30)
+
+    def _check_version(self, now):
+        """Drop every entry if another process has bumped identity_version."""
+        with self._lock:
+            if now - self._version_checked_at < current_app.config.get("USER_CACHE_VERSION_TTL", 2):
+                return
+            self._version_checked_at = now
+        row = db.session.get(IdentityVersion, _ROW_ID)
+        version = row.version if row else 0
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+
+    def get(self, user_id):
+        now = time.monotonic()
+        self._check_version(now)
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                cached = entry[1]
+            else:
+                self._entries.pop(user_id, None)
+                self.misses += 1
+                cached = None
+
+        metrics.cache_lookup("identity", cached is not None)
+        if cached is not None:
+            return db.session.merge(cached, load=False)
+
+        user = db.session.get(User, user_id)
+        if user is not None and self._ttl() > 0:
+            self._store(user_id, user, now)
+        return user
+
+    def _store(self, user_id, user, now):
+        # Copy the loaded columns into a fresh detached instance so the
+        # request's own object stays attached to its session.
+        snapshot = User(**{c.key: getattr(user, c.key) for c in User.__table__.columns})
+        make_transient_to_detached(snapshot)
+        with self._lock:
+            self._entries[user_id] = (now + self._ttl(), snapshot)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id=None):
+        """Forget one user (or everyone) in this process; other processes
+        follow ``bump_version()``."""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(int(user_id), None)
+            self._version_checked_at = 0.0  # re-read the counter on the next get
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._entries),
+            }
+
+
+identity_cache = IdentityCache()
@@ -0,0 +1,236 @@
+# services/images.py
+"""Product image pipeline.
+
+Uploads are stored under a content hash, ``static/uploads/<hash>.jpg`` (the
+recompressed full-size image), next to resized variants::
+
+    <hash>-thumb.webp  <hash>-thumb.jpg    160px
+    <hash>-card.webp   <hash>-card.jpg     480px
+    <hash>-detail.webp <hash>-detail.jpg   1200px
+
+The sizes are bounding boxes; the actual pixel width of each variant
+(smaller for portrait pictures and for small sources) is recorded in
+``<hash>.json``. ``image_sources`` turns a stored ``Product.image`` URL back
+into those variants, with their real widths, for the ``_image.html``
+macro's ``srcset``. URLs that are not pipeline outputs (external links,
+legacy uploads) are rendered as-is.
+
+An upload Pillow cannot decode, or one large enough to be a decompression
+bomb, raises UploadError.
+
+Pillow is optional: without it uploads are saved unprocessed as before.
+It is imported on the first upload rather than at start-up.
+"""
+import functools
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import re
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from werkzeug.utils import secure_filename
+
+from extensions import db
+from models import Product
+
+UPLOAD_FOLDER = "static/uploads"
+
+# variant -> longest edge in px
+VARIANTS = {"thumb": 160, "card": 480, "detail": 1200}
+FULL_SIZE = 2400
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+
+_HASHED = re.compile(r"^/" + re.escape(UPLOAD_FOLDER) + r"/(?P<hash>[0-9a-f]{20})\.jpg$")
+_VARIANT_FILE = re.compile(r"^[0-9a-f]{20}(-(" + "|".join(VARIANTS) + r"))?\.(jpg|webp)$")
+
+
+class UploadError(ValueError):
+    pass
+
+
+@functools.lru_cache(maxsize=None)
+def available():
+    return importlib.util.find_spec("PIL") is not None
+
+
+def _upload_dir():
+    return os.path.join(current_app.root_path, UPLOAD_FOLDER)
+
+
+def _url(name):
+    return f"/{UPLOAD_FOLDER}/{name}"
+
+
+# ---------- processing ----------
+def _flatten(img):
+    """JPEG has no alpha channel: composite onto white."""
+    from PIL import Image
+    if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+        img = img.convert("RGBA")
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel("A"))
+        return background
+    return img.convert("RGB")
+
+
+def _save(img, path, fmt):
+    if fmt == "JPEG":
+        _flatten(img).save(path, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    else:
+        img.save(path, "WEBP", quality=WEBP_QUALITY, method=4)
+
+
+def process_image(data: bytes, upload_dir=None) -> str:
+    """Write the full-size image and every variant; return the image URL.
+
+    Files are named by content, so re-uploading the same picture is a no-op.
+    """
+    from PIL import Image, ImageOps
+
+    upload_dir = upload_dir or _upload_dir()
+    os.makedirs(upload_dir, exist_ok=True)
+    digest = hashlib.sha256(data).hexdigest()[:20]
+    full_path = os.path.join(upload_dir, f"{digest}.jpg")
+    if os.path.exists(full_path):
+        return _url(f"{digest}.jpg")
+
+    with Image.open(io.BytesIO(data)) as src:
+        img = ImageOps.exif_transpose(src)
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "transparency" in img.info or img.mode in ("LA", "PA") else "RGB")
+
+        widths = {}
+        for name, edge in VARIANTS.items():
+            variant = img.copy()
+            variant.thumbnail((edge, edge), Image.LANCZOS)
+            _save(variant, os.path.join(upload_dir, f"{digest}-{name}.webp"), "WEBP")
+            _save(variant, os.path.join(upload_dir, f"{digest}-{name}.jpg"), "JPEG")
+            widths[name] = variant.width
+        with open(os.path.join(upload_dir, f"{digest}.json"), "w") as fh:
+            json.dump(widths, fh)
+
+        img.thumbnail((FULL_SIZE, FULL_SIZE), Image.LANCZOS)
+        # written last: its presence marks the set as complete
+        _save(img, full_path, "JPEG")
+
+    return _url(f"{digest}.jpg")
+
+
+def _decode_errors():
+    from PIL import Image
+    # UnidentifiedImageError is an OSError; truncated or malformed files can
+    # also surface as ValueError or SyntaxError from the decoders
+    return (OSError, Image.DecompressionBombError, ValueError, SyntaxError)
+
+
+def save_upload(file_storage) -> str:
+    """Store an uploaded image and return the URL to keep on Product.image.
+
+    Raises UploadError if the image cannot be processed.
+    """
+    if available():
+        try:
+            return process_image(file_storage.read())
+        except _decode_errors() as exc:
+            raise UploadError(f"Could not read the uploaded image ({exc})") from exc
+
+    filename = secure_filename(file_storage.filename)
+    save_path = os.path.join(_upload_dir(), filename)
+    os.makedirs(os.path.dirname(save_path), exist_ok=True)
+    file_storage.save(save_path)
+    return _url(filename)
+
+
+# ---------- templates ----------
+@functools.lru_cache(maxsize=4096)
+def _variant_widths(upload_dir, digest):
+    """{variant: width in px} of a processed set, or None when unknown."""
+    try:
+        with open(os.path.join(upload_dir, f"{digest}.json")) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        pass
+    if not available():
+        return None
+    # sets processed before widths were recorded: read the JPEG headers
+    from PIL import Image
+    widths = {}
+    for name in VARIANTS:
+        try:
+            with Image.open(os.path.join(upload_dir, f"{digest}-{name}.jpg")) as img:
+                widths[name] = img.width
+        except _decode_errors():
+            return None
+    return widths
+
+
+def image_sources(url):
+    """Variant URLs for a pipeline image, or None for anything else.
+
+    Returns ``{"webp": "srcset", "jpg": "srcset", "thumb"/"card"/"detail": jpg url}``.
+    """
+    match = _HASHED.match(url or "")
+    if not match:
+        return None
+    digest = match.group("hash")
+    base = f"/{UPLOAD_FOLDER}/{digest}"
+    widths = _variant_widths(_upload_dir(), digest)
+    if widths:
+        # small sources give several variants the same width; list each width once
+        by_width = {}
+        for name in VARIANTS:
+            by_width.setdefault(widths[name], name)
+        sources = {
+            ext: ", ".join(f"{base}-{name}.{ext} {width}w" for width, name in by_width.items())
+            for ext in ("webp", "jpg")
+        }
+    else:
+        sources = {ext: f"{base}-detail.{ext}" for ext in ("webp", "jpg")}
+    sources.update({name: f"{base}-{name}.jpg" for name in VARIANTS})
+    return sources
+
+
+# ---------- CLI ----------
+images_cli = AppGroup("images", help="Product image pipeline.")
+
+
+@images_cli.command("backfill")
+@click.option("--dry-run", is_flag=True, help="List what would change without writing.")
+def backfill_command(dry_run):
+    """Process legacy files in static/uploads and repoint products at them."""
+    if not available():
+        raise click.ClickException("Pillow is not installed (pip install Pillow).")
+
+    upload_dir = _upload_dir()
+    processed = repointed = 0
+    for name in sorted(os.listdir(upload_dir)):
+        path = os.path.join(upload_dir, name)
+        if not os.path.isfile(path) or _VARIANT_FILE.match(name):
+            continue
+        ext = name.rsplit(".", 1)[-1].lower()
+        if ext not in ("png", "jpg", "jpeg", "gif", "webp"):
+            continue
+
+        old_url = _url(name)
+        if dry_run:
+            click.echo(f"would process {name}")
+            continue
+        with open(path, "rb") as fh:
+            try:
+                new_url = process_image(fh.read(), upload_dir)
+            except _decode_errors() as exc:
+                click.echo(f"skipped {name}: {exc}", err=True)
+                continue
+        processed += 1
+        repointed += Product.query.filter(Product.image == old_url).update(
+            {Product.image: new_url}, synchronize_session=False)
+        click.echo(f"{name} -> {new_url}")
+
+    if not dry_run:
+        db.session.commit()
+    click.echo(f"Processed {processed} files, updated {repointed} products.")
@@ -0,0 +1,165 @@
+# services/metrics.py
+"""Prometheus metrics, served at ``/metrics``.
+
+Exposes:
+- request latency histograms per endpoint; the blueprint is its own label,
+  so ``product.*``, ``admin.*`` and ``auth.*`` can be aggregated
+- database pool connections open and checked out
+- cache hits and misses (identity, facets, cart count)
+- business counters: orders placed, checkouts refused for stock, logins
+  and signups
+
+Under gunicorn, set PROMETHEUS_MULTIPROC_DIR to an empty directory that
+all workers share. ``prometheus_client`` then keeps each worker's values
+in its own mmap'd file, with no cross-process locking, and a scrape of
+any worker merges all of them. Clear the directory on deploy and call
+``mark_process_dead(worker.pid)`` from gunicorn's ``child_exit`` hook, so
+the live gauges drop exited workers.
+
+``prometheus_client`` is optional. Without it every helper here is a
+no-op and ``/metrics`` is not registered.
+
+The endpoint exports revenue and order counters, so it fails closed. With
+METRICS_TOKEN set, a scrape needs ``Authorization: Bearer <token>``.
+Without one, it is only served to loopback and private addresses on
+requests that did not come through a proxy (no ``X-Forwarded-For`` /
+``Forwarded`` header). Behind a reverse proxy every client looks local,
+so scrapes through it always need the token.
+"""
+import hmac
+import ipaddress
+import os
+import time
+
+from flask import g, request, Response, abort, current_app
+from flask_login import user_logged_in
+from sqlalchemy import event
+
+try:
+    import prometheus_client
+    from prometheus_client import Counter, Histogram, Gauge, CollectorRegistry, multiprocess
+except ImportError:  # pragma: no cover - optional dependency
+    prometheus_client = None
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def available():
+    return prometheus_client is not None
+
+
+if available():
+    REQUEST_LATENCY = Histogram(
+        "http_request_duration_seconds", "Request latency by Flask endpoint.",
+        ["blueprint", "endpoint", "method"], buckets=LATENCY_BUCKETS)
+    REQUESTS = Counter(
+        "http_requests_total", "Requests by Flask endpoint and status code.",
+        ["blueprint", "endpoint", "method", "status"])
+    POOL_OPEN = Gauge(
+        "db_pool_connections_open", "Database connections currently open.",
+        multiprocess_mode="livesum")
+    POOL_CHECKED_OUT = Gauge(
+        "db_pool_connections_checked_out", "Database connections currently in use.",
+        multiprocess_mode="livesum")
+    CACHE = Counter(
+        "cache_requests_total", "In-process cache lookups.", ["cache", "result"])
+    ORDERS_PLACED = Counter("orders_placed_total", "Orders placed at checkout.")
+    ORDER_REVENUE = Counter("orders_revenue_total", "Value of orders placed.")
+    CHECKOUT_OUT_OF_STOCK = Counter(
+        "checkout_out_of_stock_total", "Checkouts refused because of insufficient stock.")
+    LOGINS = Counter("logins_total", "Successful logins.", ["role"])
+    SIGNUPS = Counter("signups_total", "New customer accounts.")
+
+
+# ---------- recording helpers ----------
+def cache_lookup(cache, hit):
+    if available():
+        CACHE.labels(cache, "hit" if hit else "miss").inc()
+
+
+def order_placed(order):
+    if available():
+        ORDERS_PLACED.inc()
+        ORDER_REVENUE.inc(order.total_amount or 0)
+
+
+def checkout_out_of_stock():
+    if available():
+        CHECKOUT_OUT_OF_STOCK.inc()
+
+
+def signup():
+    if available():
+        SIGNUPS.inc()
+
+
+def _on_login(sender, user, **extra):
+    LOGINS.labels("admin" if user.is_admin else "customer").inc()
+
+
+# ---------- request timing ----------
+def _start_timer():
+    g._metrics_t0 = time.perf_counter()
+
+
+def _observe(response):
+    started = g.pop("_metrics_t0", None)
+    endpoint = request.endpoint or "<unmatched>"
+    if started is None or endpoint == "metrics":
+        return response
+    blueprint = request.blueprint or ""
+    REQUEST_LATENCY.labels(blueprint, endpoint, request.method).observe(
+        time.perf_counter() - started)
+    REQUESTS.labels(blueprint, endpoint, request.method, str(response.status_code)).inc()
+    return response
+
+
+# ---------- pool ----------
+def _watch_pool(engine):
+    event.listen(engine, "connect", lambda *a: POOL_OPEN.inc())
+    event.listen(engine, "close", lambda *a: POOL_OPEN.dec())
+    event.listen(engine, "checkout", lambda *a: POOL_CHECKED_OUT.inc())
+    event.listen(engine, "checkin", lambda *a: POOL_CHECKED_OUT.dec())
+
+
+# ---------- endpoint ----------
+def _registry():
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return prometheus_client.REGISTRY
+
+
+def _internal_request():
+    if "X-Forwarded-For" in request.headers or "Forwarded" in request.headers:
+        return False
+    try:
+        address = ipaddress.ip_address(request.remote_addr or "")
+    except ValueError:
+        return False
+    return address.is_loopback or address.is_private
+
+
+def metrics_view():
+    token = current_app.config.get("METRICS_TOKEN")
+    if token:
+        supplied = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(supplied.encode(), f"Bearer {token}".encode()):
+            abort(403)
+    elif not _internal_request():
+        abort(403)
+    return Response(prometheus_client.generate_latest(_registry()),
+                    mimetype=prometheus_client.CONTENT_TYPE_LATEST)
+
+
+def init_app(app, db):
+    if not available() or not app.config.get("METRICS_ENABLED", True):
+        return
+    app.before_request(_start_timer)
+    app.after_request(_observe)
+    user_logged_in.connect(_on_login, app)
+    with app.app_context():
+        for engine in db.engines.values():
+            _watch_pool(engine)
+    app.add_url_rule("/metrics", "metrics", metrics_view)
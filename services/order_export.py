@@ -0,0 +1,154 @@
+# services/order_export.py
+"""Streaming order export for accounting.
+
+CSV output has one row per order line (orders without lines get one row
+with empty line columns). JSONL output has one object per order with its
+``items`` nested.
+
+Orders are read in keyset chunks of ``batch_size`` by ascending id: one
+query for the chunk's order ids, one for their lines. Each chunk ends its
+read transaction, so a long download never pins a snapshot or the SQLite
+read lock, and memory stays at one chunk. Output is always whole orders
+in id order. An interrupted export can be resumed with
+``after_id=<last order_id received>``.
+
+``order_filters`` builds the status / date / customer conditions for the
+export endpoint, ``flask orders export`` and the admin order list alike.
+"""
+import csv
+import io
+import json
+import sys
+from datetime import datetime, timedelta
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import select, or_
+
+from extensions import db
+from models import Order, OrderItem, Product, User
+from services.order_status import STATUSES
+
+FIELDS = ["order_id", "created_at", "status", "customer_email", "customer_username",
+          "order_total", "product_id", "product_name", "quantity", "unit_price", "line_total"]
+DEFAULT_BATCH_SIZE = 500
+
+
+def order_filters(status=None, date_from=None, date_to=None, customer=None):
+    """WHERE conditions on Order for the export and order-list filters.
+
+    `date_to` is inclusive; `customer` is an exact email or username, so the
+    lookup stays on the unique indexes.
+    """
+    conditions = []
+    if status:
+        conditions.append(Order.status == status)
+    if date_from:
+        conditions.append(Order.created_at >= date_from)
+    if date_to:
+        conditions.append(Order.created_at < date_to + timedelta(days=1))
+    if customer:
+        conditions.append(Order.user_id.in_(
+            select(User.id).where(or_(User.email == customer, User.username == customer))))
+    return conditions
+
+
+def _order_ids(conditions, after_id, batch_size):
+    stmt = select(Order.id).where(*conditions).order_by(Order.id).limit(batch_size)
+    if after_id:
+        stmt = stmt.where(Order.id > after_id)
+    return db.session.scalars(stmt).all()
+
+
+def _lines(order_ids):
+    return db.session.execute(
+        select(Order.id, Order.created_at, Order.status, User.email, User.username,
+               Order.total_amount, OrderItem.product_id, Product.name,
+               OrderItem.quantity, OrderItem.unit_price)
+        .join(User, User.id == Order.user_id)
+        .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+        .outerjoin(Product, Product.id == OrderItem.product_id)
+        .where(Order.id.in_(order_ids))
+        .order_by(Order.id, OrderItem.id)
+    ).all()
+
+
+def iter_chunks(status=None, date_from=None, date_to=None, customer=None,
+                after_id=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Yield lists of export rows (dicts), one chunk of orders at a time."""
+    conditions = order_filters(status, date_from, date_to, customer)
+    while True:
+        order_ids = _order_ids(conditions, after_id, batch_size)
+        if not order_ids:
+            break
+        rows = []
+        for line in _lines(order_ids):
+            row = dict(zip(FIELDS, line))
+            row["created_at"] = row["created_at"].isoformat(sep=" ", timespec="seconds")
+            row["line_total"] = (round(row["quantity"] * row["unit_price"], 2)
+                                 if row["quantity"] is not None else None)
+            rows.append(row)
+        # end the read transaction between chunks
+        db.session.rollback()
+        yield rows
+        after_id = order_ids[-1]
+
+
+def _nest(rows):
+    """Group line rows into one dict per order for JSONL."""
+    order = None
+    for row in rows:
+        if order is None or order["order_id"] != row["order_id"]:
+            if order is not None:
+                yield order
+            order = {k: row[k] for k in FIELDS[:6]}
+            order["items"] = []
+        if row["product_id"] is not None:
+            order["items"].append({k: row[k] for k in FIELDS[6:]})
+    if order is not None:
+        yield order
+
+
+def stream(fmt="csv", **filters):
+    """Yield the export as text pieces, ready for a streaming response."""
+    if fmt == "csv":
+        buf = io.StringIO()
+        writer = csv.DictWriter(buf, fieldnames=FIELDS)
+        writer.writeheader()
+        yield buf.getvalue()
+        for rows in iter_chunks(**filters):
+            buf.seek(0)
+            buf.truncate()
+            writer.writerows(rows)
+            yield buf.getvalue()
+    else:
+        for rows in iter_chunks(**filters):
+            yield "".join(json.dumps(order) + "\n" for order in _nest(rows))
+
+
+# ---------- CLI ----------
+orders_cli = AppGroup("orders", help="Order exports.")
+
+
+@orders_cli.command("export")
+@click.argument("path", type=click.Path(dir_okay=False, allow_dash=True), default="-")
+@click.option("--format", "fmt", type=click.Choice(["csv", "jsonl"]), default="csv", show_default=True)
+@click.option("--status", type=click.Choice(STATUSES))
+@click.option("--from", "date_from", type=click.DateTime(["%Y-%m-%d"]))
+@click.option("--to", "date_to", type=click.DateTime(["%Y-%m-%d"]), help="Inclusive.")
+@click.option("--customer", help="Exact customer email or username.")
+@click.option("--after-id", type=int, help="Resume after this order id.")
+@click.option("--batch-size", default=DEFAULT_BATCH_SIZE, show_default=True)
+def export_command(path, fmt, status, date_from, date_to, customer, after_id, batch_size):
+    """Write orders and their lines to PATH (default: stdout)."""
+    started = datetime.now()
+    out = sys.stdout if path == "-" else open(path, "w", encoding="utf-8", newline="")
+    try:
+        for piece in stream(fmt, status=status, date_from=date_from, date_to=date_to,
+                            customer=(customer or "").strip() or None,
+                            after_id=after_id, batch_size=batch_size):
+            out.write(piece)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    click.echo(f"Export finished in {(datetime.now() - started).total_seconds():.1f}s.", err=True)
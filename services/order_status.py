@@ -0,0 +1,150 @@
+# services/order_status.py
+"""Order status transitions, one order or hundreds at a time.
+
+Only the moves in TRANSITIONS are allowed. A batch is applied with one
+set-based, guarded UPDATE::
+
+    UPDATE "order" SET status = :new
+     WHERE id IN (...) AND status = CASE id WHEN :a THEN :old_a ... END
+
+The rows are read (and locked, on Postgres) first to learn each order's
+current status. If the UPDATE then matches fewer rows, another admin
+changed one of them in between: the batch is rolled back and retried.
+Orders that cannot make the move are reported back, not failed.
+
+Every change appends an ``order_status_event`` row (old, new, who,
+when), inserted in batches in the same transaction. Cancelling or
+restoring orders adjusts the sales rollups for the whole batch at once.
+"""
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Tuple
+
+from sqlalchemy import case, insert, select, update
+from sqlalchemy.exc import DBAPIError
+
+from extensions import db
+from models import Order, OrderStatusEvent
+from services import rollups
+from services.database import is_contention
+
+STATUSES = ("PLACED", "PAID", "SHIPPED", "DELIVERED", "CANCELLED")
+TRANSITIONS = {
+    "PLACED": ("PAID", "SHIPPED", "CANCELLED"),  # cash-on-delivery orders ship unpaid
+    "PAID": ("SHIPPED", "CANCELLED"),
+    "SHIPPED": ("DELIVERED",),
+    "DELIVERED": (),
+    "CANCELLED": ("PLACED",),
+}
+MAX_BATCH = 1000
+EVENT_BATCH = 500
+RETRY_ATTEMPTS = 5
+RETRY_BASE_DELAY = 0.02  # seconds
+
+
+class _Raced(Exception):
+    """An order changed status between the read and the UPDATE."""
+
+
+@dataclass
+class StatusChange:
+    status: str
+    changed: List[Tuple[int, str]] = field(default_factory=list)   # (order id, old status)
+    unchanged: List[int] = field(default_factory=list)             # already in `status`
+    rejected: List[Tuple[int, str]] = field(default_factory=list)  # (order id, its status)
+    missing: List[int] = field(default_factory=list)
+
+    def summary(self):
+        parts = [f"{len(self.changed)} order{'s' if len(self.changed) != 1 else ''} "
+                 f"marked {self.status}"]
+        if self.unchanged:
+            parts.append(f"{len(self.unchanged)} already {self.status}")
+        for old in sorted({s for _, s in self.rejected}):
+            ids = [oid for oid, s in self.rejected if s == old]
+            parts.append(f"{len(ids)} {old} cannot become {self.status} "
+                         f"(#{', #'.join(map(str, ids[:5]))}{', …' if len(ids) > 5 else ''})")
+        if self.missing:
+            parts.append(f"{len(self.missing)} not found")
+        return "; ".join(parts) + "."
+
+
+def can_move(old_status, new_status):
+    return new_status in TRANSITIONS.get(old_status, ())
+
+
+def _apply_once(order_ids, new_status, changed_by_id):
+    result = StatusChange(new_status)
+    rows = db.session.execute(
+        select(Order.id, Order.user_id, Order.created_at, Order.status)
+        .where(Order.id.in_(order_ids)).order_by(Order.id).with_for_update()
+    ).all()
+    found = {row.id for row in rows}
+    result.missing = [oid for oid in order_ids if oid not in found]
+
+    moving = []
+    for row in rows:
+        if row.status == new_status:
+            result.unchanged.append(row.id)
+        elif can_move(row.status, new_status):
+            moving.append(row)
+        else:
+            result.rejected.append((row.id, row.status))
+    if not moving:
+        db.session.rollback()
+        return result
+
+    old = {row.id: row.status for row in moving}
+    updated = db.session.execute(
+        update(Order)
+        .where(Order.id.in_(sorted(old)), Order.status == case(old, value=Order.id))
+        .values(status=new_status)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if updated != len(old):
+        raise _Raced()
+
+    now = datetime.utcnow()
+    events = [{"order_id": row.id, "old_status": row.status, "new_status": new_status,
+               "changed_by_id": changed_by_id, "created_at": now} for row in moving]
+    for start in range(0, len(events), EVENT_BATCH):
+        db.session.execute(insert(OrderStatusEvent), events[start:start + EVENT_BATCH])
+    rollups.record_status_changes([(row, row.status, new_status) for row in moving])
+    db.session.commit()
+
+    result.changed = [(row.id, row.status) for row in moving]
+    return result
+
+
+def apply(order_ids, new_status, changed_by_id=None, attempts=RETRY_ATTEMPTS):
+    """Move the given orders to `new_status` where TRANSITIONS allows it.
+
+    Returns a StatusChange; orders that cannot move are listed in it and
+    left alone. Raises ValueError for an unknown status or an oversized
+    batch. Commits.
+    """
+    if new_status not in STATUSES:
+        raise ValueError(f"unknown status {new_status!r}")
+    order_ids = list(dict.fromkeys(int(oid) for oid in order_ids))
+    if len(order_ids) > MAX_BATCH:
+        raise ValueError(f"at most {MAX_BATCH} orders per batch")
+    if not order_ids:
+        return StatusChange(new_status)
+
+    for attempt in range(attempts):
+        try:
+            return _apply_once(order_ids, new_status, changed_by_id)
+        except (_Raced, DBAPIError) as exc:
+            db.session.rollback()
+            if attempt == attempts - 1 or (isinstance(exc, DBAPIError) and not is_contention(exc)):
+                raise
+            time.sleep(RETRY_BASE_DELAY * (2 ** attempt) * (0.5 + random.random()))
+
+
+def history(order_id):
+    """Status events of one order, oldest first."""
+    return db.session.scalars(
+        select(OrderStatusEvent).where(OrderStatusEvent.order_id == order_id)
+        .order_by(OrderStatusEvent.id)
+    ).all()
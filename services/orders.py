@@ -0,0 +1,121 @@
+# services/orders.py
+"""Order placement.
+
+Stock is taken with one conditional, set-based UPDATE::
+
+    UPDATE product SET stock = stock - CASE id WHEN :a THEN :qa ... END
+     WHERE id IN (...) AND stock >= CASE id WHEN :a THEN :qa ... END
+
+If fewer rows match than there are cart lines, another checkout got there
+first and the whole transaction is rolled back, so concurrent buyers can
+never drive stock below zero. The check and the decrement are a single
+statement, so READ COMMITTED (the Postgres default) is enough. SQLite takes
+its write lock on that first UPDATE. Lock contention (SQLite "database is
+locked", Postgres serialization failures / deadlocks) is retried with
+jittered backoff.
+
+Units held by other carts (services/reservations.py) are not for sale:
+the condition is ``stock - held_by_others >= qty``, and the buyer's own
+holds are released in the same transaction.
+
+An order that sells a product out also bumps the catalog version, so
+cached availability (API responses and their ETags) is refreshed.
+"""
+import random
+import time
+
+from sqlalchemy import case, update, select
+from sqlalchemy.exc import DBAPIError
+
+from extensions import db
+from models import Product, Order, OrderItem
+from services import rollups, metrics, catalog, reservations
+from services.database import is_contention
+
+RETRY_ATTEMPTS = 5
+RETRY_BASE_DELAY = 0.02  # seconds
+
+
+class OutOfStock(Exception):
+    def __init__(self, product):
+        super().__init__(f"Not enough stock for {product.name}")
+        self.product = product
+
+
+def _reserve_stock(quantities, cart_id=None):
+    """Decrement stock for every line or for none; returns the rows updated."""
+    wanted = case(quantities, value=Product.id)
+    free = Product.stock - reservations.held_by_others(Product.id, cart_id)
+    result = db.session.execute(
+        update(Product)
+        .where(Product.id.in_(sorted(quantities)), free >= wanted)
+        .values(stock=Product.stock - wanted)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def _sold_out(product_ids):
+    return db.session.execute(
+        select(Product.id).where(Product.id.in_(product_ids), Product.stock <= 0).limit(1)
+    ).first() is not None
+
+
+def _first_short(lines, cart_id=None):
+    free = reservations.available([l.product.id for l in lines], cart_id)
+    for line in lines:
+        if free.get(line.product.id, 0) < line.qty:
+            return line.product
+    return lines[0].product
+
+
+def _place_order_once(user_id, lines, cart_id):
+    quantities = {line.product.id: line.qty for line in lines}
+    if _reserve_stock(quantities, cart_id) != len(quantities):
+        db.session.rollback()
+        raise OutOfStock(_first_short(lines, cart_id))
+    if _sold_out(list(quantities)):
+        # availability is part of cached catalog views (API ETags)
+        catalog.bump_version()
+
+    order = Order(
+        user_id=user_id,
+        total_amount=sum(line.product.price * line.qty for line in lines),
+        status="PLACED",
+    )
+    db.session.add(order)
+    db.session.flush()
+    db.session.add_all([
+        OrderItem(order_id=order.id, product_id=line.product.id,
+                  quantity=line.qty, unit_price=line.product.price,
+                  category_id=line.product.category_id)
+        for line in lines
+    ])
+    rollups.record_order(order, [
+        (line.product.id, line.product.category_id, line.qty, line.product.price)
+        for line in lines
+    ])
+    if cart_id is not None:
+        reservations.release(cart_id)
+    db.session.commit()
+    return order
+
+
+def place_order(user_id, lines, attempts=RETRY_ATTEMPTS, cart_id=None):
+    """Create an order for `lines` (``services.cart.CartLine``) atomically.
+
+    `cart_id` is the buyer's cart: its holds count as available and are
+    released with the order. Raises OutOfStock if any line cannot be
+    filled; nothing is written then.
+    """
+    for attempt in range(attempts):
+        try:
+            order = _place_order_once(user_id, lines, cart_id)
+        except DBAPIError as exc:
+            db.session.rollback()
+            if attempt == attempts - 1 or not is_contention(exc):
+                raise
+            time.sleep(RETRY_BASE_DELAY * (2 ** attempt) * (0.5 + random.random()))
+        else:
+            metrics.order_placed(order)
+            return order
@@ -0,0 +1,145 @@
+# services/pagination.py
+import base64
+import json
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import and_, or_
+
+from models import Product
+
+
+# sort name -> (column, descending)
+PRODUCT_SORTS = {
+    "newest": (Product.id, True),
+    "price_asc": (Product.price, False),
+    "price_desc": (Product.price, True),
+    "rating": (Product.rating_avg, True),
+}
+DEFAULT_SORT = "newest"
+# Only valid together with a search rank expression (see services.search).
+RELEVANCE_SORT = "relevance"
+
+
+@dataclass
+class KeysetPage:
+    items: list
+    next_cursor: Optional[str]
+    prev_cursor: Optional[str]
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+# ---------- cursors ----------
+def encode_cursor(values) -> str:
+    raw = json.dumps(list(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+_CURSOR_SCALARS = (str, int, float, type(None))
+
+
+def decode_cursor(cursor: str, size=None) -> list:
+    """Raises ValueError for anything that is not a cursor we produced:
+    a non-empty list of `size` (if given) str/int/float/None values."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception as exc:
+        raise ValueError("invalid cursor") from exc
+    if not isinstance(values, list) or not values:
+        raise ValueError("invalid cursor")
+    if size is not None and len(values) != size:
+        raise ValueError("invalid cursor")
+    if any(isinstance(v, bool) or not isinstance(v, _CURSOR_SCALARS) for v in values):
+        raise ValueError("invalid cursor")
+    return values
+
+
+# ---------- keyset pagination ----------
+def _sort_keys(sort, rank=None):
+    if sort == RELEVANCE_SORT and rank is not None:
+        return [rank, Product.id], False
+    column, desc = PRODUCT_SORTS.get(sort, PRODUCT_SORTS[DEFAULT_SORT])
+    # Product.id is always the tie-breaker so every row has a unique position.
+    if column is Product.id:
+        return [Product.id], desc
+    return [column, Product.id], desc
+
+
+def _after(columns, values, desc):
+    """Rows strictly after `values` in the given direction."""
+    clauses = []
+    for i, col in enumerate(columns):
+        prefix = [columns[j] == values[j] for j in range(i)]
+        clauses.append(and_(*prefix, col < values[i] if desc else col > values[i]))
+    return or_(*clauses)
+
+
+def paginate(query, columns, desc, after=None, before=None, per_page=24, extra_key=False):
+    """Keyset-paginate any ORM query ordered by `columns`.
+
+    The last column must be unique (normally the primary key). `after` /
+    `before` are cursors returned on a previous page. Positions are derived
+    from the last row seen rather than an offset, so rows inserted meanwhile
+    never shift or duplicate the rows on the following pages, and the cost of
+    a page does not grow with its depth.
+
+    With ``extra_key=True`` the query yields ``(entity, key0)`` tuples where
+    key0 is the computed value of ``columns[0]`` (e.g. a search rank).
+    """
+    backwards = before is not None and after is None
+    cursor = before if backwards else after
+
+    if cursor is not None:
+        values = decode_cursor(cursor, size=len(columns))
+        query = query.filter(_after(columns, values, desc != backwards))
+
+    scan_desc = desc != backwards
+    query = query.order_by(*[c.desc() if scan_desc else c.asc() for c in columns])
+    rows = query.limit(per_page + 1).all()
+
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if extra_key:
+        keys = [[key0] + [getattr(entity, c.key) for c in columns[1:]] for entity, key0 in rows]
+        rows = [entity for entity, _ in rows]
+    else:
+        keys = [[getattr(row, c.key) for c in columns] for row in rows]
+    if backwards:
+        keys.reverse()
+        rows.reverse()
+
+    if not rows:
+        return KeysetPage(items=[], next_cursor=None, prev_cursor=None)
+
+    if backwards:
+        has_next, has_prev = True, has_more
+    else:
+        has_next, has_prev = has_more, cursor is not None
+
+    return KeysetPage(
+        items=rows,
+        next_cursor=encode_cursor(keys[-1]) if has_next else None,
+        prev_cursor=encode_cursor(keys[0]) if has_prev else None,
+    )
+
+
+def paginate_products(query, sort=DEFAULT_SORT, after=None, before=None, per_page=24, rank=None):
+    """Keyset-paginate a Product query by one of PRODUCT_SORTS.
+
+    Pass the `rank` expression from ``services.search.apply_search`` to
+    allow ``sort="relevance"``.
+    """
+    columns, desc = _sort_keys(sort, rank)
+    ranked = columns[0] is rank
+    if ranked:
+        query = query.add_columns(rank)
+    return paginate(query, columns, desc, after=after, before=before,
+                    per_page=per_page, extra_key=ranked)
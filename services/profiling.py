@@ -0,0 +1,177 @@
+# services/profiling.py
+"""Per-request timing and SQL instrumentation.
+
+A sampled fraction of requests (PROFILE_SAMPLE_RATE, 0 disables) records:
+- endpoint, method and path
+- wall time and template render time
+- the number and total time of SQL statements
+- the few slowest statements
+Finished profiles go into a bounded ring buffer per worker
+(PROFILE_BUFFER_SIZE). The admin performance page reads it.
+
+Unsampled requests pay for one random() call and a flag check in each
+hook. Nothing is shared between workers; each page view shows the worker
+that served it.
+"""
+import random
+import threading
+import time
+from collections import deque, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Tuple
+
+from flask import g, request, has_request_context, before_render_template, template_rendered
+from sqlalchemy import event
+
+SLOWEST_KEPT = 3
+STATEMENT_MAX_CHARS = 500
+
+
+@dataclass
+class RequestProfile:
+    endpoint: str
+    method: str
+    path: str
+    started_at: datetime
+    status: int = 0
+    wall_ms: float = 0.0
+    render_ms: float = 0.0
+    sql_count: int = 0
+    sql_ms: float = 0.0
+    slowest: List[Tuple[float, str]] = field(default_factory=list)  # (ms, statement)
+
+    def add_statement(self, ms, statement):
+        self.sql_count += 1
+        self.sql_ms += ms
+        if len(self.slowest) < SLOWEST_KEPT or ms > self.slowest[-1][0]:
+            self.slowest.append((ms, statement[:STATEMENT_MAX_CHARS]))
+            self.slowest.sort(key=lambda s: s[0], reverse=True)
+            del self.slowest[SLOWEST_KEPT:]
+
+
+class ProfileBuffer:
+    def __init__(self, size=500):
+        self._items = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def resize(self, size):
+        with self._lock:
+            self._items = deque(self._items, maxlen=size)
+
+    def add(self, profile):
+        with self._lock:
+            self._items.append(profile)
+
+    def snapshot(self):
+        with self._lock:
+            return list(self._items)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+buffer = ProfileBuffer()
+
+
+def _current():
+    return g.get("_profile") if has_request_context() else None
+
+
+# ---------- hooks ----------
+def _start_request(rate):
+    if rate > 0 and (rate >= 1 or random.random() < rate):
+        g._profile = RequestProfile(
+            endpoint=request.endpoint or "<unmatched>",
+            method=request.method,
+            path=request.full_path.rstrip("?"),
+            started_at=datetime.utcnow(),
+        )
+        g._profile_t0 = time.perf_counter()
+
+
+def _finish_request(response):
+    profile = _current()
+    if profile is not None:
+        profile.status = response.status_code
+        profile.wall_ms = (time.perf_counter() - g._profile_t0) * 1000
+        buffer.add(profile)
+        g._profile = None
+    return response
+
+
+def _before_render(sender, template, context, **extra):
+    if _current() is not None:
+        g._render_t0 = time.perf_counter()
+
+
+def _after_render(sender, template, context, **extra):
+    profile = _current()
+    if profile is not None and g.get("_render_t0") is not None:
+        profile.render_ms += (time.perf_counter() - g._render_t0) * 1000
+        g._render_t0 = None
+
+
+# the start time lives on the statement's execution context, so a statement
+# that raises (no after_cursor_execute) leaves nothing behind on the connection
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _current() is not None:
+        context._profile_t0 = time.perf_counter()
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current()
+    t0 = getattr(context, "_profile_t0", None)
+    if profile is not None and t0 is not None:
+        profile.add_statement((time.perf_counter() - t0) * 1000, statement)
+
+
+def init_app(app, db):
+    buffer.resize(app.config.get("PROFILE_BUFFER_SIZE", 500))
+
+    @app.before_request
+    def _sample():
+        _start_request(app.config.get("PROFILE_SAMPLE_RATE", 0))
+
+    app.after_request(_finish_request)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+
+    with app.app_context():
+        for engine in db.engines.values():
+            if not event.contains(engine, "before_cursor_execute", _before_execute):
+                event.listen(engine, "before_cursor_execute", _before_execute)
+                event.listen(engine, "after_cursor_execute", _after_execute)
+
+
+# ---------- reporting ----------
+def _p95(values):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+def endpoint_stats(profiles):
+    """Per-endpoint aggregates, slowest p95 first."""
+    grouped = defaultdict(list)
+    for p in profiles:
+        grouped[p.endpoint].append(p)
+    rows = []
+    for endpoint, items in grouped.items():
+        n = len(items)
+        rows.append({
+            "endpoint": endpoint,
+            "count": n,
+            "mean_ms": sum(p.wall_ms for p in items) / n,
+            "p95_ms": _p95([p.wall_ms for p in items]),
+            "max_ms": max(p.wall_ms for p in items),
+            "render_ms": sum(p.render_ms for p in items) / n,
+            "sql_count": sum(p.sql_count for p in items) / n,
+            "sql_ms": sum(p.sql_ms for p in items) / n,
+        })
+    rows.sort(key=lambda r: r["p95_ms"], reverse=True)
+    return rows
+
+
+def slowest_requests(profiles, limit=25):
+    return sorted(profiles, key=lambda p: p.wall_ms, reverse=True)[:limit]
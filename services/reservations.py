@@ -0,0 +1,234 @@
+# services/reservations.py
+"""Stock reservations (holds) for cart lines.
+
+Adding a piece to a cart holds those units for RESERVATION_TTL seconds.
+Any later change to the cart refreshes the TTL of its live holds; a hold
+that has already lapsed is dropped and must be taken again. Removing
+the line, clearing the cart or checking out releases the hold. Until then
+other carts cannot add the units, and checkout cannot sell them.
+
+Availability is ``stock`` minus the units held by *other* carts whose hold
+has not expired. That is one SUM over the covering
+``(product_id, expires_at, quantity, cart_id)`` index, so it reads only
+the holds on the products involved, however many carts are open. Expired
+holds are left out of the SUM by time, so correctness never depends on
+the sweeper. The sweeper only deletes dead rows, in batches: a background
+thread in each worker (every RESERVATION_SWEEP_INTERVAL seconds), or
+``flask reservations sweep`` from cron.
+
+Concurrent holds on one product are serialised by locking its row
+(``FOR UPDATE`` on Postgres; SQLite serialises all writers), and lock
+contention is retried like checkout.
+"""
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.exc import DBAPIError
+
+from extensions import db
+from models import Product, StockReservation
+from services.database import is_contention
+
+RETRY_ATTEMPTS = 5
+RETRY_BASE_DELAY = 0.02  # seconds
+
+
+def _expiry(now):
+    return now + timedelta(seconds=current_app.config.get("RESERVATION_TTL", 900))
+
+
+# ---------- availability ----------
+def held_by_others(product_id, cart_id=None, now=None):
+    """Scalar subquery: units of `product_id` (a column or value) held by
+    unexpired holds of carts other than `cart_id`."""
+    query = select(func.coalesce(func.sum(StockReservation.quantity), 0)).where(
+        StockReservation.product_id == product_id,
+        StockReservation.expires_at > (now or datetime.utcnow()),
+    )
+    if cart_id is not None:
+        query = query.where(StockReservation.cart_id != cart_id)
+    return query.scalar_subquery()
+
+
+def available(product_ids, cart_id=None):
+    """{product_id: units `cart_id` could hold or buy} for the given products."""
+    if not product_ids:
+        return {}
+    rows = db.session.execute(
+        select(Product.id, Product.stock - held_by_others(Product.id, cart_id))
+        .where(Product.id.in_(product_ids))
+    ).all()
+    return {pid: max(units or 0, 0) for pid, units in rows}
+
+
+# ---------- holds ----------
+def _reserve_once(cart_id, quantities):
+    now = datetime.utcnow()
+    expires_at = _expiry(now)
+    ids = sorted(quantities)
+
+    # writes first, so SQLite takes its write lock before anything is read.
+    # Lapsed holds are dropped, not refreshed: their units may have gone to
+    # another cart since, so they are re-checked below like a new hold.
+    db.session.execute(
+        delete(StockReservation)
+        .where(StockReservation.cart_id == cart_id, StockReservation.expires_at <= now)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.execute(
+        update(StockReservation)
+        .where(StockReservation.cart_id == cart_id, StockReservation.expires_at > now)
+        .values(expires_at=expires_at).execution_options(synchronize_session=False)
+    )
+    stock = dict(db.session.execute(
+        select(Product.id, Product.stock).where(Product.id.in_(ids))
+        .order_by(Product.id).with_for_update()
+    ).all())
+    own = dict(db.session.execute(
+        select(StockReservation.product_id, StockReservation.quantity)
+        .where(StockReservation.cart_id == cart_id, StockReservation.product_id.in_(ids))
+    ).all())
+    others = dict(db.session.execute(
+        select(StockReservation.product_id, func.sum(StockReservation.quantity))
+        .where(StockReservation.product_id.in_(ids), StockReservation.expires_at > now,
+               StockReservation.cart_id != cart_id)
+        .group_by(StockReservation.product_id)
+    ).all())
+
+    short = {}
+    for pid in ids:
+        wanted = quantities[pid]
+        if wanted <= 0 or pid not in stock:
+            if pid in own:
+                db.session.execute(delete(StockReservation).where(
+                    StockReservation.cart_id == cart_id, StockReservation.product_id == pid))
+            if wanted > 0:
+                short[pid] = 0
+            continue
+        free = max((stock[pid] or 0) - (others.get(pid) or 0), 0)
+        if wanted > free and wanted > own.get(pid, 0):  # giving units back always succeeds
+            short[pid] = free
+        elif pid in own:
+            db.session.execute(
+                update(StockReservation)
+                .where(StockReservation.cart_id == cart_id, StockReservation.product_id == pid)
+                .values(quantity=wanted).execution_options(synchronize_session=False)
+            )
+        else:
+            db.session.add(StockReservation(cart_id=cart_id, product_id=pid,
+                                            quantity=wanted, expires_at=expires_at))
+    db.session.commit()
+    return short
+
+
+def reserve(cart_id, quantities, attempts=RETRY_ATTEMPTS):
+    """Set `cart_id`'s holds on the given products to the given totals.
+
+    `quantities` maps product id to the cart's new quantity; 0 releases the
+    hold. Returns ``{product_id: units available}`` for lines that could
+    not be held in full; those keep their previous hold. The cart's live
+    holds get a fresh TTL; lapsed ones are dropped. Commits.
+    """
+    for attempt in range(attempts):
+        try:
+            return _reserve_once(cart_id, {int(pid): int(qty) for pid, qty in quantities.items()})
+        except DBAPIError as exc:
+            db.session.rollback()
+            if attempt == attempts - 1 or not is_contention(exc):
+                raise
+            time.sleep(RETRY_BASE_DELAY * (2 ** attempt) * (0.5 + random.random()))
+
+
+def release(cart_id):
+    """Drop every hold of `cart_id`; the caller commits."""
+    db.session.execute(delete(StockReservation).where(StockReservation.cart_id == cart_id))
+
+
+# ---------- sweeping ----------
+def sweep(batch_size=1000):
+    """Delete expired holds, one batch per transaction; returns the rows removed."""
+    now = datetime.utcnow()
+    removed = 0
+    while True:
+        # expires_at of the batch_size-th oldest dead hold bounds this batch
+        bound = db.session.execute(
+            select(StockReservation.expires_at).where(StockReservation.expires_at <= now)
+            .order_by(StockReservation.expires_at).offset(batch_size - 1).limit(1)
+        ).scalar()
+        removed += db.session.execute(
+            delete(StockReservation).where(StockReservation.expires_at <= (bound or now))
+        ).rowcount
+        db.session.commit()
+        if bound is None:
+            return removed
+
+
+_sweeper_lock = threading.Lock()
+_sweeper_pid = None
+
+
+def _sweep_forever(app, interval, batch_size):
+    while True:
+        time.sleep(interval * (0.5 + random.random()))  # spread workers out
+        with app.app_context():
+            try:
+                sweep(batch_size)
+            except Exception:
+                db.session.rollback()
+                app.logger.exception("reservation sweep failed")
+            finally:
+                db.session.remove()
+
+
+def _ensure_sweeper():
+    """Start this process's sweeper thread on its first request (after any fork)."""
+    global _sweeper_pid
+    if _sweeper_pid == os.getpid():
+        return
+    with _sweeper_lock:
+        if _sweeper_pid == os.getpid():
+            return
+        app = current_app._get_current_object()
+        threading.Thread(
+            target=_sweep_forever, name="reservation-sweeper", daemon=True,
+            args=(app, app.config["RESERVATION_SWEEP_INTERVAL"],
+                  app.config.get("RESERVATION_SWEEP_BATCH", 1000)),
+        ).start()
+        _sweeper_pid = os.getpid()
+
+
+def init_app(app):
+    if app.config.get("RESERVATION_SWEEP_INTERVAL", 0) > 0:
+        app.before_request(_ensure_sweeper)
+
+
+# ---------- CLI ----------
+reservations_cli = AppGroup("reservations", help="Cart stock reservations.")
+
+
+@reservations_cli.command("sweep")
+@click.option("--batch-size", default=1000, show_default=True)
+def sweep_command(batch_size):
+    """Delete expired holds."""
+    click.echo(f"Removed {sweep(batch_size)} expired holds.")
+
+
+@reservations_cli.command("stats")
+def stats_command():
+    """Active and expired hold counts."""
+    now = datetime.utcnow()
+    active = db.session.execute(
+        select(func.count(), func.coalesce(func.sum(StockReservation.quantity), 0))
+        .where(StockReservation.expires_at > now)
+    ).one()
+    expired = db.session.execute(
+        select(func.count()).select_from(StockReservation).where(StockReservation.expires_at <= now)
+    ).scalar()
+    click.echo(f"{active[0]} active holds ({active[1]} units), {expired} expired awaiting sweep.")
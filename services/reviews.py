@@ -0,0 +1,136 @@
+# services/reviews.py
+"""Product reviews and the rating aggregates on ``Product``.
+
+Only approved reviews count. ``rating_count``, ``rating_sum`` and
+``rating_avg`` are adjusted in the same transaction as the moderation
+write, with one relative UPDATE, so the grid can show and sort by rating
+without touching ``review``. ``flask reviews reconcile`` recomputes every
+product from scratch if the two ever drift apart.
+
+Moderation writes are guarded (``... WHERE approved = false``, ``DELETE
+... RETURNING approved``), so two admins approving or deleting the same
+review at once adjust the aggregates only once. A user can review a piece
+once, enforced by a unique (user_id, product_id) constraint.
+"""
+import click
+from flask.cli import AppGroup
+from sqlalchemy import case, func, select, update, delete as delete_, cast, or_, Float
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.attributes import set_committed_value
+
+from extensions import db
+from models import Product, Review
+from services import catalog
+
+MIN_RATING, MAX_RATING = 1, 5
+
+
+class ReviewError(ValueError):
+    pass
+
+
+def _adjust(product_id, rating, sign):
+    """Add (sign=1) or remove (sign=-1) one approved rating."""
+    new_count = Product.rating_count + sign
+    new_sum = Product.rating_sum + sign * rating
+    db.session.execute(
+        update(Product)
+        .where(Product.id == product_id)
+        .values(
+            rating_count=new_count,
+            rating_sum=new_sum,
+            rating_avg=case((new_count > 0, cast(new_sum, Float) / new_count), else_=0.0),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    # ratings are part of cached catalog views (facets, API)
+    catalog.bump_version()
+
+
+# ---------- writes ----------
+def submit(user, product, rating, content, auto_approve=False):
+    """Create a review; it counts towards the aggregates once approved."""
+    try:
+        rating = int(rating)
+    except (TypeError, ValueError):
+        raise ReviewError("Please choose a rating.")
+    if not MIN_RATING <= rating <= MAX_RATING:
+        raise ReviewError(f"Rating must be between {MIN_RATING} and {MAX_RATING}.")
+    content = (content or "").strip()
+    if not content:
+        raise ReviewError("Please write a few words about the piece.")
+    if Review.query.filter_by(user_id=user.id, product_id=product.id).first():
+        raise ReviewError("You have already reviewed this piece.")
+
+    review = Review(user_id=user.id, product_id=product.id, rating=rating,
+                    content=content, approved=bool(auto_approve))
+    db.session.add(review)
+    try:
+        db.session.flush()
+    except IntegrityError:  # a concurrent submit got there first
+        db.session.rollback()
+        raise ReviewError("You have already reviewed this piece.")
+    if auto_approve:
+        _adjust(review.product_id, review.rating, 1)
+    db.session.commit()
+    return review
+
+
+def approve(review):
+    """Approve `review` and count it, unless it is already approved; the caller commits."""
+    flipped = db.session.execute(
+        update(Review)
+        .where(Review.id == review.id, Review.approved.is_(False))
+        .values(approved=True)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    set_committed_value(review, "approved", True)
+    if flipped == 1:
+        _adjust(review.product_id, review.rating, 1)
+
+
+def delete(review):
+    """Delete `review`, uncounting it if it was approved; the caller commits."""
+    was_approved = db.session.execute(
+        delete_(Review).where(Review.id == review.id).returning(Review.approved)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+    db.session.expunge(review)
+    if was_approved:
+        _adjust(review.product_id, review.rating, -1)
+
+
+# ---------- reconciliation ----------
+def reconcile():
+    """Recompute every product's aggregates; returns the products changed."""
+    approved = Review.approved.is_(True)
+    count = (select(func.count(Review.id))
+             .where(Review.product_id == Product.id, approved).scalar_subquery())
+    total = (select(func.coalesce(func.sum(Review.rating), 0))
+             .where(Review.product_id == Product.id, approved).scalar_subquery())
+    changed = db.session.execute(
+        select(func.count(Product.id))
+        .where(or_(Product.rating_count != count, Product.rating_sum != total))
+    ).scalar()
+
+    db.session.execute(update(Product).values(rating_count=count, rating_sum=total)
+                       .execution_options(synchronize_session=False))
+    db.session.execute(update(Product).values(rating_avg=case(
+        (Product.rating_count > 0, cast(Product.rating_sum, Float) / Product.rating_count),
+        else_=0.0)).execution_options(synchronize_session=False))
+
+    if changed:
+        catalog.bump_version()
+    db.session.commit()
+    return changed
+
+
+# ---------- CLI ----------
+reviews_cli = AppGroup("reviews", help="Review aggregate maintenance.")
+
+
+@reviews_cli.command("reconcile")
+def reconcile_command():
+    """Recompute rating_count / rating_sum / rating_avg from approved reviews."""
+    changed = reconcile()
+    click.echo(f"Reconciled ratings; {changed} products corrected.")
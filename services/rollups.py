@@ -0,0 +1,267 @@
+# services/rollups.py
+"""Daily sales rollups behind the admin reports page.
+
+``sales_daily``, ``sales_daily_product`` and ``sales_daily_category`` are
+bumped in the same transaction as the order write: +1 when checkout places
+an order, -1 when an admin cancels it (and +1 again if it is un-cancelled).
+The reports page only aggregates these tables, whose size grows with
+days x products sold rather than with order volume. ``sales_customer``
+holds the lifetime totals per customer behind the admin customer list.
+
+Category buckets use the category recorded on each ``order_item`` at
+checkout, so cancelling or restoring an order later reverses exactly what
+was added, even if the product has moved category since. ``flask reports
+backfill`` rebuilds everything from ``order`` / ``order_item`` if the two
+ever drift apart.
+"""
+import importlib
+from collections import defaultdict
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import func, select, insert, update, case, cast, or_, Date
+
+from extensions import db
+from models import (Order, OrderItem, Product, Category,
+                    DailySales, DailyProductSales, DailyCategorySales, CustomerSales)
+
+CANCELLED = "CANCELLED"
+
+
+# ---------- incremental updates ----------
+def _increment(model, keys, rows):
+    """Add each row's counters onto the existing rollup row (upsert)."""
+    if not rows:
+        return
+    counters = [k for k in rows[0] if k not in keys]
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect in ("sqlite", "postgresql"):
+        # imported per dialect so workers don't load the PostgreSQL one on SQLite
+        dialect_insert = importlib.import_module(f"sqlalchemy.dialects.{dialect}").insert
+        stmt = dialect_insert(model).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=keys,
+            set_={k: getattr(model, k) + stmt.excluded[k] for k in counters},
+        )
+        db.session.execute(stmt)
+        return
+
+    for row in rows:
+        existing = db.session.get(model, tuple(row[k] for k in keys), with_for_update=True)
+        if existing is None:
+            db.session.add(model(**row))
+        else:
+            for k in counters:
+                setattr(existing, k, getattr(existing, k) + row[k])
+
+
+def record_order(order, lines, sign=1):
+    """Apply an order to the rollups.
+
+    `lines` are ``(product_id, category_id, qty, unit_price)`` tuples; use
+    ``sign=-1`` to take a cancelled order back out.
+    """
+    record_orders([(order, lines)], sign)
+
+
+def record_orders(orders, sign=1):
+    """record_order for many ``(order, lines)`` pairs, one upsert per rollup table."""
+    daily = defaultdict(lambda: [0, 0, 0.0])
+    by_product = defaultdict(lambda: [0, 0.0])
+    by_category = defaultdict(lambda: [0, 0.0])
+    by_customer = defaultdict(lambda: [0, 0.0])
+    last_order = {}
+
+    for order, lines in orders:
+        day = order.created_at.date()
+        daily[day][0] += sign
+        by_customer[order.user_id][0] += sign
+        for product_id, category_id, qty, unit_price in lines:
+            amount = qty * unit_price
+            for bucket in (by_product[day, product_id],
+                           by_category[day, category_id or DailyCategorySales.UNCATEGORISED]):
+                bucket[0] += sign * qty
+                bucket[1] += sign * amount
+            daily[day][1] += sign * qty
+            daily[day][2] += sign * amount
+            by_customer[order.user_id][1] += sign * amount
+        if sign > 0:
+            last_order[order.user_id] = max(order.created_at,
+                                            last_order.get(order.user_id, order.created_at))
+
+    _increment(DailySales, ["day"], [
+        {"day": day, "order_count": n, "units": u, "revenue": r}
+        for day, (n, u, r) in daily.items()
+    ])
+    _increment(DailyProductSales, ["day", "product_id"], [
+        {"day": day, "product_id": pid, "units": u, "revenue": r}
+        for (day, pid), (u, r) in by_product.items()
+    ])
+    _increment(DailyCategorySales, ["day", "category_id"], [
+        {"day": day, "category_id": cid, "units": u, "revenue": r}
+        for (day, cid), (u, r) in by_category.items()
+    ])
+    _increment(CustomerSales, ["user_id"], [
+        {"user_id": uid, "order_count": n, "revenue": r}
+        for uid, (n, r) in by_customer.items()
+    ])
+    for user_id, created_at in last_order.items():
+        db.session.execute(
+            update(CustomerSales)
+            .where(CustomerSales.user_id == user_id,
+                   or_(CustomerSales.last_order_at.is_(None),
+                       CustomerSales.last_order_at < created_at))
+            .values(last_order_at=created_at)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def _order_lines(order_ids):
+    """{order_id: [(product_id, category_id, qty, unit_price)]} in one query."""
+    lines = defaultdict(list)
+    rows = db.session.execute(
+        select(OrderItem.order_id, OrderItem.product_id, OrderItem.category_id,
+               OrderItem.quantity, OrderItem.unit_price)
+        .where(OrderItem.order_id.in_(order_ids))
+    )
+    for order_id, *line in rows:
+        lines[order_id].append(tuple(line))
+    return lines
+
+
+def record_status_change(order, old_status, new_status):
+    """Keep rollups in step when an order moves into or out of CANCELLED."""
+    record_status_changes([(order, old_status, new_status)])
+
+
+def record_status_changes(changes):
+    """record_status_change for many ``(order, old_status, new_status)`` at once.
+
+    `order` only needs ``id``, ``user_id`` and ``created_at``.
+    """
+    moved = [(order, -1 if new == CANCELLED else 1) for order, old, new in changes
+             if old != new and CANCELLED in (old, new)]
+    if not moved:
+        return
+    lines = _order_lines([order.id for order, _ in moved])
+    for sign in (-1, 1):
+        record_orders([(order, lines[order.id]) for order, s in moved if s == sign], sign)
+
+
+# ---------- reads ----------
+def sales_summary():
+    row = db.session.query(
+        func.coalesce(func.sum(DailySales.order_count), 0),
+        func.coalesce(func.sum(DailySales.revenue), 0.0),
+    ).one()
+    return {"orders": int(row[0]), "revenue": float(row[1])}
+
+
+def top_products(limit=5):
+    units = func.sum(DailyProductSales.units)
+    return (
+        db.session.query(
+            func.coalesce(Product.name, "Deleted product").label("name"),
+            units.label("quantity"),
+            func.sum(DailyProductSales.revenue).label("revenue"),
+        )
+        .outerjoin(Product, Product.id == DailyProductSales.product_id)
+        .group_by(DailyProductSales.product_id, Product.name)
+        .having(units > 0)
+        .order_by(units.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def monthly_sales():
+    """[("YYYY-MM", revenue)] in calendar order."""
+    year = func.extract("year", DailySales.day)
+    month = func.extract("month", DailySales.day)
+    rows = (
+        db.session.query(year.label("year"), month.label("month"),
+                         func.sum(DailySales.revenue).label("total"))
+        .group_by(year, month)
+        .order_by(year, month)
+        .all()
+    )
+    return [(f"{int(r.year):04d}-{int(r.month):02d}", float(r.total or 0)) for r in rows]
+
+
+def category_sales():
+    units = func.sum(DailyCategorySales.units)
+    return (
+        db.session.query(
+            func.coalesce(Category.name, "Uncategorised").label("name"),
+            Category.subcategory.label("subcategory"),
+            units.label("quantity"),
+            func.sum(DailyCategorySales.revenue).label("revenue"),
+        )
+        .outerjoin(Category, Category.id == DailyCategorySales.category_id)
+        .group_by(DailyCategorySales.category_id, Category.name, Category.subcategory)
+        .having(units > 0)
+        .order_by(func.sum(DailyCategorySales.revenue).desc())
+        .all()
+    )
+
+
+# ---------- backfill ----------
+def _day(column):
+    if db.session.get_bind().dialect.name == "sqlite":
+        return func.date(column)
+    return cast(column, Date)
+
+
+def backfill():
+    """Rebuild every rollup from order history with set-based INSERT ... SELECT."""
+    for model in (DailySales, DailyProductSales, DailyCategorySales, CustomerSales):
+        db.session.query(model).delete()
+
+    day = _day(Order.created_at).label("day")
+    amount = OrderItem.quantity * OrderItem.unit_price
+    live = (select()
+            .select_from(OrderItem)
+            .join(Order, Order.id == OrderItem.order_id)
+            .where(Order.status != CANCELLED))
+
+    db.session.execute(insert(DailySales).from_select(
+        ["day", "order_count", "units", "revenue"],
+        live.add_columns(day, func.count(func.distinct(Order.id)),
+                         func.sum(OrderItem.quantity), func.sum(amount))
+            .group_by(day),
+    ))
+    db.session.execute(insert(DailyProductSales).from_select(
+        ["day", "product_id", "units", "revenue"],
+        live.add_columns(day, OrderItem.product_id,
+                         func.sum(OrderItem.quantity), func.sum(amount))
+            .group_by(day, OrderItem.product_id),
+    ))
+    category_id = func.coalesce(OrderItem.category_id, DailyCategorySales.UNCATEGORISED)
+    db.session.execute(insert(DailyCategorySales).from_select(
+        ["day", "category_id", "units", "revenue"],
+        live.add_columns(day, category_id, func.sum(OrderItem.quantity), func.sum(amount))
+            .group_by(day, category_id),
+    ))
+    placed = Order.status != CANCELLED
+    db.session.execute(insert(CustomerSales).from_select(
+        ["user_id", "order_count", "revenue", "last_order_at"],
+        select(Order.user_id,
+               func.sum(case((placed, 1), else_=0)),
+               func.coalesce(func.sum(case((placed, Order.total_amount), else_=0.0)), 0.0),
+               func.max(Order.created_at))
+        .group_by(Order.user_id),
+    ))
+    db.session.commit()
+    return db.session.query(func.count()).select_from(DailySales).scalar()
+
+
+# ---------- CLI ----------
+reports_cli = AppGroup("reports", help="Sales rollup maintenance.")
+
+
+@reports_cli.command("backfill")
+def backfill_command():
+    """Recompute the daily sales rollups from all orders."""
+    days = backfill()
+    click.echo(f"Rebuilt sales rollups for {days} days.")
@@ -0,0 +1,189 @@
+# services/search.py
+"""Full-text product search.
+
+SQLite uses an FTS5 table (``product_fts``, rowid = product.id) and Postgres a
+``product_search`` tsvector table with a GIN index. Both are kept in sync by
+the admin product/category routes calling the ``index_*`` / ``remove_*``
+helpers below inside the same transaction as the write. Any other database,
+or one where the index has not been created yet, falls back to ILIKE.
+"""
+import re
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import inspect, text, or_, func, literal_column, table, column
+from sqlalchemy.orm import contains_eager
+
+from extensions import db
+from models import Product, Category
+
+FTS_TABLE = "product_fts"
+PG_TABLE = "product_search"
+
+_fts = table(FTS_TABLE, column("rowid"), column("rank"))
+_pg = table(PG_TABLE, column("product_id"), column("document"))
+
+# engine url -> backend name, so the table check runs once per worker
+_backends = {}
+
+
+# ---------- backend ----------
+def backend():
+    engine = db.engine
+    key = str(engine.url)
+    if key not in _backends:
+        dialect = engine.dialect.name
+        if dialect == "sqlite" and inspect(engine).has_table(FTS_TABLE):
+            _backends[key] = "fts5"
+        elif dialect == "postgresql" and inspect(engine).has_table(PG_TABLE):
+            _backends[key] = "tsvector"
+        else:
+            _backends[key] = "like"
+    return _backends[key]
+
+
+def _terms(q):
+    return re.findall(r"\w+", q or "", flags=re.UNICODE)
+
+
+def create_index(bind=None):
+    """Create the search table for the current dialect if it is missing."""
+    bind = bind or db.engine
+    if bind.dialect.name == "sqlite":
+        with bind.begin() as conn:
+            conn.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                "name, description, category, subcategory, "
+                "tokenize = 'unicode61 remove_diacritics 2')"
+            ))
+    elif bind.dialect.name == "postgresql":
+        with bind.begin() as conn:
+            conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {PG_TABLE} ("
+                "product_id INTEGER PRIMARY KEY REFERENCES product(id) ON DELETE CASCADE, "
+                "document TSVECTOR NOT NULL)"
+            ))
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_{PG_TABLE}_document "
+                f"ON {PG_TABLE} USING GIN (document)"
+            ))
+    _backends.clear()
+
+
+# ---------- querying ----------
+def apply_search(query, q):
+    """Restrict a Product query to matches for `q`.
+
+    Returns ``(query, rank)`` where `rank` is an expression that sorts best
+    matches first when ordered ascending, or None for the LIKE fallback.
+    """
+    terms = _terms(q)
+    if not terms:
+        return query, None
+
+    kind = backend()
+    if kind == "fts5":
+        match = " ".join(f'"{t}"*' for t in terms)
+        query = (query.join(_fts, _fts.c.rowid == Product.id)
+                 .filter(literal_column(FTS_TABLE).op("MATCH")(match)))
+        return query, _fts.c.rank  # bm25: lower is better
+
+    if kind == "tsvector":
+        tsquery = func.to_tsquery("simple", " & ".join(f"{t}:*" for t in terms))
+        query = (query.join(_pg, _pg.c.product_id == Product.id)
+                 .filter(_pg.c.document.op("@@")(tsquery)))
+        return query, -func.ts_rank(_pg.c.document, tsquery)
+
+    for t in terms:
+        pattern = f"%{t}%"
+        query = query.filter(or_(Product.name.ilike(pattern), Product.description.ilike(pattern)))
+    return query, None
+
+
+def catalog_query(q, category=None, subcategory=None):
+    """Storefront product query: optional search text plus category filters.
+
+    Returns ``(query, rank)`` like ``apply_search``.
+    """
+    products, rank = apply_search(Product.query, q)
+    if category or subcategory:
+        products = products.join(Category)
+    if category:
+        products = products.filter(Category.name == category)
+    if subcategory:
+        products = products.filter(Category.subcategory == subcategory)
+    return products, rank
+
+
+# ---------- index maintenance ----------
+def _document(product):
+    category = product.category
+    return {
+        "id": product.id,
+        "name": product.name or "",
+        "description": product.description or "",
+        "category": category.name if category else "",
+        "subcategory": (category.subcategory or "") if category else "",
+    }
+
+
+def index_product(product):
+    """Upsert one product. Call after flush (so it has an id), before commit."""
+    kind = backend()
+    if kind == "fts5":
+        db.session.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {"id": product.id})
+        db.session.execute(text(
+            f"INSERT INTO {FTS_TABLE} (rowid, name, description, category, subcategory) "
+            "VALUES (:id, :name, :description, :category, :subcategory)"
+        ), _document(product))
+    elif kind == "tsvector":
+        db.session.execute(text(
+            f"INSERT INTO {PG_TABLE} (product_id, document) VALUES (:id, "
+            "setweight(to_tsvector('simple', CAST(:name AS TEXT)), 'A') || "
+            "setweight(to_tsvector('simple', CAST(:category AS TEXT)), 'B') || "
+            "setweight(to_tsvector('simple', CAST(:subcategory AS TEXT)), 'B') || "
+            "setweight(to_tsvector('simple', CAST(:description AS TEXT)), 'C')) "
+            "ON CONFLICT (product_id) DO UPDATE SET document = EXCLUDED.document"
+        ), _document(product))
+
+
+def remove_product(product_id):
+    kind = backend()
+    if kind == "fts5":
+        db.session.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {"id": product_id})
+    elif kind == "tsvector":
+        db.session.execute(text(f"DELETE FROM {PG_TABLE} WHERE product_id = :id"), {"id": product_id})
+
+
+def index_category(category_id):
+    """Re-index every product in a category after it is renamed or deleted."""
+    if backend() == "like":
+        return
+    for product in Product.query.filter_by(category_id=category_id).all():
+        index_product(product)
+
+
+def rebuild_index(batch_size=1000):
+    create_index()
+    if backend() == "like":
+        return 0
+    db.session.execute(text(f"DELETE FROM {FTS_TABLE if backend() == 'fts5' else PG_TABLE}"))
+    count = 0
+    query = Product.query.outerjoin(Category).options(contains_eager(Product.category))
+    for product in query.order_by(Product.id).yield_per(batch_size):
+        index_product(product)
+        count += 1
+    db.session.commit()
+    return count
+
+
+# ---------- CLI ----------
+search_cli = AppGroup("search", help="Product search index maintenance.")
+
+
+@search_cli.command("rebuild")
+@click.option("--batch-size", default=1000, show_default=True)
+def rebuild_command(batch_size):
+    """Create the search index if needed and re-index every product."""
+    count = rebuild_index(batch_size)
+    click.echo(f"Indexed {count} products ({backend()}).")
@@ -0,0 +1,355 @@
+# services/suggest.py
+"""Search-as-you-type suggestions from an in-memory prefix index.
+
+Each worker holds one sorted array of ``(key, ...)`` entries covering
+product names, categories and subcategories. Every word of a name starts
+a key ("kundan bridal set", "bridal set", "set"), so "bri" finds it too.
+A lookup bisects to the run of keys with the typed prefix and takes the
+top k from precomputed per-block top lists (see PrefixIndex). Whole-name
+matches come first, then categories, then the most reviewed products.
+Results are memoised per prefix until the index changes.
+
+The index is built on first use (and by the worker warm-up) with one
+query, and it stays within SUGGEST_MAX_BYTES. Past the budget, word keys
+are dropped first, then the least reviewed products.
+
+Admin product writes update the writing worker's index once they have
+committed (``product_saved`` / ``product_removed``), through a small
+delta. Other workers notice the catalog version move and rebuild in a
+background thread, serving the previous index meanwhile, so no request
+waits on a rebuild.
+"""
+import heapq
+import sys
+import threading
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from itertools import chain
+from operator import itemgetter
+
+from flask import current_app
+from sqlalchemy import select
+
+from extensions import db
+from models import Product
+from services import metrics
+from services.catalog import current_version
+
+MAX_LIMIT = 20
+BLOCK_SIZES = (4096, 64)  # largest first
+TOP_LEN = MAX_LIMIT + 12  # slack for duplicate keys and tombstoned rows; see _block
+DELTA_MAX = 256
+MEMO_SIZE = 4096
+KIND_RANK = {"category": 2, "subcategory": 1, "product": 0}
+
+_score = itemgetter(1)
+
+
+def normalise(text):
+    return " ".join((text or "").casefold().split())
+
+
+@dataclass
+class IndexStats:
+    version: int
+    keys: int
+    bytes: int
+    dropped: int
+    pending: int
+
+    def summary(self):
+        note = f", {self.dropped} keys over budget" if self.dropped else ""
+        return (f"{self.keys} keys, ~{self.bytes / 1024:.0f} KiB{note}, "
+                f"{self.pending} pending changes")
+
+
+class PrefixIndex:
+    """Sorted array of ``(key, score, kind, ref, label)`` entries.
+
+    ``score`` is ``(whole name, kind rank, weight, -len(label))``, higher
+    first; ``ref`` is the product id for products and the name for
+    categories. The array is frozen once built. Every block of 64 and of
+    4096 entries keeps its top TOP_LEN by score. The matches for a prefix
+    are one contiguous range, so a lookup merges a handful of block lists
+    with the at most 2x63 loose entries at the range's edges. The cost
+    does not grow with the number of matches. A block whose top list runs
+    out before the lookup has its results (its leaders were duplicates or
+    tombstoned) carries on with the rest of the block, sorted on first
+    need, so results never go missing.
+
+    Later writes go to a small sorted delta, plus tombstones for replaced
+    or deleted main entries; both count towards the byte budget. A rebuild
+    folds them in once there are DELTA_MAX of them (``needs_rebuild``).
+    """
+
+    def __init__(self, version, max_bytes):
+        self.version = version
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.dropped = 0
+        self._entries = []
+        self._tops = {}
+        self._delta = []
+        self._delta_refs = {}  # (kind, ref) -> its delta entries
+        self._tombstones = set()
+        self._rest = {}  # (block size, block no) -> the block past its top list
+        self._scores = {}
+        self._memo = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _keys(label):
+        words = normalise(label).split(" ")
+        return [" ".join(words[i:]) for i in range(len(words)) if words[i]]
+
+    @staticmethod
+    def _size(entry, leading):
+        # entry + key + score tuples, list slot, share of the block tops; label once
+        size = sys.getsizeof(entry) + sys.getsizeof(entry[0]) + sys.getsizeof(entry[1]) + 16
+        return size + (sys.getsizeof(entry[4]) if leading else 0)
+
+    def _make(self, kind, ref, label, weight, first=0, words=True):
+        """Entries for keys[first:] (only the whole name unless `words`) within the budget."""
+        keys = self._keys(label)
+        made = []
+        for i in range(first, len(keys) if words else min(1, len(keys))):
+            score = (int(i == 0), KIND_RANK[kind], weight, -len(label))
+            shared = self._scores.setdefault(score, score)  # most scores repeat
+            entry = (keys[i], shared, kind, ref, label)
+            size = self._size(entry, i == 0) - (sys.getsizeof(score) if shared is not score else 0)
+            if self.bytes + size > self.max_bytes:
+                self.dropped += len(keys) - i
+                break
+            self.bytes += size
+            made.append(entry)
+        return made
+
+    def freeze(self):
+        """Sort the bulk-loaded entries and compute the block tops."""
+        self._entries.sort()
+        for size in BLOCK_SIZES:
+            self._tops[size] = [heapq.nlargest(TOP_LEN, self._entries[i:i + size], key=_score)
+                                for i in range(0, len(self._entries), size)]
+
+    # ---------- incremental ----------
+    @staticmethod
+    def _ref_size(ref):
+        # a (kind, ref) tuple plus its set or dict slot
+        return sys.getsizeof(("product", ref)) + sys.getsizeof(ref) + 32
+
+    def _drop(self, kind, ref):
+        made = self._delta_refs.pop((kind, ref), None)
+        if made is not None:
+            for entry in made:
+                del self._delta[bisect_left(self._delta, entry)]
+                self.bytes -= self._size(entry, entry[1][0])
+            self.bytes -= self._ref_size(ref) + sys.getsizeof(made)
+        if (kind, ref) not in self._tombstones:
+            self._tombstones.add((kind, ref))
+            self.bytes += self._ref_size(ref)
+
+    def put_product(self, product_id, name, weight):
+        with self._lock:
+            self._drop("product", product_id)
+            made = self._make("product", product_id, name, weight)
+            for entry in made:
+                insort(self._delta, entry)
+            if made:
+                self._delta_refs["product", product_id] = made
+                self.bytes += self._ref_size(product_id) + sys.getsizeof(made)
+            self._memo = {}
+
+    def remove_product(self, product_id):
+        with self._lock:
+            self._drop("product", product_id)
+            self._memo = {}
+
+    @property
+    def needs_rebuild(self):
+        return len(self._delta) + len(self._tombstones) > DELTA_MAX
+
+    # ---------- lookup ----------
+    def _rest_of(self, size, n):
+        """Entries of block `n` below its top list, best first; sorted once, on demand."""
+        rest = self._rest.get((size, n))
+        if rest is None:
+            top = set(self._tops[size][n])
+            rest = sorted((e for e in self._entries[n * size:(n + 1) * size] if e not in top),
+                          key=_score, reverse=True)
+            self._rest[size, n] = rest
+            self.bytes += sys.getsizeof(rest)
+        yield from rest
+
+    def _block(self, size, n):
+        """All of block `n` best first: its top list, then (lazily) the rest."""
+        top = self._tops[size][n]
+        if len(top) < TOP_LEN:
+            return top
+        return chain(top, self._rest_of(size, n))
+
+    def _candidates(self, lo, hi):
+        """Streams sorted by score, best first, that together cover entries[lo:hi]."""
+        lists, loose = [], []
+        i = lo
+        while i < hi:
+            for size in BLOCK_SIZES:
+                if i % size == 0 and i + size <= hi:
+                    lists.append(self._block(size, i // size))
+                    i += size
+                    break
+            else:
+                step = min(hi, i - i % BLOCK_SIZES[-1] + BLOCK_SIZES[-1])
+                loose.extend(self._entries[i:step])
+                i = step
+        if loose:
+            lists.append(sorted(loose, key=_score, reverse=True))
+        return lists
+
+    def search(self, prefix, limit):
+        """[(kind, ref, label)] best first for a normalised prefix."""
+        memo_key = (prefix, limit)
+        memo = self._memo
+        hit = memo.get(memo_key)
+        if hit is not None:
+            return hit
+
+        end = (prefix + "\U0010ffff",)
+        entries, delta, tombstones = self._entries, self._delta, self._tombstones
+        lo = bisect_left(entries, (prefix,))
+        main = heapq.merge(*self._candidates(lo, bisect_left(entries, end, lo)),
+                           key=_score, reverse=True)
+        if tombstones:
+            main = (e for e in main if (e[2], e[3]) not in tombstones)
+        stream = main
+        if delta:
+            dlo = bisect_left(delta, (prefix,))
+            recent = sorted(delta[dlo:bisect_left(delta, end, dlo)], key=_score, reverse=True)
+            stream = heapq.merge(main, recent, key=_score, reverse=True)
+
+        result, seen = [], set()
+        for _, _, kind, ref, label in stream:
+            if (kind, ref) not in seen:
+                seen.add((kind, ref))
+                result.append((kind, ref, label))
+                if len(result) == limit:
+                    break
+
+        if len(memo) >= MEMO_SIZE:
+            memo.clear()
+        memo[memo_key] = result
+        return result
+
+    def stats(self):
+        return IndexStats(self.version, len(self._entries) + len(self._delta), self.bytes,
+                          self.dropped, len(self._delta) + len(self._tombstones))
+
+
+# ---------- building ----------
+def build(version=None):
+    """A fresh index of the current catalog."""
+    from services.facets import get_facets
+
+    version = current_version() if version is None else version
+    index = PrefixIndex(version, current_app.config.get("SUGGEST_MAX_BYTES", 16 * 1024 * 1024))
+    facets = get_facets()
+    for kind, names in (("category", facets.categories), ("subcategory", facets.subcategories)):
+        for name, count in names:
+            index._entries.extend(index._make(kind, name, name, count))
+
+    products = db.session.execute(
+        select(Product.id, Product.name, Product.rating_count)
+        .order_by(Product.rating_count.desc(), Product.id)
+    ).all()
+    # whole names for every product first, then word keys while the budget lasts
+    indexed = []
+    for row in products:
+        made = index._make("product", row.id, row.name, row.rating_count or 0, words=False)
+        if made:
+            index._entries.extend(made)
+            indexed.append(row)
+    for row in indexed:
+        index._entries.extend(index._make("product", row.id, row.name, row.rating_count or 0, first=1))
+    index.freeze()
+    return index
+
+
+_lock = threading.Lock()
+_state = {"index": None, "rebuilding": False}
+
+
+def _rebuild_in_background(app, version):
+    try:
+        with app.app_context():
+            try:
+                _state["index"] = build(version)
+            except Exception:
+                db.session.rollback()
+                app.logger.exception("suggest index rebuild failed")
+            finally:
+                db.session.remove()
+    finally:
+        _state["rebuilding"] = False
+
+
+def get_index():
+    """This worker's index. Starts a background rebuild when the catalog
+    version has moved or the delta is full; the current index serves meanwhile."""
+    index = _state["index"]
+    version = current_version()
+    if index is None:
+        with _lock:
+            if _state["index"] is None:
+                _state["index"] = build(version)
+            return _state["index"]
+    fresh = index.version == version
+    metrics.cache_lookup("suggest", fresh)
+    if not fresh or index.needs_rebuild:
+        with _lock:
+            if not _state["rebuilding"]:
+                _state["rebuilding"] = True
+                threading.Thread(
+                    target=_rebuild_in_background, name="suggest-rebuild", daemon=True,
+                    args=(current_app._get_current_object(), version),
+                ).start()
+    return index
+
+
+def suggest(query, limit=8):
+    """[(kind, ref, label)] for what the user has typed so far."""
+    prefix = normalise(query)
+    if not prefix:
+        return []
+    return get_index().search(prefix, limit)
+
+
+# ---------- incremental updates ----------
+def _adopt(index, before):
+    # our own write bumped the version by one; take it without a rebuild
+    version = current_version()
+    if version == before + 1:
+        index.version = version
+
+
+def product_saved(product):
+    """Patch this worker's index after a product write has committed."""
+    index = _state["index"]
+    if index is None:
+        return
+    before = index.version
+    index.put_product(product.id, product.name, product.rating_count or 0)
+    _adopt(index, before)
+
+
+def product_removed(product_id):
+    """Patch this worker's index after a product delete has committed."""
+    index = _state["index"]
+    if index is None:
+        return
+    before = index.version
+    index.remove_product(product_id)
+    _adopt(index, before)
+
+
+def stats():
+    index = _state["index"]
+    return index.stats() if index is not None else None
@@ -0,0 +1,173 @@
+# services/users.py
+"""Account maintenance from the command line (``flask users ...``).
+
+Replaces the old ``make_admin.py`` / ``reset_password.py`` scripts. Every
+command that changes a user bumps the identity version in the same
+transaction, so running workers drop their cached copy within
+USER_CACHE_VERSION_TTL seconds (services/identity.py).
+
+    flask users promote a@example.com b@example.com   # or --file admins.txt
+    flask users promote --revoke a@example.com
+    flask users reset-password a@example.com          # prompts for the password
+    flask users list --admins
+    flask users import accounts.csv                   # email,username,password[,is_admin]
+"""
+import csv
+from itertools import islice
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import select, update
+from werkzeug.security import generate_password_hash
+
+from extensions import db
+from models import User
+from services.identity import identity_cache, bump_version
+
+users_cli = AppGroup("users", help="Customer and admin account maintenance.")
+
+IMPORT_BATCH = 1000
+IMPORT_COLUMNS = ("email", "username", "password")
+
+
+def _emails(emails, path):
+    found = [e.strip() for e in emails]
+    if path:
+        with open(path, encoding="utf-8") as fh:
+            found += [line.strip() for line in fh if line.strip() and not line.startswith("#")]
+    return list(dict.fromkeys(e for e in found if e))
+
+
+def _delay():
+    return current_app.config.get("USER_CACHE_VERSION_TTL", 2)
+
+
+def set_admin(emails, is_admin=True):
+    """Set is_admin for every matching email; returns (user ids, missing emails)."""
+    rows = db.session.execute(select(User.id, User.email).where(User.email.in_(emails))).all()
+    ids = [r.id for r in rows]
+    if ids:
+        db.session.execute(update(User).where(User.id.in_(ids)).values(is_admin=is_admin)
+                           .execution_options(synchronize_session=False))
+        bump_version()
+        db.session.commit()
+        for user_id in ids:
+            identity_cache.invalidate(user_id)
+    known = {r.email for r in rows}
+    return ids, [e for e in emails if e not in known]
+
+
+def set_password(email, password):
+    """Returns False if there is no such user."""
+    user = User.query.filter_by(email=email).first()
+    if user is None:
+        return False
+    user.set_password(password)
+    bump_version()
+    db.session.commit()
+    identity_cache.invalidate(user.id)
+    return True
+
+
+# ---------- CLI ----------
+@users_cli.command("promote")
+@click.argument("emails", nargs=-1)
+@click.option("--file", "path", type=click.Path(exists=True, dir_okay=False),
+              help="Read further emails from a file, one per line.")
+@click.option("--revoke", is_flag=True, help="Remove admin rights instead.")
+def promote_command(emails, path, revoke):
+    """Grant (or --revoke) admin rights."""
+    emails = _emails(emails, path)
+    if not emails:
+        raise click.UsageError("Give at least one email or --file.")
+    ids, missing = set_admin(emails, is_admin=not revoke)
+    click.echo(f"{'Revoked' if revoke else 'Granted'} admin for {len(ids)} users "
+               f"(running workers pick this up within {_delay()}s).")
+    for email in missing:
+        click.echo(f"Not found: {email}", err=True)
+    if missing:
+        raise SystemExit(1)
+
+
+@users_cli.command("reset-password")
+@click.argument("email")
+@click.password_option("--password", help="New password (prompted for if omitted).")
+def reset_password_command(email, password):
+    """Set a new password for EMAIL."""
+    if not set_password(email, password):
+        raise click.ClickException(f"User {email} not found.")
+    click.echo(f"Password updated for {email} "
+               f"(running workers pick this up within {_delay()}s).")
+
+
+@users_cli.command("list")
+@click.option("--admins", is_flag=True, help="Only admin accounts.")
+def list_command(admins):
+    """Print id, email and username, one user per line."""
+    query = select(User.id, User.email, User.username, User.is_admin).order_by(User.id)
+    if admins:
+        query = query.where(User.is_admin.is_(True))
+    for row in db.session.execute(query.execution_options(yield_per=IMPORT_BATCH)):
+        fields = [str(row.id), row.email, row.username] + (["admin"] if row.is_admin else [])
+        click.echo("\t".join(fields))
+
+
+def _import_rows(reader, on_error):
+    """Yield ``(line_no, email, username, password, is_admin)`` per usable row;
+    rows missing a required field go to ``on_error(line_no, reason)``."""
+    for row in reader:
+        values = {col: (row.get(col) or "").strip() for col in IMPORT_COLUMNS}
+        missing = [col for col in IMPORT_COLUMNS if not values[col]]
+        if missing:
+            on_error(reader.line_num, f"missing {', '.join(missing)}")
+            continue
+        is_admin = (row.get("is_admin") or "").strip().lower() in ("1", "true", "yes")
+        yield reader.line_num, values["email"], values["username"], values["password"], is_admin
+
+
+@users_cli.command("import")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+def import_command(path):
+    """Create accounts from a CSV with email,username,password[,is_admin] columns.
+
+    The file is read IMPORT_BATCH rows at a time and each batch is one
+    INSERT. Rows whose email or username is taken, or that lack a required
+    field, are reported and skipped.
+    """
+    created = skipped = 0
+
+    def report(line_no, reason):
+        nonlocal skipped
+        skipped += 1
+        click.echo(f"line {line_no}: skipped, {reason}", err=True)
+
+    with open(path, newline="", encoding="utf-8-sig") as fh:
+        reader = csv.DictReader(fh)
+        absent = [col for col in IMPORT_COLUMNS if col not in (reader.fieldnames or ())]
+        if absent:
+            raise click.ClickException(f"{path}: missing column(s) {', '.join(absent)}.")
+
+        rows = _import_rows(reader, report)
+        while batch := list(islice(rows, IMPORT_BATCH)):
+            emails = [r[1] for r in batch]
+            usernames = [r[2] for r in batch]
+            taken = set(db.session.scalars(select(User.email).where(User.email.in_(emails))))
+            taken |= set(db.session.scalars(select(User.username).where(User.username.in_(usernames))))
+            new = []
+            for line_no, email, username, password, is_admin in batch:
+                if email in taken or username in taken:
+                    report(line_no, f"{email} or {username} is taken")
+                    continue
+                taken.update((email, username))
+                new.append({
+                    "email": email,
+                    "username": username,
+                    "password_hash": generate_password_hash(password),
+                    "is_admin": is_admin,
+                })
+            if new:
+                db.session.execute(User.__table__.insert(), new)
+                db.session.commit()
+                created += len(new)
+    click.echo(f"Created {created} users, skipped {skipped}.")
@@ -0,0 +1,180 @@
+# services/warmup.py
+"""Template bytecode cache and worker warm-up.
+
+Compiled templates are written to a filesystem bytecode cache shared by
+every worker (JINJA_CACHE_DIR, default ``instance/jinja_cache``). A new
+worker then loads bytecode instead of compiling the source again. Jinja
+writes the cache files atomically, so concurrent workers are safe, and
+entries are keyed by a checksum of the template source, so a deploy never
+serves stale bytecode.
+
+``warm(app)`` runs when wsgi.py is imported (WARMUP_ON_START). It loads
+every template under ``templates/``, configures the ORM mappers, fills the
+catalog version and facet caches, builds the autocomplete index and runs
+the default storefront query once. The first real request therefore pays
+none of those costs. The timings are logged and shown on the admin
+performance page; ``flask warmup run`` prints them too.
+
+Under ``gunicorn --preload`` (the recommended setup) wsgi.py is imported
+once, in the master: warm-up runs there and every forked worker inherits
+the warmed caches. Database connections must not cross a fork, so
+``on_start`` disposes of the engine's pool afterwards and each worker
+opens its own on first use. Without ``--preload`` each worker imports
+wsgi.py and warms itself, and the dispose is equally harmless.
+"""
+import os
+import shutil
+import time
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from jinja2 import FileSystemBytecodeCache
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import configure_mappers
+
+from extensions import db
+
+
+class CountingBytecodeCache(FileSystemBytecodeCache):
+    """FileSystemBytecodeCache that counts hits and misses for the report."""
+
+    def __init__(self, directory):
+        super().__init__(directory)
+        self.hits = 0
+        self.misses = 0
+
+    def load_bytecode(self, bucket):
+        super().load_bytecode(bucket)
+        if bucket.code is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+
+@dataclass
+class WarmupReport:
+    templates: int = 0
+    from_cache: int = 0
+    templates_ms: float = 0.0
+    caches_ms: float = 0.0
+    total_ms: float = 0.0
+    slowest: List[Tuple[str, float]] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+
+    def summary(self):
+        return (f"{self.templates} templates ({self.from_cache} from bytecode cache) "
+                f"in {self.templates_ms:.0f}ms, caches {self.caches_ms:.0f}ms, "
+                f"total {self.total_ms:.0f}ms")
+
+
+def cache_dir(app):
+    return app.config.get("JINJA_CACHE_DIR") or os.path.join(app.instance_path, "jinja_cache")
+
+
+def init_app(app):
+    if not app.config.get("JINJA_BYTECODE_CACHE", True):
+        return
+    directory = cache_dir(app)
+    try:
+        os.makedirs(directory, exist_ok=True)
+    except OSError as exc:  # read-only deploy: compile in memory as before
+        app.logger.warning("template bytecode cache disabled: %s", exc)
+        return
+    app.jinja_env.bytecode_cache = CountingBytecodeCache(directory)
+
+
+# ---------- warm-up ----------
+def _load_templates(app, report):
+    env = app.jinja_env
+    bcc = env.bytecode_cache
+    hits_before = bcc.hits if isinstance(bcc, CountingBytecodeCache) else 0
+    timings = []
+    started = time.perf_counter()
+    for name in env.list_templates(extensions=["html"]):
+        t0 = time.perf_counter()
+        try:
+            env.get_template(name)
+        except Exception as exc:  # a broken template must not stop the worker booting
+            report.errors.append(f"{name}: {exc}")
+            continue
+        timings.append((name, (time.perf_counter() - t0) * 1000))
+    report.templates_ms = (time.perf_counter() - started) * 1000
+    report.templates = len(timings)
+    if isinstance(bcc, CountingBytecodeCache):
+        report.from_cache = bcc.hits - hits_before
+    report.slowest = sorted(timings, key=lambda t: t[1], reverse=True)[:5]
+
+
+def _prime_caches(app, report):
+    from services import search, suggest
+    from services.catalog import current_version
+    from services.facets import get_facets
+    from services.pagination import paginate_products
+
+    started = time.perf_counter()
+    try:
+        configure_mappers()
+        current_version()  # also opens the first pooled connection
+        get_facets()
+        # compiles and caches the storefront grid statement
+        query, _ = search.catalog_query(None, None, None)
+        paginate_products(query, per_page=app.config["PRODUCTS_PER_PAGE"])
+        suggest.get_index()
+    except SQLAlchemyError as exc:  # e.g. schema not migrated yet
+        report.errors.append(f"caches: {exc.__class__.__name__}: {exc}")
+        db.session.rollback()
+    finally:
+        db.session.remove()
+    report.caches_ms = (time.perf_counter() - started) * 1000
+
+
+def warm(app):
+    """Precompile templates and fill the per-worker caches; returns a WarmupReport."""
+    report = WarmupReport()
+    started = time.perf_counter()
+    with app.app_context():
+        _load_templates(app, report)
+        _prime_caches(app, report)
+    report.total_ms = (time.perf_counter() - started) * 1000
+    app.extensions["warmup"] = report
+    app.logger.info("warm-up: %s", report.summary())
+    for error in report.errors:
+        app.logger.warning("warm-up: %s", error)
+    return report
+
+
+def on_start(app):
+    """Warm the serving process, then drop its pooled connections so none
+    are shared with forked workers. Skipped under the `flask` command,
+    which may run before the schema exists (e.g. `flask db upgrade`)."""
+    if app.config.get("WARMUP_ON_START", True) and click.get_current_context(silent=True) is None:
+        warm(app)
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose()
+
+
+# ---------- CLI ----------
+warmup_cli = AppGroup("warmup", help="Template bytecode cache and worker warm-up.")
+
+
+@warmup_cli.command("run")
+def run_command():
+    """Warm up as a new worker would and print the timings."""
+    report = warm(current_app._get_current_object())
+    click.echo(report.summary())
+    for name, ms in report.slowest:
+        click.echo(f"  {ms:7.1f}ms  {name}")
+    for error in report.errors:
+        click.echo(f"error: {error}", err=True)
+
+
+@warmup_cli.command("clear-cache")
+def clear_cache_command():
+    """Delete the template bytecode cache."""
+    directory = cache_dir(current_app)
+    shutil.rmtree(directory, ignore_errors=True)
+    click.echo(f"Removed {directory}.")
@@ -0,0 +1,33 @@
+# tests/conftest.py
+import pytest
+
+from benchmarks.common import build_app
+
+
+@pytest.fixture
+def app():
+    app, tmpdir = build_app()
+    with tmpdir:
+        from extensions import db
+        from models import Category, Product, User
+
+        with app.app_context():
+            db.create_all()
+            category = Category(name="Gold", subcategory="Ring")
+            db.session.add(category)
+            db.session.flush()
+            db.session.add(Product(name="Temple ring", price=100.0, stock=5,
+                                   category_id=category.id))
+            user = User(username="buyer", email="buyer@example.com")
+            user.set_password("pw")
+            db.session.add(user)
+            db.session.commit()
+        yield app
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,41 @@
+# tests/test_cart_store.py
+from extensions import db
+from models import Cart, CartItem
+from services import cart_store
+
+
+def _login(client):
+    return client.post("/login", data={"email": "buyer@example.com", "password": "pw"})
+
+
+def test_add_to_cart_after_prune_starts_a_new_cart(app, client):
+    with app.app_context():
+        pruned_id = cart_store.get_store().create()
+    with client.session_transaction() as sess:
+        sess[cart_store.SESSION_KEY] = pruned_id
+
+    result = app.test_cli_runner().invoke(cart_store.carts_cli, ["prune", "--days", "0"])
+    assert "Removed 1 abandoned carts." in result.output
+
+    _login(client)
+    response = client.post("/cart/add/1", data={"qty": 2})
+    assert response.status_code == 302
+
+    with client.session_transaction() as sess:
+        cart_id = sess[cart_store.SESSION_KEY]
+    assert cart_id != pruned_id
+    with app.app_context():
+        assert db.session.get(Cart, cart_id) is not None
+        items = CartItem.query.all()
+        assert [(i.cart_id, i.product_id, i.quantity) for i in items] == [(cart_id, 1, 2)]
+
+
+def test_save_recreates_a_cart_pruned_mid_request(app):
+    with app.app_context():
+        store = cart_store.get_store()
+        cart_id = store.create()
+        store.delete(cart_id)
+
+        assert store.save(cart_id, {"1": 3}) == 3
+        assert db.session.get(Cart, cart_id).item_count == 3
+        assert store.load(cart_id) == {"1": 3}
@@ -0,0 +1,43 @@
+# tests/test_catalog_io.py
+import io
+
+from models import Product
+from services.catalog_io import import_catalog
+
+
+def _import(app, text, **kwargs):
+    errors = []
+    with app.app_context():
+        stats = import_catalog(io.StringIO(text), "jsonl",
+                               on_error=lambda line_no, exc: errors.append((line_no, str(exc))),
+                               **kwargs)
+        names = sorted((p.id, p.name, p.price) for p in Product.query.filter(Product.id != 1))
+    return stats, errors, names
+
+
+def test_later_row_wins_for_a_repeated_id(app):
+    stats, errors, names = _import(app, (
+        '{"id": 50, "name": "Kada", "price": 10}\n'
+        '{"id": 50, "name": "Kada II", "price": 12}\n'
+    ))
+    assert names == [(50, "Kada II", 12.0)]
+    assert errors == [(1, "superseded by a later row with the same id")]
+    assert stats["inserted"] == 1 and stats["skipped"] == 1
+
+
+def test_repeated_name_inserts_one_product(app):
+    _, _, names = _import(app, (
+        '{"name": "Jhumka", "price": 10}\n'
+        '{"name": "Jhumka", "price": 11}\n'
+    ), match="name")
+    assert [(name, price) for _, name, price in names] == [("Jhumka", 11.0)]
+
+
+def test_non_finite_prices_are_skipped(app):
+    stats, errors, names = _import(app, (
+        '{"name": "A", "price": NaN}\n'
+        '{"name": "B", "price": "inf"}\n'
+        '{"name": "C", "price": 5}\n'
+    ))
+    assert [line for line, _ in errors] == [1, 2]
+    assert [name for _, name, _ in names] == ["C"]
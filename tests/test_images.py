@@ -0,0 +1,46 @@
+# tests/test_images.py
+import io
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from services import images
+
+PIL = pytest.importorskip("PIL.Image")
+
+
+def _upload(data, filename="piece.png"):
+    return FileStorage(stream=io.BytesIO(data), filename=filename)
+
+
+def _png(width, height):
+    out = io.BytesIO()
+    PIL.new("RGB", (width, height), (200, 160, 40)).save(out, "PNG")
+    return out.getvalue()
+
+
+@pytest.fixture
+def upload_dir(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(images, "_upload_dir", lambda: str(tmp_path))
+    images._variant_widths.cache_clear()
+    with app.app_context():
+        yield tmp_path
+
+
+def test_srcset_uses_the_real_widths_of_a_small_portrait_image(upload_dir):
+    url = images.save_upload(_upload(_png(300, 600)))
+    sources = images.image_sources(url)
+    base = url[:-len(".jpg")]
+    # thumb 80x160, card 240x480, detail 300x600 (never upscaled)
+    assert sources["jpg"] == f"{base}-thumb.jpg 80w, {base}-card.jpg 240w, {base}-detail.jpg 300w"
+
+
+def test_undecodable_upload_is_an_upload_error(upload_dir):
+    with pytest.raises(images.UploadError):
+        images.save_upload(_upload(b"\x89PNG\r\n\x1a\n not really a png"))
+
+
+def test_decompression_bomb_is_an_upload_error(upload_dir, monkeypatch):
+    monkeypatch.setattr(PIL, "MAX_IMAGE_PIXELS", 1000)
+    with pytest.raises(images.UploadError):
+        images.save_upload(_upload(_png(100, 100)))
@@ -0,0 +1,21 @@
+# tests/test_order_export.py
+from extensions import db
+from models import Order, User
+from services.order_export import orders_cli
+
+
+def test_cli_export_filters_by_customer(app):
+    with app.app_context():
+        buyer = User.query.one()
+        other = User(username="other", email="other@example.com", password_hash="x")
+        db.session.add(other)
+        db.session.flush()
+        db.session.add_all([Order(user_id=buyer.id, total_amount=10.0),
+                            Order(user_id=other.id, total_amount=20.0)])
+        db.session.commit()
+
+    result = app.test_cli_runner().invoke(orders_cli, ["export", "--format", "jsonl",
+                                                       "--customer", "other@example.com"])
+    assert result.exit_code == 0, result.output
+    lines = [line for line in result.output.splitlines() if line.startswith("{")]
+    assert len(lines) == 1 and '"customer_email": "other@example.com"' in lines[0]
@@ -0,0 +1,24 @@
+# tests/test_profiling.py
+import time
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from extensions import db
+from services import profiling
+
+
+def test_a_failed_statement_does_not_skew_later_timings(app):
+    with app.test_request_context("/"):
+        profiling._start_request(1)
+        with db.engine.connect() as conn:
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM no_such_table"))
+            time.sleep(0.05)
+            conn.execute(text("SELECT 1"))
+            assert "_profile_t0" not in conn.info
+
+        profile = profiling._current()
+        assert profile.sql_count == 1
+        assert profile.sql_ms < 50
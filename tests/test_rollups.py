@@ -0,0 +1,26 @@
+# tests/test_rollups.py
+from extensions import db
+from models import Category, DailyCategorySales, Product, User
+from services import order_status
+from services.cart import CartLine
+from services.orders import place_order
+
+
+def test_cancel_reverses_the_category_recorded_at_checkout(app):
+    with app.app_context():
+        product = db.session.get(Product, 1)
+        user = User.query.one()
+        order = place_order(user.id, [CartLine(product=product, qty=2)])
+
+        moved_to = Category(name="Silver", subcategory="Ring")
+        db.session.add(moved_to)
+        db.session.flush()
+        product.category_id = moved_to.id
+        db.session.commit()
+
+        order_status.apply([order.id], "CANCELLED")
+
+        buckets = {row.category_id: (row.units, row.revenue)
+                   for row in DailyCategorySales.query.all()}
+        assert buckets.get(moved_to.id, (0, 0.0)) == (0, 0.0)
+        assert all(value == (0, 0.0) for value in buckets.values())
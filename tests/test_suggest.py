@@ -0,0 +1,32 @@
+# tests/test_suggest.py
+from services.suggest import PrefixIndex, TOP_LEN
+
+
+def _index(products):
+    index = PrefixIndex(version=1, max_bytes=64 * 1024 * 1024)
+    for product_id, name, weight in products:
+        index._entries.extend(index._make("product", product_id, name, weight))
+    index.freeze()
+    return index
+
+
+def test_search_reaches_past_a_block_top_list_once_its_leaders_are_gone():
+    products = [(pid, f"ring {pid}", pid) for pid in range(1, 5001)]
+    index = _index(products)
+    heaviest = sorted(products, key=lambda p: p[2], reverse=True)
+
+    # remove more of the leaders than the top lists have slack for
+    for pid, _, _ in heaviest[:TOP_LEN + 40]:
+        index.remove_product(pid)
+
+    expected = [pid for pid, _, _ in heaviest[TOP_LEN + 40:TOP_LEN + 60]]
+    assert [ref for _, ref, _ in index.search("ring", 20)] == expected
+
+
+def test_tombstones_and_delta_count_towards_the_budget():
+    index = _index([(pid, f"ring {pid}", pid) for pid in range(1, 101)])
+    before = index.bytes
+    index.remove_product(1)
+    assert index.bytes > before
+    index.put_product(2, "bangle 2", 2)
+    assert index.bytes > before
@@ -0,0 +1,11 @@
+# tests/test_warmup.py
+from extensions import db
+from services import warmup
+
+
+def test_on_start_leaves_no_pooled_connection_to_fork(app):
+    warmup.on_start(app)
+
+    assert "warmup" in app.extensions
+    with app.app_context():
+        assert db.engine.pool.checkedin() == 0
@@ -0,0 +1,17 @@
+# wsgi.py
+"""WSGI entry point for production servers::
+
+    gunicorn --preload wsgi:app
+
+Outside the ``flask`` command, ``create_app`` leaves out the CLI-only
+pieces, and templates are precompiled and caches filled before traffic
+arrives (services/warmup.py), so cold starts stay short. With
+``--preload`` that happens once in the master and the workers inherit it
+through fork; the master's database connections are closed first, so no
+worker shares a socket. Without it, each worker warms itself on import.
+"""
+from app import create_app
+from services import warmup
+
+app = create_app()
+warmup.on_start(app)